@@ -1,65 +1,322 @@
 # KÓD JE URČENÝ PRO STRÁNKU https://commons.wikimedia.org/wiki/Data:ECB_euro_foreign_exchange_reference_rates.tab
 # KÓD SE SPUSTÍ VE WINDOWS A VLOŽÍ SE DO NĚJ SOUBOR STAŽENÝ Z WEBU https://www.ecb.europa.eu/stats/eurofxref/eurofxref-daily.xml
 # DO SCHRÁNKY JE NÁSLEDNĚ ZKOPÍROVÁN OBSAH STRÁNKY, KTERÝ JE NUTNO VLOŽIT NA COMMONS
+# ZVLÁDÁ I HISTORII https://www.ecb.europa.eu/stats/eurofxref/eurofxref-hist.xml - TA SE ROZDĚLÍ NA STRÁNKY PO ROCÍCH
+# S --automaticky BĚŽÍ BEZ OKEN (NAPŘ. Z CRONU): STÁHNE KURZY, POROVNÁ JE SE STRÁNKOU NA COMMONS A ULOŽÍ JEN ZMĚNU
 
 import xml.etree.ElementTree as ET
-import pyperclip
 import json
-from tkinter import Tk, filedialog
+import os
+import io
+import sys
+import argparse
+import urllib.parse
+import urllib.request
+import urllib.error
 
-# Funkce pro zpracování XML souboru a vytvoření výstupu
-def process_xml(file_path):
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-    namespace = {'gesmes': 'http://www.gesmes.org/xml/2002-08-01', '': 'http://www.ecb.int/vocabulary/2002-08-01/eurofxref'}
-
-    # Získání data a kurzů
-    time_element = root.find(".//Cube[@time]", namespace)
-    date = time_element.attrib['time'] if time_element is not None else None
-
-    data = []
-    for cube in root.findall(".//Cube[@currency]", namespace):
-        currency = cube.attrib['currency']
-        rate = cube.attrib['rate']
-        data.append([currency, rate, date])
-
-    # Vytvoření JSON výstupu
+PAGE_TITLE = "Data:ECB euro foreign exchange reference rates.tab"
+DAILY_URL = "https://www.ecb.europa.eu/stats/eurofxref/eurofxref-daily.xml"
+HIST_URL = "https://www.ecb.europa.eu/stats/eurofxref/eurofxref-hist.xml"
+MAX_PAGE_BYTES = 2 * 1024 * 1024  # Limit velikosti stránky na Commons (2 MB)
+ECB_NS = "{http://www.ecb.int/vocabulary/2002-08-01/eurofxref}"
+COMMONS_RAW_URL = "https://commons.wikimedia.org/w/index.php?title={title}&action=raw"
+STATE_PATH = "currencytab_stav.json"  # ETag / Last-Modified posledního zpracovaného stažení
+USER_AGENT = "CurrencytabWikicesty/1.0"
+EDIT_SUMMARY = "Aktualizace kurzů ECB"
+
+# Postupné čtení XML: kurzy jako (datum, měna, kurz), zpracované elementy se hned zahazují
+def iter_rates(source):
+    """
+    Čte eurofxref-daily.xml i eurofxref-hist.xml (cesta nebo otevřený soubor) přes iterparse.
+    Každý den (Cube time=...) se po přečtení smaže, takže paměť nezávisí na délce historie.
+    """
+    date = None
+    parent = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if elem.tag != ECB_NS + "Cube":
+            continue
+        if event == "start":
+            if 'time' in elem.attrib:
+                date = elem.attrib['time']
+            elif 'currency' not in elem.attrib and parent is None:
+                parent = elem  # Obalový Cube, do kterého se dny načítají
+        elif 'currency' in elem.attrib:
+            yield date, elem.attrib['currency'], float(elem.attrib['rate'])
+        elif 'time' in elem.attrib and parent is not None:
+            parent.clear()
+
+
+def build_page(rows_json, source_url, description_suffix=""):
+    """Obsah jedné stránky .tab: kurz jako číslo, kompaktní JSON (bez odsazení). Řádky už jako JSON (rows_json)."""
     output = {
         "license": "CC0-1.0",
         "description": {
-            "de": "Euro-Referenzkurse",
-            "en": "Euro foreign exchange reference rates"
+            "de": "Euro-Referenzkurse" + description_suffix,
+            "en": "Euro foreign exchange reference rates" + description_suffix
         },
-        "sources": "https://www.ecb.europa.eu/stats/eurofxref/eurofxref-daily.xml",
+        "sources": source_url,
         "schema": {
             "fields": [
                 {"name": "currency", "type": "string"},
-                {"name": "EUR", "type": "string"},
+                {"name": "EUR", "type": "number"},
                 {"name": "date", "type": "string"}
             ]
         },
-        "data": data
+        "data": None
     }
+    head = json.dumps(output, ensure_ascii=False, separators=(",", ":"))
+    return head[:-len("null}")] + rows_json + "}"  # "data" je poslední klíč
+
+
+def year_page_title(year, title=PAGE_TITLE):
+    """Název stránky jednoho roku, např. Data:ECB euro foreign exchange reference rates/2024.tab"""
+    return f"{title[:-len('.tab')]}/{year}.tab"
+
+
+def iter_years(source):
+    """
+    Kurzy seskupené po rocích už při čtení: (rok, počet dní, řádky [měna, kurz, datum]).
+    ECB řadí dny souvisle, takže v paměti je vždy jen jeden rok.
+    """
+    year, days, rows, last_date = None, 0, [], None
+    for date, currency, rate in iter_rates(source):
+        if date[:4] != year:
+            if rows:
+                yield year, days, rows
+            year, days, rows = date[:4], 0, []
+        if date != last_date:
+            days += 1
+            last_date = date
+        rows.append([currency, rate, date])
+    if rows:
+        yield year, days, rows
+
+
+# Funkce pro zpracování XML souboru a vytvoření výstupu
+def process_xml(file_path, title=PAGE_TITLE):
+    """
+    Postupně vrací (název stránky, JSON). Denní kurzy (a historie, pokud se vejde) tvoří jednu stránku;
+    větší výstup se rozdělí na stránky po rocích, aby žádná nepřesáhla MAX_PAGE_BYTES.
+    Každý rok se převede na JSON zvlášť; o jedné stránce rozhoduje průběžný součet jejich velikostí,
+    takže se drží nejvýš MAX_PAGE_BYTES hotového výstupu a jeden rozpracovaný rok.
+    """
+    header_bytes = len(build_page("", HIST_URL).encode("utf-8"))
+    buffered = []  # (rok, JSON řádků) dokud se vše vejde na jednu stránku, po rozdělení None
+    size = header_bytes
+    days = 0
+    for year, year_days, rows in iter_years(file_path):
+        days += year_days
+        chunk = json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+        if buffered is None:
+            yield year_page_title(year, title), build_page(chunk, HIST_URL, f" {year}")
+            continue
+        buffered.append((year, chunk))
+        size += len(chunk.encode("utf-8"))
+        if size > MAX_PAGE_BYTES:
+            for buffered_year, buffered_chunk in buffered:
+                yield year_page_title(buffered_year, title), build_page(buffered_chunk, HIST_URL, f" {buffered_year}")
+            buffered = None
+
+    if buffered is not None:
+        # Odhad výše je horní mez: spojení roků nahradí jejich závorky čárkami
+        rows_json = "[" + ",".join(chunk[1:-1] for _, chunk in buffered) + "]"
+        yield title, build_page(rows_json, DAILY_URL if days <= 1 else HIST_URL)
+
+
+def page_file_name(title):
+    """Název souboru stránky v save_pages (bez Data:, lomítka nahrazena)."""
+    return title.split(":", 1)[-1].replace("/", " - ") + ".json"
+
+
+def save_pages(pages, folder):
+    """Uloží každou stránku (dvojice název, obsah) do souboru page_file_name(název), vrací cesty."""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for title, content in pages:
+        path = os.path.join(folder, page_file_name(title))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+
+# --- Automatický režim (bez oken) ---
+def load_state(path):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def store_state(path, state):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+def fetch_feed(source, validators):
+    """
+    Podmíněné stažení kurzů: vrací (obsah, nové validátory), nebo (None, validators), pokud se od
+    minula nic nezměnilo (304 na If-None-Match / If-Modified-Since). Místo URL lze zadat lokální
+    soubor; jako validátor pak slouží čas jeho poslední změny.
+    """
+    if os.path.exists(source):
+        mtime = str(os.path.getmtime(source))
+        if validators.get("last_modified") == mtime:
+            return None, validators
+        with open(source, "rb") as f:
+            return f.read(), {"last_modified": mtime}
+
+    headers = {"User-Agent": USER_AGENT}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    try:
+        with urllib.request.urlopen(urllib.request.Request(source, headers=headers), timeout=60) as response:
+            found = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+            return response.read(), {key: value for key, value in found.items() if value}
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, validators
+        raise
+
+
+def fetch_current_page(commons, title):
+    """
+    Současný obsah stránky na Commons (action=raw), nebo None, pokud neexistuje.
+    commons je šablona URL s {title}, nebo složka se soubory jako ze save_pages (lokální náhrada Commons).
+    """
+    if os.path.isdir(commons):
+        path = os.path.join(commons, page_file_name(title))
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    url = commons.format(title=urllib.parse.quote(title.replace(" ", "_")))
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers={"User-Agent": USER_AGENT}), timeout=60) as response:
+            return response.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+
+
+def page_rates(content):
+    """Co se na stránce porovnává: pole schématu a řádky kurzů (kurz jako číslo, i ze starého formátu s textem)."""
+    page = json.loads(content)
+    fields = [(field["name"], field["type"]) for field in page["schema"]["fields"]]
+    return fields, sorted((currency, float(rate), date) for currency, rate, date in page["data"])
+
+
+def page_changed(current, new):
+    if current is None:
+        return True
+    try:
+        return page_rates(current) != page_rates(new)
+    except (ValueError, KeyError, TypeError):
+        return True  # Nečitelná stránka se přepíše
+
+
+def publish(pages, commons):
+    """Uloží stránky přes pywikibot, nebo do lokální složky zastupující Commons."""
+    if os.path.isdir(commons):
+        save_pages(pages, commons)
+        return
+    site = None
+    for title, content in pages:
+        if site is None:
+            import pywikibot  # Jen pro ukládání na Commons
+            site = pywikibot.Site("commons", "commons")
+        page = pywikibot.Page(site, title)
+        page.text = content
+        page.save(summary=EDIT_SUMMARY)
+
+
+def run_headless(args):
+    """Automatická aktualizace: nic se nestahuje znovu ani neukládá, pokud se kurzy nezměnily."""
+    state = load_state(args.stav)
+    data, validators = fetch_feed(args.zdroj, state.get(args.zdroj, {}))
+    if data is None:
+        print("Kurzy ECB se od minula nezměnily (304), nic se nedělá.")
+        return 0
+
+    titles, changed = [], []
+
+    def changed_pages():
+        # Stránky se porovnávají a ukládají postupně, jak vznikají
+        for title, content in process_xml(io.BytesIO(data)):
+            titles.append(title)
+            if page_changed(fetch_current_page(args.commons, title), content):
+                changed.append(title)
+                yield title, content
+
+    if args.nanecisto:
+        for title, _ in changed_pages():
+            print(f"Změněno (neukládá se): {title}")
+        if changed:
+            return 0
+    else:
+        publish(changed_pages(), args.commons)
+        for title in changed:
+            print(f"Uloženo: {title}")
+    if not changed:
+        print(f"Stránky na Commons jsou aktuální ({len(titles)}), nic se neukládá.")
+    state[args.zdroj] = validators  # Až po úspěšném uložení, jinak by se změna příště nestáhla
+    store_state(args.stav, state)
+    return 0
 
-    # Převod do JSON a kopírování do schránky
-    json_output = json.dumps(output, indent=4)
-    pyperclip.copy(json_output)
-    print("Data byla zkopírována do schránky.")
-    return json_output
 
 # Hlavní část programu
 if __name__ == "__main__":
-    # Otevření dialogu pro výběr souboru
-    Tk().withdraw()  # Skryje hlavní okno tkinter
-    file_path = filedialog.askopenfilename(
-        title="Vyberte XML soubor",
-        filetypes=[("XML soubory", "*.xml"), ("Všechny soubory", "*.*")]
-    )
-    
+    parser = argparse.ArgumentParser(description="Převod kurzů ECB do stránky Data:*.tab na Commons")
+    parser.add_argument("soubor", nargs="?", help="eurofxref-daily.xml nebo eurofxref-hist.xml (bez něj se otevře dialog)")
+    parser.add_argument("--vystup", help="složka pro stránky, pokud se výstup dělí po rocích (výchozí vedle vstupu)")
+    auto = parser.add_argument_group("automatický režim bez oken (cron)")
+    auto.add_argument("--automaticky", action="store_true", help="stáhnout kurzy, porovnat s Commons a uložit jen změnu")
+    auto.add_argument("--zdroj", default=DAILY_URL, help="URL nebo lokální soubor s kurzy ECB (výchozí denní kurzy)")
+    auto.add_argument("--commons", default=COMMONS_RAW_URL,
+                      help="šablona URL s {title} pro současný obsah stránky, nebo lokální složka místo Commons")
+    auto.add_argument("--stav", default=STATE_PATH, help=f"soubor s ETag/Last-Modified (výchozí {STATE_PATH})")
+    auto.add_argument("--nanecisto", action="store_true", help="jen vypsat, co by se uložilo")
+    args = parser.parse_args()
+
+    if args.automaticky:
+        try:
+            sys.exit(run_headless(args))
+        except Exception as e:
+            print(f"Nastala chyba: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    # Schránka a dialog jen pro ruční použití; automatický režim je na serveru nepotřebuje
+    import pyperclip
+    from tkinter import Tk, filedialog
+
+    file_path = args.soubor
+    if not file_path:
+        # Otevření dialogu pro výběr souboru
+        Tk().withdraw()  # Skryje hlavní okno tkinter
+        file_path = filedialog.askopenfilename(
+            title="Vyberte XML soubor",
+            filetypes=[("XML soubory", "*.xml"), ("Všechny soubory", "*.*")]
+        )
+
     if file_path:  # Zkontroluje, zda uživatel vybral soubor
         try:
-            result = process_xml(file_path)
-            print(result)  # Výpis JSON dat do konzole
+            folder = args.vystup or os.path.join(os.path.dirname(os.path.abspath(file_path)), "currencytab")
+            saved = 0
+            for title, result in process_xml(file_path):
+                if title == PAGE_TITLE:
+                    # Jedna stránka: kopírování do schránky jako dřív
+                    pyperclip.copy(result)
+                    print("Data byla zkopírována do schránky.")
+                    print(result)  # Výpis JSON dat do konzole
+                else:
+                    for path in save_pages([(title, result)], folder):
+                        print(f"Uloženo: {path}")
+                    saved += 1
+            if saved:
+                print(f"Výstup je větší než {MAX_PAGE_BYTES // 1024 // 1024} MB, rozdělen na {saved} stránek po rocích.")
         except Exception as e:
             print(f"Nastala chyba při zpracování souboru: {e}")
     else:
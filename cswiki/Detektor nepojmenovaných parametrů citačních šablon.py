@@ -1,60 +1,515 @@
 # DO VSTUPNÍHO OKNA VLOŽIT KÓD ČLÁNKU S CITAČNÍ ŠABLONOU S NEPOJMENOVANÝM PARMETREM A MĚL BY BÝT DETEKOVÁN A VYPSÁN V DOLNÍM OKNĚ
 import re
+import sys
+import json
+import argparse
+import os
+import bz2
+import hashlib
+import sqlite3
+import zlib
+import bisect
+import time
+import queue
+import threading
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import OrderedDict, deque, namedtuple
 import tkinter as tk
 from tkinter import scrolledtext, messagebox
 import mwparserfromhell # Knihovna pro parsování wikitextu
 
-def find_unnamed_parameters(text, template_names):
+# List of monitored citation templates (without "Šablona:" prefix, script finds them even with lowercase)
+CITATION_TEMPLATES = [
+    "Citace monografie", "Citace elektronické monografie", "Citace kvalifikační práce", "Citace elektronického periodika", "Citace periodika", "Citace patentu",
+    "Citace právního předpisu", "Citace sborníku", "Cite encyclopedia", "Nahlížení do KN", "Citace normy", 
+    "Cite web", "Cite paper", "Cite news", "Cite journal", "Citace webu", "Citace Sbírky zákonů", "Citace soudního rozhodnutí", 
+    "Cite press release", "Cite book", "Cite Q", "Citace webu", "SpringerEOM", "Citation", "Cit", "Citace arXiv", "Citace DzU", "Citace koránu", "Citace videohry", "Citace knihy", "Citace konference"
+]
+
+MAINTENANCE_CATEGORY = "Kategorie:Údržba:Citační šablona s nepojmenovaným parametrem"
+PRELOAD_BATCH = 50  # Pages per API request when preloading texts in batch mode
+
+# Markup whose content mwparserfromhell does not parse as templates
+PROTECTED_RE = re.compile(r'<!--.*?(?:-->|\Z)|<(nowiki|pre|syntaxhighlight|source|math)\b[^>/]*>.*?(?:</\1\s*>|\Z)',
+                          re.DOTALL | re.IGNORECASE)
+BRACES_RE = re.compile(r'\{\{|\}\}')
+SECTION_SPLIT_RE = re.compile(r'^(?==+[^=\n].*=[ \t]*$)', re.MULTILINE)  # Zero-width split before each heading line
+DEBOUNCE_MS = 400  # Live analysis starts this long after the last keystroke
+POLL_MS = 50  # How often the GUI picks up results from the analysis thread
+PARSE_CACHE_SIZE = 2000  # Page structures kept in memory by ParseCache
+PARSE_CACHE_COMMIT_EVERY = 200  # Disk cache writes per SQLite commit
+PARSE_CACHE_VERSION = 1  # Bump when extract_structure changes, invalidates disk caches
+
+# Watch mode
+EVENTSTREAMS_URL = "https://stream.wikimedia.org/v2/stream/recentchange"
+WATCH_WIKI = "cswiki"
+USER_AGENT = "DetektorCitacnichSablon/1.0 (cswiki)"
+WATCH_BATCH = 25  # Edits per revision request (old + new revision = 50 revids, the API limit)
+WATCH_FLUSH = 10  # Seconds after which a partial batch of edits is fetched anyway
+RC_POLL_INTERVAL = 30  # Seconds between list=recentchanges polls
+SSE_RETRY = 5  # Seconds before reconnecting to the event stream after an error
+
+# Auto-fix mode
+EDIT_SUMMARY = "Oprava nebo smazání nepojmenovaného parametru citační šablony -> vyřazení z [[Kategorie:Údržba:Citační šablona s nepojmenovaným parametrem]]"
+FIX_QUEUE = "opravy_citaci.jsonl"  # Proposed fixes waiting for review / saving
+URL_VALUE_RE = re.compile(r'(?:https?:)?//\S+|www\.\S+', re.IGNORECASE)
+URL_PARAMS = ("url", "archiv url", "archive-url", "archiveurl")  # Parameters whose value may contain a bare "|"
+FIX_CONTEXT = 40  # Characters around a fix shown in the review
+SAVE_WORKERS = 2  # Pages prepared/saved in parallel; pywikibot's put throttle still spaces the edits
+
+# Parameters that must not be empty, per monitored citation template
+REQUIRED_PARAMS = {
+    "Citace monografie": ("titul",),
+    "Citace elektronické monografie": ("titul", "url"),
+    "Citace periodika": ("titul", "periodikum"),
+    "Citace elektronického periodika": ("titul", "periodikum", "url"),
+    "Citace webu": ("titul", "url"),
+    "Cite web": ("title", "url"),
+    "Cite book": ("title",),
+    "Cite journal": ("title", "journal"),
+    "Cite news": ("title",),
+}
+
+LintRule = namedtuple("LintRule", "name label citation_only default check")
+LINT_RULES = {}  # Rule name -> LintRule, filled by @lint_rule in registration order
+
+# One problem found by a rule; offset is the position in the analyzed text
+Issue = namedtuple("Issue", "rule offset template param value")
+# Issue with 1-based line and 0-based column in the input area
+Finding = namedtuple("Finding", "line column offset rule template param value")
+
+
+@lru_cache(maxsize=16)
+def citation_start_pattern(template_names):
     """
-    Finds unnamed parameters in specified citation templates within the given text.
+    Compiles one case-insensitive regex matching the opening of any monitored template,
+    e.g. "{{Cite web|" or "{{ šablona:citace webu }}", i.e. exactly the names the full parser would accept.
+
+    Args:
+        template_names (tuple): Template names without the "Šablona:" prefix.
+    """
+    names = "|".join(re.escape(name) for name in sorted(set(template_names), key=len, reverse=True))
+    return re.compile(r'\{\{\s*(?:šablona\s*:\s*)?(?:' + names + r')\s*(?=\||\}\})', re.IGNORECASE)
+
+
+def find_candidate_spans(text, template_names):
+    """
+    Fast first pass: finds the spans of monitored templates without parsing the page.
+
+    Matches and braces inside comments, <nowiki>, <pre> etc. are ignored, and a template nested
+    in an already found span is not reported twice.
 
     Args:
         text (str): Article text (wikitext).
-        template_names (list): List of citation template names to search for (without "Šablona:" prefix).
+        template_names (list): List of citation template names (without "Šablona:" prefix).
 
     Returns:
-        dict: A dictionary where the key is the template name and the value is a list of unnamed parameters.
+        list: (start, end) offsets of the candidate templates, in text order, or None when a monitored
+        template is not closed - the parser's error recovery then depends on the whole page,
+        so the caller has to parse the full text.
     """
-    unnamed_params_found = {}
+    starts = [m.start() for m in citation_start_pattern(tuple(template_names)).finditer(text)]
+    if not starts:
+        return []
+
+    protected = [m.span() for m in PROTECTED_RE.finditer(text)] if ('<' in text) else []
+    protected_starts = [a for a, _ in protected]
+
+    def protected_end(pos):
+        """End of the protected region containing pos, or None."""
+        idx = bisect.bisect_right(protected_starts, pos) - 1
+        return protected[idx][1] if idx >= 0 and pos < protected[idx][1] else None
+
+    spans = []
+    end = 0
+    for start in starts:
+        if start < end or protected_end(start) is not None:
+            continue
+        depth, pos = 0, start
+        while True:
+            brace = BRACES_RE.search(text, pos)
+            if brace is None:
+                return None
+            skip_to = protected_end(brace.start())
+            if skip_to is not None:
+                pos = skip_to
+                continue
+            pos = brace.end()
+            depth += 1 if brace.group() == '{{' else -1
+            if depth == 0:
+                end = pos
+                spans.append((start, end))
+                break
+    return spans
+
 
-    # Use mwparserfromhell to parse the entire text.
-    parsed_wikicode = mwparserfromhell.parse(text)
+def _clean_template_name(template):
+    """Template name without surrounding whitespace and the "Šablona:" prefix."""
+    template_name_raw = str(template.name).strip()
+    if template_name_raw.lower().startswith("šablona:"):
+        return template_name_raw[len("šablona:"):].strip()
+    return template_name_raw
 
-    # List of template names we are looking for, in lowercase for easy comparison.
-    lower_template_names = [name.lower() for name in template_names]
 
-    # Iterate through all templates found in the text.
+def _iter_templates(parsed_wikicode, template_names, citation_only=True):
+    """
+    Walks the templates of parsed_wikicode once, in document order (outer before nested).
+
+    Yields (template name, is monitored citation template, template); with citation_only,
+    other templates are skipped.
+    """
+    # Template names we are looking for, lowercase -> normalized name for consistent output.
+    monitored = {name.lower(): name for name in template_names}
     for template in parsed_wikicode.filter_templates():
-        # Get the template name and convert it to lowercase for comparison.
-        # Remove "Šablona:" prefix if it exists.
-        template_name_raw = str(template.name).strip()
-        if template_name_raw.lower().startswith("šablona:"):
-            template_name_clean = template_name_raw[len("šablona:"):].strip()
-        else:
-            template_name_clean = template_name_raw
+        template_name = _clean_template_name(template)
+        is_citation = template_name.lower() in monitored
+        if citation_only and not is_citation:
+            continue
+        if is_citation:
+            template_name = monitored[template_name.lower()]
+        yield template_name, is_citation, template
 
-        # Check if the template is one of those we are monitoring.
-        if template_name_clean.lower() in lower_template_names:
-            current_template_unnamed_params = []
-            
-            # Iterate through all template parameters.
+
+def extract_structure(text, template_names, citation_only=True, prefilter=True):
+    """
+    Parses the text and extracts what the rules need: [(template name, is citation template, params)],
+    params being [(name, value, offset)] with stripped name and value. The offset points at the value,
+    or at the parameter itself when the value is empty. Plain lists/strings/ints, so it can be cached
+    as JSON and sent between processes.
+
+    With prefilter and citation_only, only the candidate spans from find_candidate_spans are parsed
+    (pages with an unclosed monitored template are parsed whole).
+    """
+    spans = find_candidate_spans(text, template_names) if (prefilter and citation_only) else None
+    chunks = [(0, text)] if spans is None else [(start, text[start:end]) for start, end in spans]
+
+    structure = []
+    for chunk_offset, chunk in chunks:
+        cursor = 0  # Templates come in document order, so each is searched for after the previous one
+        for template_name, is_citation, template in _iter_templates(mwparserfromhell.parse(chunk), template_names, citation_only):
+            if not template.params:
+                continue
+            template_offset = chunk.find(str(template), cursor)
+            cursor = template_offset + 1
+            # str(template) is "{{" + name + "|" + param + "|" + param ... + "}}"
+            offset = chunk_offset + template_offset + 2 + len(str(template.name))
+            params = []
             for param in template.params:
-                # Check if the parameter name is numeric (positional).
-                # Unnamed (positional) parameters have names like '1', '2', '3', etc.
-                param_name_str = str(param.name).strip()
-                if param_name_str.isdigit():
-                    # Get the value of the unnamed parameter.
-                    param_value = str(param.value).strip()
-                    if param_value: # Add only non-empty parameters
-                        current_template_unnamed_params.append(param_value)
-                
-            if current_template_unnamed_params:
-                # Normalize the template name for consistent output.
-                normalized_template_name = next((name for name in template_names if name.lower() == template_name_clean.lower()), template_name_clean)
-                unnamed_params_found.setdefault(normalized_template_name, []).extend(current_template_unnamed_params)
-            
+                offset += 1
+                param_text, raw_value = str(param), str(param.value)
+                value = raw_value.strip()
+                value_offset = offset
+                if value:
+                    value_offset += len(param_text) - len(raw_value) + len(raw_value) - len(raw_value.lstrip())
+                params.append((str(param.name).strip(), value, value_offset))
+                offset += len(param_text)
+            structure.append((template_name, is_citation, params))
+    return structure
+
+
+class ParseCache:
+    """
+    LRU cache of extract_structure results keyed by content hash, or by revision ID when known,
+    so unchanged pages are never parsed twice. With a path, entries are also kept in SQLite as
+    zlib-compressed JSON and survive restarts (e.g. batch reruns).
+    """
+
+    def __init__(self, maxsize=PARSE_CACHE_SIZE, path=None):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()  # Shared by the GUI thread and the live analysis thread
+        self.db = None
+        self.unsaved = 0
+        self.hits = self.misses = 0
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS parse_cache (key TEXT PRIMARY KEY, data BLOB)")
+
+    @staticmethod
+    def key(text, template_names, citation_only, revid=None):
+        """Cache key; the template list and scope are part of it, because they change the structure."""
+        scope = "citation" if citation_only else "all"
+        page = f"rev{revid}" if revid is not None else hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{PARSE_CACHE_VERSION}:{scope}:{_templates_fingerprint(tuple(template_names))}:{page}"
+
+    def get(self, key):
+        """Cached structure or None."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            row = self.db.execute("SELECT data FROM parse_cache WHERE key = ?", (key,)).fetchone() if self.db else None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            structure = json.loads(zlib.decompress(row[0]))
+            self._remember(key, structure)
+            return structure
+
+    def put(self, key, structure):
+        with self.lock:
+            self._remember(key, structure)
+            if self.db:
+                data = zlib.compress(json.dumps(structure, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+                self.db.execute("INSERT OR REPLACE INTO parse_cache VALUES (?, ?)", (key, data))
+                self.unsaved += 1
+                if self.unsaved >= PARSE_CACHE_COMMIT_EVERY:
+                    self.db.commit()
+                    self.unsaved = 0
+
+    def _remember(self, key, structure):
+        self.entries[key] = structure
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def close(self):
+        if self.db:
+            self.db.commit()
+            self.db.close()
+            self.db = None
+
+
+@lru_cache(maxsize=16)
+def _templates_fingerprint(template_names):
+    return hashlib.blake2b("|".join(template_names).encode("utf-8"), digest_size=4).hexdigest()
+
+
+PARSE_CACHE = ParseCache()  # In-memory cache shared by the GUI and find_unnamed_parameters
+
+
+def lint_rule(name, label, citation_only=True, default=True):
+    """
+    Registers a lint rule. The decorated function gets (template name, is citation template, params)
+    for every template of the page structure and yields (offset, parameter name, value) per problem.
+    Rules with citation_only=False look at all templates, so pages are then parsed as a whole.
+    Rules with default=False run only when named explicitly (--rules); keep them off by default
+    when they would switch off the find_candidate_spans prefilter.
+    """
+    def register(check):
+        LINT_RULES[name] = LintRule(name, label, citation_only, default, check)
+        return check
+    return register
+
+
+@lint_rule("unnamed", "Nepojmenovaný parametr")
+def check_unnamed(template_name, is_citation, params):
+    """Non-empty positional parameters of monitored citation templates."""
+    if not is_citation:
+        return
+    for param_name, value, offset in params:
+        # Unnamed (positional) parameters have names like '1', '2', '3', etc.
+        if param_name.isdigit() and value: # Report only non-empty parameters
+            yield offset, param_name, value
+
+
+@lint_rule("duplicate", "Duplicitní parametr", citation_only=False, default=False)
+def check_duplicate(template_name, is_citation, params):
+    """Parameters given more than once in any template (only the last value is used); reports the repeats."""
+    seen = set()
+    for param_name, value, offset in params:
+        if param_name in seen:
+            yield offset, param_name, value
+        seen.add(param_name)
+
+
+@lint_rule("empty_required", "Prázdný povinný parametr")
+def check_empty_required(template_name, is_citation, params):
+    """Required parameters of citation templates (REQUIRED_PARAMS) that are present but empty."""
+    required = REQUIRED_PARAMS.get(template_name, ())
+    for param_name, value, offset in params:
+        if param_name in required and not value:
+            yield offset, param_name, value
+
+
+def active_rules(rules=None):
+    """
+    LintRule objects for the given names (default the rules registered with default=True)
+    and whether they all stay within citation templates.
+    """
+    active = [LINT_RULES[name] for name in (rules or default_rules())]
+    return active, all(lint.citation_only for lint in active)
+
+
+def default_rules():
+    return [name for name, lint in LINT_RULES.items() if lint.default]
+
+
+def run_rules(structure, active):
+    """Runs the rules over a page structure from extract_structure; returns Issue tuples in text order."""
+    issues = []
+    for template_name, is_citation, params in structure:
+        for lint in active:
+            for offset, param_name, value in lint.check(template_name, is_citation, params):
+                issues.append(Issue(lint.name, offset, template_name, param_name, value))
+    issues.sort(key=lambda issue: issue.offset)
+    return issues
+
+
+def lint_text(text, template_names=CITATION_TEMPLATES, rules=None, prefilter=True, cache=None, revid=None):
+    """
+    Parses the text once and runs all given rules over its templates.
+
+    Args:
+        text (str): Article text (wikitext).
+        template_names (list): Monitored citation templates (without "Šablona:" prefix).
+        rules (list): Names of the rules from LINT_RULES to run (default see active_rules).
+        prefilter (bool): Parse only the candidate spans from find_candidate_spans, if all rules
+            are limited to citation templates.
+        cache (ParseCache): Reuse the page structure of identical text (or of the same revision).
+        revid (int): Revision ID of the text, a cheaper cache key than hashing the text.
+
+    Returns:
+        list: Issue tuples in text order; offsets point into text.
+    """
+    active, citation_only = active_rules(rules)
+    if cache is None:
+        return run_rules(extract_structure(text, template_names, citation_only, prefilter), active)
+    key = cache.key(text, template_names, citation_only, revid)
+    structure = cache.get(key)
+    if structure is None:
+        structure = extract_structure(text, template_names, citation_only, prefilter)
+        cache.put(key, structure)
+    return run_rules(structure, active)
+
+
+def _group_by_template(issues):
+    """Turns issues into {template: [values]}."""
+    unnamed_params_found = {}
+    for issue in issues:
+        unnamed_params_found.setdefault(issue.template, []).append(issue.value)
     return unnamed_params_found
 
+
+def find_unnamed_parameters(text, template_names, cache=PARSE_CACHE):
+    """
+    Finds unnamed parameters in specified citation templates within the given text.
+
+    Only the candidate spans from find_candidate_spans are parsed with mwparserfromhell,
+    so pages without a monitored template cost a single regex scan (pages with an unclosed
+    monitored template fall back to parsing the whole text).
+
+    Args:
+        text (str): Article text (wikitext).
+        template_names (list): List of citation template names to search for (without "Šablona:" prefix).
+        cache (ParseCache): Page structure cache (default the module-wide one; None = always parse).
+
+    Returns:
+        dict: A dictionary where the key is the template name and the value is a list of unnamed parameters.
+    """
+    return _group_by_template(lint_text(text, template_names, ["unnamed"], cache=cache))
+
+
+def find_unnamed_parameters_full(text, template_names, cache=None):
+    """
+    Reference implementation: parses the entire text with mwparserfromhell (no prefilter, no cache).
+    Used by the benchmark to check that the prefiltered and cached paths give the same results.
+    """
+    return _group_by_template(lint_text(text, template_names, ["unnamed"], prefilter=False, cache=cache))
+
+
+def split_sections(text):
+    """
+    Splits wikitext before every heading line. The pieces concatenate back to text;
+    a citation template never spans a heading, so each piece can be analyzed on its own.
+    """
+    return [section for section in SECTION_SPLIT_RE.split(text) if section]
+
+
+class IncrementalAnalyzer:
+    """
+    Analyzes a text section by section and remembers the findings of each section,
+    so re-analyzing an edited article only parses the sections that changed.
+    """
+
+    def __init__(self, template_names, rules=None):
+        self.template_names = template_names
+        self.rules = rules
+        self.cache = {}  # section text -> [Issue with offsets in the section]
+        self.sections = 0
+        self.reparsed = 0
+
+    def analyze(self, text, cancel=None):
+        """
+        Returns the list of Finding for text, or None when cancel (threading.Event) was set meanwhile.
+        Only the sections of the last analyzed text are kept in the cache.
+        """
+        cache = {}
+        findings = []
+        offset, line, reparsed = 0, 1, 0
+        sections = split_sections(text)
+        for section in sections:
+            if cancel is not None and cancel.is_set():
+                return None
+            hits = cache.get(section)
+            if hits is None:
+                hits = self.cache.get(section)
+            if hits is None:
+                hits = lint_text(section, self.template_names, self.rules, cache=PARSE_CACHE)
+                reparsed += 1
+            cache[section] = hits
+            for issue in hits:
+                position = issue.offset
+                column = position - (section.rfind("\n", 0, position) + 1)
+                findings.append(Finding(line + section.count("\n", 0, position), column, offset + position,
+                                        issue.rule, issue.template, issue.param, issue.value))
+            offset += len(section)
+            line += section.count("\n")
+        self.cache = cache
+        self.sections, self.reparsed = len(sections), reparsed
+        return findings
+
+
+class LiveAnalysis:
+    """
+    Background thread running IncrementalAnalyzer. Only the newest submitted text is analyzed;
+    submitting a new one cancels the analysis in progress. Results are read with poll() from the Tk thread.
+    """
+
+    def __init__(self, template_names, rules=None):
+        self.analyzer = IncrementalAnalyzer(template_names, rules)
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.cancel = threading.Event()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def submit(self, generation, text):
+        """Queues text for analysis; generation identifies the result in poll()."""
+        self.cancel.set()
+        self.requests.put((generation, text))
+
+    def poll(self):
+        """Returns the newest (generation, findings or exception, elapsed seconds) or None."""
+        result = None
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return result
+
+    def _worker(self):
+        while True:
+            generation, text = self.requests.get()
+            self.cancel.clear()
+            while True:  # Skip texts superseded while waiting
+                try:
+                    generation, text = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+            started = time.perf_counter()
+            try:
+                findings = self.analyzer.analyze(text, self.cancel)
+            except Exception as e:
+                findings = e
+            if findings is not None:
+                self.results.put((generation, findings, time.perf_counter() - started))
+
+
 def clear_input_text():
     """
     Clears the content of the input text area.
@@ -68,9 +523,8 @@ def copy_instructions_to_clipboard():
     """
     Copies a specific instruction text to the clipboard.
     """
-    instruction_text = "Oprava nebo smazání nepojmenovaného parametru citační šablony -> vyřazení z [[Kategorie:Údržba:Citační šablona s nepojmenovaným parametrem]]"
     root.clipboard_clear()
-    root.clipboard_append(instruction_text)
+    root.clipboard_append(EDIT_SUMMARY)
 
 def copy_important_to_clipboard():
     """
@@ -84,85 +538,778 @@ def copy_important_to_clipboard():
 def run_analysis():
     """
     Function that runs when the "Analyze" button is pressed.
-    Retrieves text from the input field, performs analysis, and displays results.
+    Starts the analysis of the input field right away instead of waiting for the debounce.
     """
-    article_text = input_text_area.get("1.0", tk.END) # Get all text from the input field
-    
-    # Clear the output field before new analysis
+    if not input_text_area.get("1.0", tk.END).strip():
+        messagebox.showwarning("Upozornění", "Prosím, vložte text článku k analýze.")
+        return
+    schedule_analysis(delay=0)
+
+
+def on_input_modified(event=None):
+    """<<Modified>> handler of the input field: re-analyzes the text shortly after the user stops typing."""
+    if input_text_area.edit_modified():
+        input_text_area.edit_modified(False)
+        schedule_analysis()
+
+
+def schedule_analysis(delay=DEBOUNCE_MS):
+    """(Re)starts the debounce timer; when it fires, the current text is handed to the analysis thread."""
+    global pending_after
+    if pending_after is not None:
+        root.after_cancel(pending_after)
+    pending_after = root.after(delay, submit_analysis)
+
+
+def submit_analysis():
+    """Sends the current input text to the background analysis; older runs are cancelled."""
+    global pending_after, generation
+    pending_after = None
+    generation += 1
+    live_analysis.submit(generation, input_text_area.get("1.0", "end-1c"))
+
+
+def poll_analysis():
+    """Periodically shows the newest result of the background analysis (only if the text has not changed since)."""
+    result = live_analysis.poll()
+    if result is not None and result[0] == generation:
+        show_findings(result[1], result[2])
+    root.after(POLL_MS, poll_analysis)
+
+
+def show_findings(findings, elapsed):
+    """Writes findings with their line numbers to the output field and highlights them in the input field."""
+    input_text_area.tag_remove("finding", "1.0", tk.END)
+
+    # Clear the output field before new results
     output_text_area.config(state=tk.NORMAL) # Enable editing to insert text
     output_text_area.delete("1.0", tk.END)
-    
-    if not article_text.strip():
-        messagebox.showwarning("Upozornění", "Prosím, vložte text článku k analýze.")
-        output_text_area.config(state=tk.DISABLED) # Disable editing again
+    if isinstance(findings, Exception):
+        output_text_area.insert(tk.END, f"Došlo k chybě při analýze: {findings}\n")
+    elif findings:
+        output_text_area.insert(tk.END, "Nalezené problémy v šablonách:\n")
+        output_text_area.insert(tk.END, "-" * 50 + "\n")
+        for finding in findings:
+            output_text_area.insert(tk.END, f"  ř. {finding.line}, sl. {finding.column + 1}  Šablona: {finding.template}  - {describe_finding(finding)}\n")
+            start = f"{finding.line}.{finding.column}"
+            input_text_area.tag_add("finding", start, f"{start}+{len(finding.value) or len(finding.param)}c")
+        output_text_area.insert(tk.END, "-" * 50 + "\n")
+    elif not input_text_area.get("1.0", "end-1c").strip():
+        output_text_area.config(state=tk.DISABLED)
         return
+    else:
+        output_text_area.insert(tk.END, "Nenalezeny žádné problémy v šablonách v zadaném textu.\n")
+    if not isinstance(findings, Exception):
+        analyzer = live_analysis.analyzer
+        output_text_area.insert(tk.END, f"Sekcí: {analyzer.sections}, znovu analyzováno: {analyzer.reparsed} ({elapsed * 1000:.0f} ms)\n")
+    output_text_area.config(state=tk.DISABLED) # Disable output field editing again
 
-    # List of monitored citation templates (without "Šablona:" prefix, script finds them even with lowercase)
-    citation_templates = [
-        "Citace monografie", "Citace elektronické monografie", "Citace kvalifikační práce", "Citace elektronického periodika", "Citace periodika", "Citace patentu",
-        "Citace právního předpisu", "Citace sborníku", "Cite encyclopedia", "Nahlížení do KN", "Citace normy", 
-        "Cite web", "Cite paper", "Cite news", "Cite journal", "Citace webu", "Citace Sbírky zákonů", "Citace soudního rozhodnutí", 
-        "Cite press release", "Cite book", "Cite Q", "Citace webu", "SpringerEOM", "Citation", "Cit", "Citace arXiv", "Citace DzU", "Citace koránu", "Citace videohry", "Citace knihy", "Citace konference"
-    ]
 
-    try:
-        unnamed_params = find_unnamed_parameters(article_text, citation_templates)
-        
-        if unnamed_params:
-            output_text_area.insert(tk.END, "Nalezené nepojmenované parametry:\n")
-            output_text_area.insert(tk.END, "-" * 50 + "\n")
-            for template, params in unnamed_params.items():
-                output_text_area.insert(tk.END, f"  Šablona: {template}\n")
-                for param in params:
-                    output_text_area.insert(tk.END, f"    - Nepojmenovaný parametr: '{param}'\n")
-            output_text_area.insert(tk.END, "-" * 50 + "\n")
+def describe_finding(finding):
+    """Human readable description of an Issue/Finding, e.g. "Duplicitní parametr: url = 'x'"."""
+    label = LINT_RULES[finding.rule].label
+    if finding.rule == "unnamed":
+        return f"{label}: '{finding.value}'"
+    if finding.value:
+        return f"{label}: {finding.param} = '{finding.value}'"
+    return f"{label}: {finding.param}"
+
+
+def jump_to_finding(event):
+    """Double-click on a result line moves the cursor in the input field to the finding."""
+    match = re.match(r"\s*ř\. (\d+), sl\. (\d+)", output_text_area.get("current linestart", "current lineend"))
+    if match:
+        index = f"{match.group(1)}.{int(match.group(2)) - 1}"
+        input_text_area.mark_set(tk.INSERT, index)
+        input_text_area.see(index)
+        input_text_area.focus_set()
+
+# --- Batch mode ---
+def analyze_page(item):
+    """
+    Worker for the process pool: parses one page.
+
+    Args:
+        item (tuple): (wikitext, whether all active rules are limited to citation templates).
+
+    Returns:
+        list: The page structure from extract_structure.
+    """
+    text, citation_only = item
+    return extract_structure(text, CITATION_TEMPLATES, citation_only)
+
+
+def iter_page_texts(titles=None, category=MAINTENANCE_CATEGORY, preload=PRELOAD_BATCH):
+    """
+    Yields (title, wikitext, revision ID) for the given titles, or for all articles in the category.
+    Texts are fetched by pywikibot's PreloadingGenerator, i.e. `preload` pages per API request.
+    """
+    import pywikibot  # Only needed in batch mode
+    from pywikibot import pagegenerators
+
+    site = pywikibot.Site("cs", "wikipedia")
+    if titles is not None:
+        pages = (pywikibot.Page(site, title) for title in titles)
+    else:
+        pages = pywikibot.Category(site, category).articles()
+    for page in pagegenerators.PreloadingGenerator(pages, groupsize=preload):
+        if page.exists():
+            yield page.title(), page.text, page.latest_revision_id
+
+
+def analyze_pages(items, workers=None, rules=None, cache=None):
+    """
+    Runs the rules over (title, text, revid) items and yields (title, issues) in input order.
+    Pages found in the cache are not parsed again; the others are parsed in a process pool.
+    At most a few tasks per worker are in flight, so texts are not accumulated.
+    """
+    workers = workers or os.cpu_count() or 1
+    active, citation_only = active_rules(rules)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def finish():
+            title, key, result = pending.popleft()
+            structure = result.result() if key else result
+            if key and cache is not None:
+                cache.put(key, structure)
+            return title, run_rules(structure, active)
+
+        for title, text, revid in items:
+            key = cache.key(text, CITATION_TEMPLATES, citation_only, revid) if cache is not None else True
+            structure = cache.get(key) if cache is not None else None
+            if structure is not None:
+                pending.append((title, None, structure))
+            else:
+                pending.append((title, key, pool.submit(analyze_page, (text, citation_only))))
+            if len(pending) >= workers * 4:
+                yield finish()
+        while pending:
+            yield finish()
+
+
+def write_report(results, out, fmt="wiki"):
+    """
+    Writes per-page findings to an open text file and returns (pages checked, pages with findings).
+
+    fmt "wiki" produces a wikitext list that can be pasted onto a maintenance page,
+    fmt "jsonl" one JSON object per page with its issues from the active rules.
+    """
+    checked = flagged = 0
+    for title, issues in results:
+        checked += 1
+        if not issues:
+            continue
+        flagged += 1
+        if fmt == "jsonl":
+            out.write(json.dumps({"title": title, "issues": [issue._asdict() for issue in issues]}, ensure_ascii=False) + "\n")
         else:
-            output_text_area.insert(tk.END, "Nenalezeny žádné nepojmenované parametry v sledovaných šablonách v zadaném textu.\n")
-            
-    except Exception as e:
-        messagebox.showerror("Chyba", f"Došlo k chybě při analýze: {e}")
+            out.write(f"== [[{title}]] ==\n")
+            for issue in issues:
+                out.write(f"* {{{{Šablona|{issue.template}}}}}: <nowiki>{describe_finding(issue)}</nowiki>\n")
+        out.flush()
+    return checked, flagged
+
+
+def load_titles(path):
+    """Titles from a file (one per line), or None to use the category."""
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def run_batch(args):
+    """Batch mode entry point: analyzes the category (or a title list) and writes the report."""
+    fmt = "jsonl" if args.output.endswith(".jsonl") else "wiki"
+    items = iter_page_texts(load_titles(args.titles), args.category, args.preload)
+    cache = ParseCache(path=args.parse_cache) if args.parse_cache else None
+    try:
+        with open(args.output, "w", encoding="utf-8") as out:
+            checked, flagged = write_report(analyze_pages(items, args.workers, args.rules, cache), out, fmt)
     finally:
-        output_text_area.config(state=tk.DISABLED) # Disable output field editing again
+        if cache is not None:
+            cache.close()
+    print(f"Zkontrolováno stránek: {checked}, s nálezem: {flagged} -> {args.output}")
+
+
+# --- Watch mode ---
+def iter_sse(url, last_event_id=None, log=print):
+    """
+    Yields (event id, data) from a server-sent events stream such as Wikimedia EventStreams.
+    After a dropped connection it reconnects with Last-Event-ID, so no events are lost;
+    a 204 response (nothing more to send) ends the stream.
+    """
+    import requests  # Only needed in watch mode
+
+    while True:
+        headers = {"Accept": "text/event-stream", "User-Agent": USER_AGENT}
+        if last_event_id:
+            headers["Last-Event-ID"] = last_event_id
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=(10, 120)) as response:
+                if response.status_code == 204:
+                    return
+                response.raise_for_status()
+                event_id, data = None, []
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line:  # A blank line dispatches the event
+                        if event_id is not None:
+                            last_event_id = event_id
+                        if data:
+                            yield last_event_id, "\n".join(data)
+                        event_id, data = None, []
+                        continue
+                    if line.startswith(":"):  # Comment / keep-alive
+                        continue
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "data":
+                        data.append(value)
+                    elif field == "id":
+                        event_id = value
+        except requests.RequestException as e:
+            log(f"Spojení se streamem přerušeno ({e}), znovu za {SSE_RETRY} s")
+            time.sleep(SSE_RETRY)
 
-# --- Main GUI window setup ---
-root = tk.Tk()
-root.title("Analyzátor citačních šablon")
-root.geometry("800x600") # Initial window size
 
-# --- Input area for article text ---
-input_frame = tk.LabelFrame(root, text="Vložte text článku zde:", padx=10, pady=10)
-input_frame.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+def iter_stream_events(url, record=None, log=print):
+    """Recent-change events (dicts) from an EventStreams-compatible SSE endpoint; optionally appends them to a JSONL recording."""
+    for _, data in iter_sse(url, log=log):
+        try:
+            event = json.loads(data)
+        except ValueError:
+            continue
+        if record:
+            record.write(data + "\n")
+        yield event
 
-input_text_area = scrolledtext.ScrolledText(input_frame, wrap=tk.WORD, width=80, height=15, font=("Arial", 10))
-input_text_area.pack(fill=tk.BOTH, expand=True)
 
-# --- Button frame for organization ---
-button_frame = tk.Frame(root)
-button_frame.pack(pady=10)
+def iter_recent_changes(site, interval=RC_POLL_INTERVAL, log=print):
+    """
+    Polls list=recentchanges (main namespace edits and new pages) from now on.
+    Yields events shaped like EventStreams recentchange events, and None after each poll,
+    so that the consumer can fetch a partial batch while waiting for the next one.
+    """
+    start = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    last_rcid = 0
+    while True:
+        params = {"action": "query", "list": "recentchanges", "rcnamespace": 0, "rctype": "edit|new",
+                  "rcprop": "title|ids|timestamp", "rcdir": "newer", "rcstart": start, "rclimit": "max",
+                  "formatversion": 2}
+        continue_params = {}
+        try:
+            while True:
+                data = site.simple_request(**params, **continue_params).submit()
+                for change in data.get("query", {}).get("recentchanges", []):
+                    if change["rcid"] <= last_rcid:  # rcstart is inclusive
+                        continue
+                    last_rcid = change["rcid"]
+                    start = change["timestamp"]
+                    yield {"wiki": WATCH_WIKI, "namespace": change["ns"], "type": change["type"], "title": change["title"],
+                           "revision": {"old": change.get("old_revid") or None, "new": change["revid"]}}
+                if "continue" not in data:
+                    break
+                continue_params = data["continue"]
+        except Exception as e:
+            log(f"Chyba při načítání posledních změn: {e}")
+        yield None
+        time.sleep(interval)
+
+
+def fetch_revision_texts(site, revids):
+    """{revid: wikitext} for the given revision IDs, 50 per API request; deleted revisions are left out."""
+    texts = {}
+    revids = list(dict.fromkeys(revids))
+    for i in range(0, len(revids), 2 * WATCH_BATCH):
+        params = {"action": "query", "prop": "revisions", "revids": "|".join(map(str, revids[i:i + 2 * WATCH_BATCH])),
+                  "rvprop": "ids|content", "rvslots": "main", "formatversion": 2}
+        continue_params = {}
+        while True:
+            data = site.simple_request(**params, **continue_params).submit()
+            for page in data.get("query", {}).get("pages", []):
+                for revision in page.get("revisions", []):
+                    content = revision.get("slots", {}).get("main", {}).get("content")
+                    if content is not None:
+                        texts[revision["revid"]] = content
+            if "continue" not in data:
+                break
+            continue_params = data["continue"]
+    return texts
 
-# --- Analyze button ---
-analyze_button = tk.Button(button_frame, text="Analyzovat text", command=run_analysis, font=("Arial", 12, "bold"), bg="#4CAF50", fg="white", activebackground="#45a049")
-analyze_button.pack(side=tk.LEFT, padx=5)
 
-# --- Clear Input button ---
-clear_button = tk.Button(button_frame, text="Vyčistit vstup", command=clear_input_text, font=("Arial", 12), bg="#f44336", fg="white", activebackground="#da190b")
-clear_button.pack(side=tk.LEFT, padx=5)
+def citation_templates_of(text, template_names=CITATION_TEMPLATES):
+    """Sorted source texts of the monitored templates on a page (None if one is unclosed), to tell whether an edit touched them."""
+    spans = find_candidate_spans(text, template_names)
+    return None if spans is None else sorted(text[start:end] for start, end in spans)
+
+
+def changed_pages(events, fetch_texts, template_names=CITATION_TEMPLATES, batch_size=WATCH_BATCH,
+                  flush_seconds=WATCH_FLUSH, log=print):
+    """
+    Consumes recent-change events and yields (title, new text, new revid) for main-namespace pages
+    of WATCH_WIKI whose citation templates changed. Edits are collected into batches; for each
+    batch the old and the new revision of every page are fetched together by fetch_texts(revids).
+    Several edits of one page in a batch are compared as one (first old vs. last new revision).
+    """
+    pending = OrderedDict()  # title -> [old revid, new revid]
+    last_flush = time.monotonic()
 
-# --- Copy Instructions button ---
-copy_button = tk.Button(button_frame, text="Kopírovat shrnutí editace", command=copy_instructions_to_clipboard, font=("Arial", 12), bg="#2196F3", fg="white", activebackground="#0b7dda")
-copy_button.pack(side=tk.LEFT, padx=5)
+    def flush():
+        texts = fetch_texts([revid for pair in pending.values() for revid in pair if revid])
+        checked = 0
+        for title, (old, new) in pending.items():
+            new_text = texts.get(new)
+            if new_text is None:  # Deleted or hidden meanwhile
+                continue
+            old_templates = citation_templates_of(texts.get(old, ""), template_names) if old else []
+            new_templates = citation_templates_of(new_text, template_names)
+            if new_templates is None or (new_templates and new_templates != old_templates):
+                checked += 1
+                yield title, new_text, new
+        log(f"Dávka {len(pending)} editací, změněné citační šablony na {checked} stránkách")
+        pending.clear()
 
-# --- Copy Instructions button ---
-copy_button = tk.Button(button_frame, text="Kopírovat užitečné značky", command=copy_important_to_clipboard, font=("Arial", 12), bg="#2196F3", fg="white", activebackground="#0b7dda")
-copy_button.pack(side=tk.LEFT, padx=5)
+    for event in events:
+        if (event is not None and event.get("wiki") == WATCH_WIKI and event.get("namespace") == 0
+                and event.get("type") in ("edit", "new")):
+            revision = event.get("revision") or {}
+            if revision.get("new"):
+                if event["title"] in pending:
+                    pending[event["title"]][1] = revision["new"]
+                else:
+                    pending[event["title"]] = [revision.get("old"), revision["new"]]
+        if pending and (len(pending) >= batch_size or event is None or time.monotonic() - last_flush >= flush_seconds):
+            yield from flush()
+            last_flush = time.monotonic()
+    if pending:
+        yield from flush()
 
-# --- Output area for results ---
-output_frame = tk.LabelFrame(root, text="Výsledky analýzy:", padx=10, pady=10)
-output_frame.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
 
-output_text_area = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, width=80, height=15, font=("Courier New", 10), state=tk.DISABLED, bg="#f0f0f0")
-output_text_area.pack(fill=tk.BOTH, expand=True)
+class ReplayHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for EventStreams: serves the recorded events (JSONL, e.g. from --record) as SSE.
+    Event IDs are line numbers, so a reconnect with Last-Event-ID continues where it stopped;
+    after the last event it answers 204.
+    """
+    events = []
+    delay = 0.0
+
+    def do_GET(self):
+        start = int(self.headers.get("Last-Event-ID") or -1) + 1
+        if start >= len(self.events):
+            self.send_response(204)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.end_headers()
+        for number in range(start, len(self.events)):
+            self.wfile.write(f"id: {number}\ndata: {self.events[number]}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.delay)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_replay_server(path, delay=0.0):
+    """Starts ReplayHandler with the events from path on a free local port; returns its URL."""
+    with open(path, encoding="utf-8") as f:
+        ReplayHandler.events = [line.strip() for line in f if line.strip()]
+    ReplayHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReplayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def run_watch(args):
+    """Watch mode entry point: follows recent changes on cswiki and appends findings to the report."""
+    import pywikibot  # Only needed in watch mode
+
+    log = lambda message: print(message, file=sys.stderr)
+    site = pywikibot.Site("cs", "wikipedia")
+    record = open(args.record, "a", encoding="utf-8") if args.record else None
+    if args.source == "poll":
+        events = iter_recent_changes(site, log=log)
+    else:
+        url = start_replay_server(args.replay, args.replay_delay) if args.replay else args.stream
+        log(f"Sleduji {url}")
+        events = iter_stream_events(url, record, log)
+    pages = changed_pages(events, lambda revids: fetch_revision_texts(site, revids), log=log)
+    results = ((title, lint_text(text, CITATION_TEMPLATES, args.rules, cache=PARSE_CACHE, revid=revid))
+               for title, text, revid in pages)
+    fmt = "jsonl" if args.output.endswith(".jsonl") else "wiki"
+    checked = flagged = 0
+    try:
+        with open(args.output, "a", encoding="utf-8") as out:
+            checked, flagged = write_report(results, out, fmt)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if record:
+            record.close()
+    print(f"Zkontrolováno změněných stránek: {checked}, s nálezem: {flagged} -> {args.output}")
+
+
+# --- Auto-fix mode ---
+def propose_fixes(text, template_names=CITATION_TEMPLATES):
+    """
+    Proposes rewrites for unnamed parameters that have an obvious meaning:
+
+    - "url": an unnamed URL-looking value in a template without a url parameter gets "url=" in front,
+    - "pipe": an unnamed value without spaces right after a URL (url=..., or a value fixed as above)
+      that is not a URL itself is a part of the URL cut off by a bare "|", so the "|" is replaced by "%7C".
+
+    Other unnamed parameters are left for manual fixing.
+
+    Returns:
+        list: Fixes as dicts with kind, template, value, start, end, original (text[start:end]) and replacement.
+    """
+    fixes = []
+    for template_name, is_citation, params in extract_structure(text, template_names):
+        if not is_citation:
+            continue
+        has_url = any(name == "url" for name, _, _ in params)
+        in_url = False  # The previous parameter (possibly already fixed) holds a URL ending at previous_end
+        previous_end = -1
+        for name, value, offset in params:
+            end = offset + len(value)
+            if not (name.isdigit() and value):
+                in_url, previous_end = name.lower() in URL_PARAMS and bool(value), end
+                continue
+            pipe = text.rfind("|", 0, offset)
+            if (in_url and pipe == previous_end and offset == pipe + 1
+                    and not any(char.isspace() for char in value) and not URL_VALUE_RE.match(value)):
+                fixes.append({"kind": "pipe", "template": template_name, "value": value,
+                              "start": pipe, "end": pipe + 1, "original": "|", "replacement": "%7C"})
+            elif not has_url and URL_VALUE_RE.fullmatch(value):
+                fixes.append({"kind": "url", "template": template_name, "value": value,
+                              "start": offset, "end": offset, "original": "", "replacement": "url="})
+                has_url = in_url = True
+            else:
+                in_url = False
+            previous_end = end
+    return fixes
+
+
+def apply_fixes(text, fixes):
+    """
+    Returns text with the fixes applied. Raises ValueError if the text at a fix position differs
+    from what the fix was proposed for (i.e. the page changed).
+    """
+    for fix in sorted(fixes, key=lambda fix: fix["start"], reverse=True):
+        if text[fix["start"]:fix["end"]] != fix["original"]:
+            raise ValueError(f"Text se změnil u opravy '{fix['value']}'")
+        text = text[:fix["start"]] + fix["replacement"] + text[fix["end"]:]
+    return text
+
+
+def describe_fix(text, fix):
+    """Old and new text around a fix, for the review."""
+    before = text[max(0, fix["start"] - FIX_CONTEXT):fix["start"]]
+    after = text[fix["end"]:fix["end"] + FIX_CONTEXT]
+    return before + fix["original"] + after, before + fix["replacement"] + after
+
+
+def fix_queue_entry(title, text, revid):
+    """Queue entry for one page, or None if nothing can be fixed automatically."""
+    fixes = propose_fixes(text)
+    if not fixes:
+        return None
+    for fix in fixes:
+        fix["old"], fix["new"] = describe_fix(text, fix)
+    return {"title": title, "revid": revid, "status": "proposed", "fixes": fixes}
+
+
+def load_fix_queue(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def store_fix_queue(path, entries):
+    """Rewrites the queue file atomically, so an interrupted review or save keeps the previous state."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
+def run_propose(args):
+    """Proposes fixes for the category (or a title list) and writes them to the review queue."""
+    proposed = fixes = 0
+    with open(args.fix_queue, "w", encoding="utf-8") as out:
+        for title, text, revid in iter_page_texts(load_titles(args.titles), args.category, args.preload):
+            entry = fix_queue_entry(title, text, revid)
+            if entry:
+                proposed += 1
+                fixes += len(entry["fixes"])
+                out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                out.flush()
+    print(f"Navrženo {fixes} oprav na {proposed} stránkách -> {args.fix_queue} (dále --review a --save-fixes)")
+
+
+def run_review(args):
+    """Interactive review of the proposed fixes; every answer is stored right away."""
+    entries = load_fix_queue(args.fix_queue)
+    for entry in entries:
+        if entry["status"] != "proposed":
+            continue
+        print(f"\n== {entry['title']} (revize {entry['revid']}) ==")
+        for fix in entry["fixes"]:
+            print(f"  [{fix['kind']}] {fix['template']}")
+            print(f"    - {fix['old']!r}")
+            print(f"    + {fix['new']!r}")
+        answer = input("Schválit? [a]no / [n]e / [k]onec: ").strip().lower()
+        if answer.startswith("k"):
+            break
+        entry["status"] = "approved" if answer.startswith("a") else "rejected"
+        store_fix_queue(args.fix_queue, entries)
+    counts = {}
+    for entry in entries:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    print(", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+
+
+def save_fixed_page(page, entry, summary=EDIT_SUMMARY):
+    """
+    Applies the fixes of a queue entry to a preloaded pywikibot page and saves it.
+    Returns the new status: "saved", "conflict" (the page changed since the proposal) or "error: ...".
+    """
+    import pywikibot
+
+    try:
+        # A page deleted since the proposal raises NoPageError here and ends up as "error: ..."
+        if page.latest_revision_id != entry["revid"]:
+            return "conflict"
+        try:
+            page.text = apply_fixes(page.text, entry["fixes"])
+        except ValueError:
+            return "conflict"
+        # pywikibot sends the base revision timestamp, so an edit made meanwhile raises EditConflictError
+        page.save(summary=summary, minor=True)
+    except pywikibot.exceptions.EditConflictError:
+        return "conflict"
+    except pywikibot.exceptions.Error as e:
+        return f"error: {e}"
+    return "saved"
+
+
+def run_save(args):
+    """
+    Saves the approved fixes. Pages are preloaded in batches and saved by a few worker threads;
+    pywikibot's put throttle (--throttle) and maxlag handling space the actual edits.
+    Statuses are written back to the queue at the end; after a crash, pages saved meanwhile
+    come out as "conflict" on the next run (their revision changed), so nothing is edited twice.
+    """
+    import pywikibot  # Only needed when saving
+    from pywikibot import pagegenerators
+
+    if args.throttle is not None:
+        pywikibot.config.put_throttle = args.throttle
+    site = pywikibot.Site("cs", "wikipedia")
+    site.login()
+    entries = load_fix_queue(args.fix_queue)
+    approved = {entry["title"]: entry for entry in entries if entry["status"] == "approved"}
+    pages = pagegenerators.PreloadingGenerator((pywikibot.Page(site, title) for title in approved), groupsize=args.preload)
+    counts = {}
+    pending = {}  # future -> title; bounded, so preloaded texts do not pile up
+
+    def collect(done):
+        for future in done:
+            title = pending.pop(future)
+            status = future.result()
+            approved[title]["status"] = status
+            counts[status.split(":")[0]] = counts.get(status.split(":")[0], 0) + 1
+            print(f"{title}: {status}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.save_workers) as pool:
+            for page in pages:
+                pending[pool.submit(save_fixed_page, page, approved[page.title()])] = page.title()
+                if len(pending) >= args.save_workers * 2:
+                    collect(wait(pending, return_when=FIRST_COMPLETED).done)
+            collect(wait(pending).done)
+    finally:
+        store_fix_queue(args.fix_queue, entries)
+    print(", ".join(f"{status}: {count}" for status, count in sorted(counts.items())) or "Žádné schválené opravy.")
+
+
+def apply_fixes_to_input():
+    """GUI button: applies the automatic fixes to the input field (one undo step), the rest stays highlighted."""
+    text = input_text_area.get("1.0", "end-1c")
+    fixes = propose_fixes(text)
+    if not fixes:
+        messagebox.showinfo("Opravy", "Žádný nepojmenovaný parametr nejde opravit automaticky.")
+        return
+    input_text_area.edit_separator()
+    input_text_area.delete("1.0", tk.END)
+    input_text_area.insert("1.0", apply_fixes(text, fixes))
+    input_text_area.edit_separator()
+    schedule_analysis(delay=0)
+
+
+def iter_dump_pages(path, limit=None):
+    """
+    Streams (title, wikitext) of main-namespace pages from a pages-articles XML dump (.xml or .xml.bz2).
+    """
+    opener = bz2.open if path.endswith(".bz2") else open
+    count = 0
+    with opener(path, "rb") as f:
+        title = ns = None
+        for _, elem in ET.iterparse(f):
+            tag = elem.tag.rpartition("}")[2]
+            if tag == "title":
+                title = elem.text
+            elif tag == "ns":
+                ns = elem.text
+            elif tag == "page":
+                if ns == "0":
+                    text = elem.findtext("{*}revision/{*}text") or ""
+                    yield title, text
+                    count += 1
+                    if limit and count >= limit:
+                        return
+                elem.clear()
+
+
+def run_benchmark(args):
+    """Pages per second of the full parse vs. the prefiltered path on a dump; also checks both agree."""
+    pages = list(iter_dump_pages(args.benchmark, args.limit))
+    size = sum(len(text) for _, text in pages)
+    print(f"{len(pages)} stránek, {size / 1e6:.1f} MB wikitextu")
+    results = {}
+    cache = ParseCache(maxsize=len(pages) + 1)
+    runs = (("celý parse", find_unnamed_parameters_full, None),
+            ("s předfiltrem", find_unnamed_parameters, None),
+            ("1. s mezipamětí", find_unnamed_parameters, cache),
+            ("2. s mezipamětí", find_unnamed_parameters, cache))
+    for label, func, run_cache in runs:
+        started = time.perf_counter()
+        results[label] = [func(text, CITATION_TEMPLATES, cache=run_cache) for _, text in pages]
+        elapsed = time.perf_counter() - started
+        print(f"  {label:15s} {elapsed:8.2f} s  {len(pages) / elapsed:10.1f} stránek/s")
+    reference = results.pop("celý parse")
+    differences = [title for label in results for (title, _), a, b in zip(pages, reference, results[label]) if a != b]
+    print(f"  rozdílné výsledky: {len(differences)}" + (f" ({', '.join(differences[:10])})" if differences else ""))
+
+    # N rules in one parse vs. one parse per rule (as with separate tools)
+    rules = args.rules or list(LINT_RULES)
+    prefilter = all(LINT_RULES[rule].citation_only for rule in rules)
+    started = time.perf_counter()
+    for _, text in pages:
+        for rule in rules:
+            lint_text(text, CITATION_TEMPLATES, [rule], prefilter)
+    separately = time.perf_counter() - started
+    started = time.perf_counter()
+    for _, text in pages:
+        lint_text(text, CITATION_TEMPLATES, rules, prefilter)
+    combined = time.perf_counter() - started
+    print(f"  pravidla ({', '.join(rules)}): každé zvlášť {separately:.2f} s, jedním průchodem {combined:.2f} s")
+
+
+def build_gui():
+    """Builds the main Tk window; the widgets are module globals used by the handlers above."""
+    global root, input_text_area, output_text_area, live_analysis, pending_after, generation
+
+    # --- Main GUI window setup ---
+    root = tk.Tk()
+    root.title("Analyzátor citačních šablon")
+    root.geometry("800x600") # Initial window size
+
+    # --- Input area for article text ---
+    input_frame = tk.LabelFrame(root, text="Vložte text článku zde:", padx=10, pady=10)
+    input_frame.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+
+    input_text_area = scrolledtext.ScrolledText(input_frame, wrap=tk.WORD, width=80, height=15, font=("Arial", 10))
+    input_text_area.pack(fill=tk.BOTH, expand=True)
+    input_text_area.tag_configure("finding", background="#ffd54f")
+    input_text_area.bind("<<Modified>>", on_input_modified)
+
+    # --- Button frame for organization ---
+    button_frame = tk.Frame(root)
+    button_frame.pack(pady=10)
+
+    # --- Analyze button ---
+    analyze_button = tk.Button(button_frame, text="Analyzovat text", command=run_analysis, font=("Arial", 12, "bold"), bg="#4CAF50", fg="white", activebackground="#45a049")
+    analyze_button.pack(side=tk.LEFT, padx=5)
+
+    # --- Clear Input button ---
+    clear_button = tk.Button(button_frame, text="Vyčistit vstup", command=clear_input_text, font=("Arial", 12), bg="#f44336", fg="white", activebackground="#da190b")
+    clear_button.pack(side=tk.LEFT, padx=5)
+
+    # --- Auto-fix button ---
+    fix_button = tk.Button(button_frame, text="Opravit automaticky", command=apply_fixes_to_input, font=("Arial", 12), bg="#FF9800", fg="white", activebackground="#e68a00")
+    fix_button.pack(side=tk.LEFT, padx=5)
+
+    # --- Copy Instructions button ---
+    copy_button = tk.Button(button_frame, text="Kopírovat shrnutí editace", command=copy_instructions_to_clipboard, font=("Arial", 12), bg="#2196F3", fg="white", activebackground="#0b7dda")
+    copy_button.pack(side=tk.LEFT, padx=5)
+
+    # --- Copy Instructions button ---
+    copy_button = tk.Button(button_frame, text="Kopírovat užitečné značky", command=copy_important_to_clipboard, font=("Arial", 12), bg="#2196F3", fg="white", activebackground="#0b7dda")
+    copy_button.pack(side=tk.LEFT, padx=5)
+
+    # --- Output area for results ---
+    output_frame = tk.LabelFrame(root, text="Výsledky analýzy:", padx=10, pady=10)
+    output_frame.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+
+    output_text_area = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, width=80, height=15, font=("Courier New", 10), state=tk.DISABLED, bg="#f0f0f0")
+    output_text_area.pack(fill=tk.BOTH, expand=True)
+    output_text_area.bind("<Double-Button-1>", jump_to_finding)
+
+    # --- Live analysis in a background thread ---
+    live_analysis = LiveAnalysis(CITATION_TEMPLATES)
+    pending_after = None
+    generation = 0
+    root.after(POLL_MS, poll_analysis)
+
 
 # --- Start the main GUI loop ---
 if __name__ == "__main__":
-    root.mainloop()
+    parser = argparse.ArgumentParser(description="Detektor nepojmenovaných parametrů citačních šablon")
+    parser.add_argument("--batch", action="store_true", help="dávkový režim bez GUI (kategorie nebo seznam článků)")
+    parser.add_argument("--category", default=MAINTENANCE_CATEGORY, help=f"kategorie ke kontrole (výchozí {MAINTENANCE_CATEGORY})")
+    parser.add_argument("--titles", help="soubor se seznamem článků (jeden na řádek) místo kategorie")
+    parser.add_argument("-o", "--output", default="nepojmenovane_parametry.txt", help="soubor s hlášením (.txt = wikitext, .jsonl = JSON řádky)")
+    parser.add_argument("--workers", type=int, default=None, help="počet procesů pro parsování (výchozí počet CPU)")
+    parser.add_argument("--preload", type=int, default=PRELOAD_BATCH, help="počet stránek na jeden dotaz API")
+    parser.add_argument("--watch", action="store_true", help="sledovat poslední změny na cswiki a kontrolovat upravené citace")
+    parser.add_argument("--source", choices=("stream", "poll"), default="stream",
+                        help="zdroj změn pro --watch: EventStreams (SSE), nebo dotazování list=recentchanges")
+    parser.add_argument("--stream", default=EVENTSTREAMS_URL, help="adresa SSE streamu posledních změn")
+    parser.add_argument("--replay", metavar="JSONL", help="přehrát zaznamenané události z lokálního SSE serveru (test --watch)")
+    parser.add_argument("--replay-delay", type=float, default=0.0, help="pauza mezi přehrávanými událostmi (s)")
+    parser.add_argument("--record", metavar="JSONL", help="ukládat přijaté události streamu pro pozdější --replay")
+    parser.add_argument("--propose-fixes", action="store_true", help="navrhnout automatické opravy pro kategorii (nebo --titles) do fronty")
+    parser.add_argument("--review", action="store_true", help="projít navržené opravy a schválit je")
+    parser.add_argument("--save-fixes", action="store_true", help="uložit schválené opravy přes pywikibot")
+    parser.add_argument("--fix-queue", default=FIX_QUEUE, help=f"fronta navržených oprav (výchozí {FIX_QUEUE})")
+    parser.add_argument("--save-workers", type=int, default=SAVE_WORKERS, help="počet souběžně ukládaných stránek")
+    parser.add_argument("--throttle", type=float, default=None, help="nejmenší odstup editací v sekundách (put_throttle pywikibotu)")
+    parser.add_argument("--parse-cache", metavar="SOUBOR", help="SQLite mezipaměť rozparsovaných stránek pro opakované dávky")
+    parser.add_argument("--rules", type=lambda value: value.split(","), default=None,
+                        help=f"čárkou oddělená pravidla ({','.join(LINT_RULES)}), výchozí {','.join(default_rules())}"
+                             " (duplicate hledá ve všech šablonách, takže parsuje celé stránky)")
+    parser.add_argument("--benchmark", metavar="DUMP", help="změřit stránky/s s předfiltrem a bez něj na XML dumpu")
+    parser.add_argument("--limit", type=int, default=None, help="nejvýše tolik stránek z dumpu pro --benchmark")
+    args = parser.parse_args()
+    if args.rules and not set(args.rules) <= set(LINT_RULES):
+        parser.error(f"neznámé pravidlo: {', '.join(sorted(set(args.rules) - set(LINT_RULES)))}")
+
+    if args.benchmark:
+        run_benchmark(args)
+    elif args.watch:
+        run_watch(args)
+    elif args.propose_fixes:
+        run_propose(args)
+    elif args.review:
+        run_review(args)
+    elif args.save_fixes:
+        run_save(args)
+    elif args.batch:
+        run_batch(args)
+    else:
+        build_gui()
+        root.mainloop()
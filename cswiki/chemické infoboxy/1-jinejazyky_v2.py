@@ -1,245 +1,1393 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-import requests
-import threading
-import sys
-
-class WikiLinkerApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Wiki Linker - Překladač odkazů")
-        self.root.geometry("950x650")
-
-        # --- Styl ---
-        style = ttk.Style()
-        style.configure("TButton", font=("Helvetica", 10))
-        style.configure("TLabel", font=("Helvetica", 10))
-
-        # --- Horní panel s nastavením ---
-        control_frame = ttk.LabelFrame(root, text="Nastavení", padding=10)
-        control_frame.pack(fill="x", padx=10, pady=5)
-
-        # Definice jazyků
-        self.langs = ('cs', 'en', 'de', 'sk', 'fr', 'pl', 'es', 'it', 'ru', 'hu', 'pt', 'zh', 'wikidata')
-
-        # Výběr zdrojového jazyka
-        ttk.Label(control_frame, text="Zdrojový jazyk:").grid(row=0, column=0, padx=5, sticky="w")
-        self.src_lang_var = tk.StringVar(value="cs")
-        self.src_combo = ttk.Combobox(control_frame, textvariable=self.src_lang_var, width=10)
-        self.src_combo['values'] = self.langs
-        self.src_combo.grid(row=0, column=1, padx=5, sticky="w")
-
-        # Výběr cílového jazyka
-        ttk.Label(control_frame, text="Cílový jazyk:").grid(row=0, column=2, padx=5, sticky="w")
-        self.target_lang_var = tk.StringVar(value="en")
-        self.target_combo = ttk.Combobox(control_frame, textvariable=self.target_lang_var, width=10)
-        self.target_combo['values'] = self.langs
-        self.target_combo.grid(row=0, column=3, padx=5, sticky="w")
-        
-        # Checkbox pro prázdné řádky
-        self.empty_if_missing_var = tk.BooleanVar(value=True)
-        self.empty_check = ttk.Checkbutton(control_frame, text="Pokud neexistuje, nechat prázdné", variable=self.empty_if_missing_var)
-        self.empty_check.grid(row=0, column=4, padx=15, sticky="w")
-
-        # Tlačítko start
-        self.start_btn = ttk.Button(control_frame, text="SPUSTIT PŘEKLAD", command=self.start_processing_thread)
-        self.start_btn.grid(row=0, column=5, padx=20, sticky="e")
-
-        # Progress bar
-        self.progress = ttk.Progressbar(control_frame, orient="horizontal", length=200, mode="determinate")
-        self.progress.grid(row=1, column=0, columnspan=6, sticky="ew", pady=(10, 0))
-
-        # --- Hlavní oblast s textovými poli ---
-        main_frame = ttk.Frame(root, padding=10)
-        main_frame.pack(fill="both", expand=True)
-
-        # Levý sloupec (Vstup)
-        left_frame = ttk.Frame(main_frame)
-        left_frame.pack(side="left", fill="both", expand=True, padx=(0, 5))
-        
-        ttk.Label(left_frame, text="Vstupní články / ID (1 řádek = 1 položka):").pack(anchor="w")
-        self.input_text = scrolledtext.ScrolledText(left_frame, width=40, height=20)
-        self.input_text.pack(fill="both", expand=True)
-        # Vložíme demo data
-        self.input_text.insert(tk.END, "Voda\nKarel Čapek\nPraha\nVelká Británie\nNeexistujiciClanek123\n")
-
-        # Pravý sloupec (Výstup)
-        right_frame = ttk.Frame(main_frame)
-        right_frame.pack(side="right", fill="both", expand=True, padx=(5, 0))
-
-        ttk.Label(right_frame, text="Výsledek (kopírujte do Excelu):").pack(anchor="w")
-        self.output_text = scrolledtext.ScrolledText(right_frame, width=40, height=20, bg="#f0f0f0")
-        self.output_text.pack(fill="both", expand=True)
-
-    def start_processing_thread(self):
-        """Spustí zpracování v novém vlákně, aby nezamrzlo GUI."""
-        src = self.src_lang_var.get().strip()
-        tgt = self.target_lang_var.get().strip()
-        raw_data = self.input_text.get("1.0", tk.END).strip()
-        empty_on_missing = self.empty_if_missing_var.get()
-
-        if not raw_data:
-            messagebox.showwarning("Chyba", "Vložte prosím seznam článků.")
-            return
-
-        self.start_btn.config(state="disabled")
-        self.output_text.delete("1.0", tk.END) # Vymazat staré výsledky
-        self.progress['value'] = 0
-        
-        # Spuštění ve vlákně
-        thread = threading.Thread(target=self.run_logic, args=(raw_data, src, tgt, empty_on_missing))
-        thread.daemon = True
-        thread.start()
-
-    def run_logic(self, raw_input, src_lang, target_lang, empty_on_missing):
-        """Logika stahování dat."""
-        
-        try:
-            url = "https://www.wikidata.org/w/api.php"
-            
-            # Příprava seznamu
-            clean_titles = [line.strip() for line in raw_input.split('\n')]
-            # Ignorujeme pouze poslední prázdný řádek vzniklý kopírováním
-            if clean_titles and not clean_titles[-1]: 
-                clean_titles.pop() 
-
-            results_map = {}
-            chunk_size = 50
-            total = len(clean_titles)
-            
-            # Nastavení maxima pro progress bar
-            self.root.after(0, lambda: self.progress.configure(maximum=total))
-
-            for i in range(0, total, chunk_size):
-                chunk = clean_titles[i:i + chunk_size]
-                # Filtrujeme prázdné řetězce pro API dotaz
-                query_chunk = [t for t in chunk if t] 
-                
-                if not query_chunk:
-                    continue
-
-                titles_str = "|".join(query_chunk)
-                
-                # Rozlišení parametrů podle toho, zda je vstupem Wikidata ID nebo název článku
-                params = {
-                    "action": "wbgetentities",
-                    "props": "sitelinks",
-                    "format": "json",
-                    "languages": target_lang
-                }
-                
-                if src_lang.lower() == 'wikidata':
-                    # Pokud je vstupem Wikidata ID (Q...), používáme parametr 'ids'
-                    params["ids"] = titles_str
-                else:
-                    # Jinak hledáme podle názvu článku na konkrétní wiki
-                    params["sites"] = f"{src_lang}wiki"
-                    params["titles"] = titles_str
-                
-                headers = {'User-Agent': 'WikiLinkerGui/1.0'}
-                
-                try:
-                    response = requests.get(url, params=params, headers=headers)
-                    data = response.json()
-                    
-                    # Normalizace (pouze pro názvy článků, pro ID není relevantní)
-                    normalized_map = {t: t for t in query_chunk}
-                    if "normalized" in data:
-                        for norm in data["normalized"]:
-                            normalized_map[norm['to']] = norm['from']
-
-                    entities = data.get("entities", {})
-                    
-                    for qid, entity in entities.items():
-                        if qid == "-1": continue # ID neexistuje
-                        if "missing" in entity: continue # Entita chybí
-                        
-                        original_input = ""
-                        
-                        if src_lang.lower() == 'wikidata':
-                            # Pokud byl vstup QID, je klíčem přímo QID
-                            original_input = qid
-                        else:
-                            # Pokud byl vstup název, musíme zjistit, ke kterému vstupu toto QID patří
-                            source_sitelink = entity.get("sitelinks", {}).get(f"{src_lang}wiki", {})
-                            canonical_title = source_sitelink.get("title")
-                            if not canonical_title:
-                                # Může se stát, že máme entitu, ale ta nemá sitelink na zdrojovou wiki (divné, ale možné při přesměrování)
-                                # V takovém případě se pokusíme najít match v normalizaci, pokud to jde, jinak přeskočíme
-                                continue
-                            original_input = normalized_map.get(canonical_title, canonical_title)
-                        
-                        # Získání cílové hodnoty
-                        target_value = ""
-                        if target_lang.lower() == 'wikidata':
-                            target_value = qid
-                        else:
-                            target_sitelink = entity.get("sitelinks", {}).get(f"{target_lang}wiki", {})
-                            target_value = target_sitelink.get("title", "")
-                        
-                        if original_input:
-                            results_map[original_input] = target_value
-                            # Pro jistotu uložíme i pod canonical pro případné fallbacky
-                            if src_lang.lower() != 'wikidata' and 'canonical_title' in locals():
-                                results_map[canonical_title] = target_value
-
-                except Exception as e:
-                    self.append_log(f"Chyba API v bloku {i}: {str(e)}")
-
-                # Aktualizace progress baru
-                self.root.after(0, lambda step=chunk_size: self.progress.step(step))
-
-            # === VYPISOVÁNÍ VÝSLEDKŮ ===
-            final_output_string = ""
-            for title in clean_titles:
-                if not title: # Ponechat prázdné řádky ve vstupu jako prázdné ve výstupu
-                    final_output_string += "\n"
-                    continue
-
-                val = ""
-                found = False
-                
-                # 1. Přímá shoda
-                if title in results_map:
-                    val = results_map[title]
-                    found = True
-                else:
-                    # 2. Case-insensitive fallback (pokud není vstup ID)
-                    if src_lang.lower() != 'wikidata':
-                        for k, v in results_map.items():
-                            if k.lower() == title.lower():
-                                val = v
-                                found = True
-                                break
-                
-                # Logika pro nenalezené výsledky
-                if found and not val:
-                    # Našli jsme entitu, ale nemá článek v cílovém jazyce
-                    val = "" if empty_on_missing else "--- NENALEZENO ---"
-                elif not found:
-                    # Nenašli jsme entitu vůbec
-                    val = "" if empty_on_missing else "--- NENALEZENO ---"
-                
-                final_output_string += val + "\n"
-
-            # Vložení do GUI
-            self.root.after(0, lambda: self.finish_processing(final_output_string))
-
-        except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Kritická chyba", str(e)))
-            self.root.after(0, lambda: self.start_btn.config(state="normal"))
-
-    def finish_processing(self, result_string):
-        """Zobrazí výsledky a znovu aktivuje tlačítko."""
-        self.output_text.insert(tk.END, result_string)
-        self.start_btn.config(state="normal")
-        self.progress['value'] = 0
-        messagebox.showinfo("Hotovo", "Překlad dokončen! Výsledky můžete zkopírovat.")
-
-    def append_log(self, text):
-        print(text) # Pro ladění do konzole
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    app = WikiLinkerApp(root)
-    root.mainloop()
+import tkinter as tk
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import argparse
+import bz2
+import gzip
+import heapq
+import json
+import mmap
+import os
+import random
+import re
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+import sys
+
+API_URL = "https://www.wikidata.org/w/api.php"
+USER_AGENT = "WikiLinkerGui/1.0"
+CHUNK_SIZE = 50  # Maximum titulů/ID v jednom wbgetentities dotazu
+HIGH_LIMITS_CHUNK_SIZE = 500  # Totéž pro účty s právem apihighlimits (boti, správci)
+DEFAULT_WORKERS = 4
+DEFAULT_MAXLAG = 5  # Sekundy zpoždění replikace, nad které nás API odmítne (doporučení pro boty)
+MIN_BATCH_SIZE = 10
+
+
+class ApiError(Exception):
+    """Chyba vrácená API; `retryable` říká, zda má smysl dotaz zopakovat."""
+
+    def __init__(self, message, retryable=False, retry_after=None, throttled=False):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+
+class AdaptiveScheduler:
+    """
+    Řízení zátěže API: souběh a velikost dávky rostou po úspěších s nízkou latencí
+    a klesají na polovinu po chybách (AIMD). Po maxlag/429 se všechna vlákna pozastaví
+    na dobu z Retry-After, opakování čekají exponenciálně rostoucí dobu s náhodným rozptylem.
+    Souběh, při kterém API naposledy omezilo, si pamatuje a nad něj zkouší růst jen zřídka,
+    aby se ustálil pod kapacitou API místo opakovaných špiček a pauz.
+    """
+
+    def __init__(self, max_workers, max_batch=CHUNK_SIZE, target_latency=2.0,
+                 max_retries=6, base_delay=1.0, max_delay=120.0):
+        self.max_workers = max_workers
+        self.max_batch = max_batch
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        # Začínáme opatrně a souběh zvyšujeme, dokud API stíhá
+        self.limit = min(2, max_workers)
+        self.batch_size = max_batch
+        self.active = 0
+        self.pause_until = 0.0
+        self.latency = None  # Klouzavý průměr latence úspěšných dotazů
+        self.successes = 0
+        self.last_decrease = 0.0
+        self.safe_limit = max_workers  # Nejvyšší souběh bez omezení od API
+        self.probe_rounds = 4  # Kolik "kol" úspěchů je třeba před zvýšením nad safe_limit
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "failed": 0}
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        """Počká na volný slot a konec případné pauzy po omezení ze strany API."""
+        with self.cond:
+            while True:
+                wait = self.pause_until - time.monotonic()
+                if wait <= 0 and self.active < self.limit:
+                    self.active += 1
+                    self.stats["requests"] += 1
+                    return
+                self.cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self):
+        with self.cond:
+            self.active -= 1
+            self.cond.notify_all()
+
+    def on_success(self, latency):
+        with self.cond:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            self.successes += 1
+            if self.latency > 2 * self.target_latency:
+                self._decrease(batch=False)
+            elif self.latency < self.target_latency:
+                # Aditivní růst nejvýš jednou za "kolo" dotazů, nad známou hranicí jen po více kolech
+                rounds = 1 if self.limit < self.safe_limit else self.probe_rounds
+                if self.successes >= self.limit * rounds:
+                    self.successes = 0
+                    if self.limit > self.safe_limit:
+                        # Zkouška vyššího souběhu prošla - hranice se posouvá
+                        self.safe_limit = self.limit
+                        self.probe_rounds = max(4, self.probe_rounds // 2)
+                    self.limit = min(self.max_workers, self.limit + 1)
+                    self.batch_size = min(self.max_batch, self.batch_size + MIN_BATCH_SIZE)
+            self.cond.notify_all()
+
+    def on_failure(self, error):
+        """Zpracuje chybu pokusu; vrací dobu čekání před opakováním."""
+        with self.cond:
+            self.stats["retries"] += 1
+            if getattr(error, "throttled", False):
+                self.stats["throttled"] += 1
+                # Pauza pro všechna vlákna - API nás výslovně požádalo o zpomalení
+                pause = error.retry_after or self.base_delay
+                self.pause_until = max(self.pause_until, time.monotonic() + pause)
+                if time.monotonic() - self.last_decrease >= self.target_latency:
+                    if self.limit > self.safe_limit:
+                        self.probe_rounds = min(256, self.probe_rounds * 2)  # Neúspěšná zkouška - příště později
+                    self.safe_limit = max(1, self.limit - 1)
+                self._decrease(batch=False)
+            else:
+                # Timeout nebo chyba serveru - menší dávky jsou pro API lehčí
+                self._decrease(batch=True)
+            self.cond.notify_all()
+        return getattr(error, "retry_after", None) or 0
+
+    def _decrease(self, batch):
+        now = time.monotonic()
+        # Jedna vlna chyb = jedno snížení, ne půlení za každý souběžný dotaz
+        if now - self.last_decrease < self.target_latency:
+            return
+        self.last_decrease = now
+        self.successes = 0
+        self.limit = max(1, self.limit // 2)
+        if batch:
+            self.batch_size = max(MIN_BATCH_SIZE, self.batch_size // 2)
+
+    def backoff(self, attempt, retry_after=0):
+        """Exponenciální čekání s plným náhodným rozptylem, nejméně však Retry-After."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after)
+
+    def summary(self):
+        s = self.stats
+        return (f"API: {s['requests']} dotazů, {s['retries']} opakování ({s['throttled']}x omezeno), "
+                f"{s['failed']} bloků selhalo; souběh {self.limit}, dávka {self.batch_size}")
+
+
+class WikidataFetcher:
+    """Stahování bloků z Wikidata API přes jednu sdílenou session (keep-alive, gzip)."""
+
+    def __init__(self, api_url=API_URL, workers=DEFAULT_WORKERS, timeout=30, maxlag=DEFAULT_MAXLAG, scheduler=None,
+                 max_batch=CHUNK_SIZE):
+        self.api_url = api_url
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.maxlag = maxlag
+        self.scheduler = scheduler or AdaptiveScheduler(self.workers, max_batch=max_batch)
+
+        # Jeden pool spojení pro všechna vlákna - spojení se znovu používají mezi bloky
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+
+    def get(self, params, api_url=None):
+        """
+        Dotaz s řízením zátěže; opakuje se jen tento dotaz, dokud nevyprší počet pokusů.
+        `api_url` přesměruje dotaz na jiné API (např. zdrojovou Wikipedii) se stejnou session a schedulerem.
+        """
+        if self.maxlag is not None:
+            params = {**params, "maxlag": self.maxlag}
+        scheduler = self.scheduler
+        for attempt in range(scheduler.max_retries + 1):
+            scheduler.acquire()
+            started = time.monotonic()
+            try:
+                data = self._request(params, api_url or self.api_url)
+            except ApiError as e:
+                error = e
+            except (requests.RequestException, ValueError) as e:
+                # Síťová chyba, timeout nebo nečitelná odpověď - zkusíme znovu
+                error = ApiError(str(e), retryable=True)
+            else:
+                scheduler.on_success(time.monotonic() - started)
+                return data
+            finally:
+                scheduler.release()
+
+            if not error.retryable or attempt == scheduler.max_retries:
+                with scheduler.cond:
+                    scheduler.stats["failed"] += 1
+                raise error
+            retry_after = scheduler.on_failure(error)
+            time.sleep(scheduler.backoff(attempt, retry_after))
+
+    def _request(self, params, api_url):
+        """Jeden pokus; omezení ze strany API (429, 503, maxlag) hlásí jako ApiError."""
+        response = self.session.get(api_url, params=params, timeout=self.timeout)
+        retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+        if response.status_code in (429, 503):
+            raise ApiError(f"HTTP {response.status_code}", retryable=True, retry_after=retry_after, throttled=True)
+        if response.status_code >= 500:
+            raise ApiError(f"HTTP {response.status_code}", retryable=True, retry_after=retry_after)
+        if response.status_code >= 400:
+            # Ostatní 4xx (403, 404, 414...) se opakováním nespraví
+            raise ApiError(f"HTTP {response.status_code}")
+        data = response.json()
+        error = data.get("error")
+        if error:
+            if error.get("code") == "maxlag":
+                raise ApiError(error.get("info", "maxlag"), retryable=True, retry_after=retry_after or 5, throttled=True)
+            raise ApiError(f"{error.get('code')}: {error.get('info', '')}")
+        return data
+
+    def submit(self, params):
+        """Zařadí jeden dotaz do poolu vláken; vrací Future s JSON odpovědí."""
+        return self.pool.submit(self.get, params)
+
+    def fetch_chunks(self, chunks, build_params, on_done=None, on_error=None):
+        """
+        Stáhne všechny bloky paralelně na `workers` vláknech.
+        Vrací seznam odpovědí ve stejném pořadí jako `chunks` (None = blok selhal).
+        """
+        results = [None] * len(chunks)
+        futures = {self.submit(build_params(chunk)): idx for idx, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                results[idx] = future.result()
+            except Exception as e:
+                if on_error:
+                    on_error(idx, e)
+            if on_done:
+                on_done(idx)
+        return results
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+def _parse_retry_after(value):
+    """Retry-After v sekundách (MediaWiki neposílá formát s datem); None, pokud chybí."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def build_wbgetentities_params(query_chunk, src_lang, sitefilter=None):
+    """
+    Parametry wbgetentities - podle zdroje buď 'ids' (Wikidata ID), nebo 'sites' + 'titles'.
+    `sitefilter` omezí vrácené sitelinky jen na potřebné wiki; None = všechny sitelinky.
+    """
+    titles_str = "|".join(query_chunk)
+    # Parametr 'languages' se týká jen popisků, ne sitelinků - proto ho neposíláme
+    params = {
+        "action": "wbgetentities",
+        "props": "sitelinks",
+        "format": "json",
+    }
+    if sitefilter:
+        params["sitefilter"] = "|".join(sitefilter)
+
+    if src_lang.lower() == 'wikidata':
+        # Pokud je vstupem Wikidata ID (Q...), používáme parametr 'ids'
+        params["ids"] = titles_str
+    else:
+        # Jinak hledáme podle názvu článku na konkrétní wiki
+        params["sites"] = f"{src_lang}wiki"
+        params["titles"] = titles_str
+    return params
+
+
+def parse_wbgetentities(data, query_chunk, src_lang):
+    """
+    Z odpovědi wbgetentities sestaví slovník {vstupní název: (QID, {site: title})}.
+    Cílovou hodnotu z něj vybírá až target_value(), takže záznam platí pro všechny jazyky.
+    """
+    results = {}
+
+    # Normalizace (pouze pro názvy článků, pro ID není relevantní)
+    normalized_map = {t: t for t in query_chunk}
+    if "normalized" in data:
+        for norm in data["normalized"]:
+            normalized_map[norm['to']] = norm['from']
+
+    entities = data.get("entities", {})
+
+    for qid, entity in entities.items():
+        if qid == "-1": continue # ID neexistuje
+        if "missing" in entity: continue # Entita chybí
+
+        sitelinks = {site: link.get("title", "") for site, link in entity.get("sitelinks", {}).items()}
+        original_input = ""
+        canonical_title = None
+
+        if src_lang.lower() == 'wikidata':
+            # Pokud byl vstup QID, je klíčem přímo QID
+            original_input = qid
+        else:
+            # Pokud byl vstup název, musíme zjistit, ke kterému vstupu toto QID patří
+            canonical_title = sitelinks.get(f"{src_lang}wiki")
+            if not canonical_title:
+                # Může se stát, že máme entitu, ale ta nemá sitelink na zdrojovou wiki (divné, ale možné při přesměrování)
+                # V takovém případě se pokusíme najít match v normalizaci, pokud to jde, jinak přeskočíme
+                continue
+            original_input = normalized_map.get(canonical_title, canonical_title)
+
+        if original_input:
+            results[original_input] = (qid, sitelinks)
+            # Pro jistotu uložíme i pod canonical pro případné fallbacky
+            if canonical_title:
+                results[canonical_title] = (qid, sitelinks)
+
+    return results
+
+
+def source_api_url(src_lang):
+    """API zdrojové Wikipedie (pro řešení přesměrování)."""
+    return f"https://{src_lang}.wikipedia.org/w/api.php"
+
+
+def build_resolve_params(titles):
+    """Parametry action=query, které vrátí normalizaci, převod variant a cíle přesměrování."""
+    return {
+        "action": "query",
+        "titles": "|".join(titles),
+        "redirects": 1,
+        "converttitles": 1,
+        "format": "json",
+    }
+
+
+def parse_resolution(data, titles):
+    """
+    Z odpovědi action=query sestaví {vstupní název: konečný název}.
+    Kroky normalized -> converted -> redirects se řetězí, protože 'to' jednoho je 'from' dalšího.
+    """
+    query = data.get("query", {})
+    step = {}
+    for key in ("normalized", "converted", "redirects"):
+        for item in query.get(key, []):
+            step[item["from"]] = item["to"]
+
+    mapping = {}
+    for title in titles:
+        final, seen = title, set()
+        while final in step and final not in seen:  # Ochrana proti smyčce přesměrování
+            seen.add(final)
+            final = step[final]
+        mapping[title] = final
+    return mapping
+
+
+def target_value(record, target_lang):
+    """Vybere z (QID, sitelinky) hodnotu pro cílový jazyk; prázdný řetězec = článek neexistuje."""
+    qid, sitelinks = record
+    if target_lang.lower() == 'wikidata':
+        return qid
+    return sitelinks.get(f"{target_lang}wiki", "")
+
+
+def required_sites(src_lang, target_langs):
+    """Wiki, jejichž sitelinky jsou potřeba - zdrojová (pro spárování se vstupem) a všechny cílové."""
+    langs = [src_lang] + list(target_langs)
+    return sorted({f"{lang}wiki" for lang in langs if lang.lower() != 'wikidata'})
+
+
+def normalize_title(title):
+    """Přibližná normalizace názvu jako v MediaWiki (podtržítka, mezery, velké první písmeno)."""
+    t = ' '.join(title.replace('_', ' ').split())
+    return t[:1].upper() + t[1:]
+
+
+# === PERZISTENTNÍ CACHE SITELINKŮ ===
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wikilinker_cache.sqlite")
+DEFAULT_CACHE_TTL_DAYS = 30
+DEFAULT_CACHE_MAX_ENTITIES = 500000
+
+
+class SitelinkCache:
+    """
+    SQLite cache: entity (QID -> všechny sitelinky) a index (site, normalizovaný název) -> QID.
+    Záznamy starší než TTL se berou jako výpadek, při překročení velikosti se mažou nejdéle nepoužité.
+    Entita stažená se 'sitefilter' si pamatuje, které wiki obsahuje, a odpovídá jen na dotazy pokryté těmito wiki;
+    LinkerEngine s cache proto stahuje kompletní sitelinky, aby záznam posloužil i pro jiné cílové jazyky.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_CACHE_TTL_DAYS, max_entities=DEFAULT_CACHE_MAX_ENTITIES):
+        self.ttl = ttl_days * 86400
+        self.max_entities = max_entities
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS entities (
+                qid TEXT PRIMARY KEY,
+                sitelinks TEXT NOT NULL,
+                sites TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS titles (
+                site TEXT NOT NULL,
+                title TEXT NOT NULL,
+                qid TEXT NOT NULL,
+                PRIMARY KEY (site, title)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS titles_qid ON titles (qid);
+            CREATE INDEX IF NOT EXISTS entities_accessed ON entities (accessed_at);
+        """)
+        # Starší cache bez sloupce 'sites' obsahuje jen kompletní sitelinky (NULL = všechny wiki)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(entities)")]
+        if "sites" not in columns:
+            self.conn.execute("ALTER TABLE entities ADD COLUMN sites TEXT")
+
+    def _load_entities(self, qids, sites=None):
+        """Načte platné entity {QID: sitelinky}, které pokrývají wiki `sites`, a označí je jako použité."""
+        now = time.time()
+        found = {}
+        qids = list(qids)
+        for i in range(0, len(qids), 500):
+            part = qids[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT qid, sitelinks, sites FROM entities WHERE fetched_at >= ? AND qid IN ({','.join('?' * len(part))})",
+                [now - self.ttl] + part)
+            for qid, sitelinks, stored_sites in rows:
+                if sites and stored_sites is not None and not set(sites) <= set(json.loads(stored_sites)):
+                    continue
+                found[qid] = json.loads(sitelinks)
+        if found:
+            self.conn.executemany("UPDATE entities SET accessed_at = ? WHERE qid = ?", [(now, q) for q in found])
+            self.conn.commit()
+        return found
+
+    def lookup(self, titles, src_lang, sites=None):
+        """Vrací {vstup: (QID, sitelinky)} pro vstupy nalezené v cache; počítá zásahy a výpadky."""
+        if src_lang.lower() == 'wikidata':
+            keys = {t: normalize_title(t) for t in titles}
+        else:
+            site = f"{src_lang}wiki"
+            normalized = {t: normalize_title(t) for t in titles}
+            wanted = list(set(normalized.values()))
+            qid_by_title = {}
+            for i in range(0, len(wanted), 500):
+                part = wanted[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT title, qid FROM titles WHERE site = ? AND title IN ({','.join('?' * len(part))})",
+                    [site] + part)
+                qid_by_title.update(rows)
+            keys = {t: qid_by_title[n] for t, n in normalized.items() if n in qid_by_title}
+
+        entities = self._load_entities(set(keys.values()), sites)
+        results = {t: (qid, entities[qid]) for t, qid in keys.items() if qid in entities}
+        self.hits += len(results)
+        self.misses += len(titles) - len(results)
+        return results
+
+    def store(self, records, src_lang, sites=None):
+        """
+        Uloží {vstup: (QID, sitelinky)} z API; indexuje všechny sitelinky, aby posloužily i jiným zdrojům.
+        `sites` je použitý sitefilter (None = kompletní sitelinky); dílčí záznamy se slučují s dříve uloženými.
+        """
+        if not records:
+            return
+        now = time.time()
+        entities = {qid: sitelinks for qid, sitelinks in records.values()}
+        rows = []
+        for qid, sitelinks in entities.items():
+            stored_sites, fetched_at = None, now
+            if sites:
+                stored_sites = set(sites)
+                old = self.conn.execute(
+                    "SELECT sitelinks, sites, fetched_at FROM entities WHERE qid = ? AND fetched_at >= ?",
+                    (qid, now - self.ttl)).fetchone()
+                if old and old[1] is None:
+                    continue  # Kompletní záznam nepřepisujeme dílčím
+                if old:
+                    # Sjednocení s dříve staženými wiki; stáří se počítá od starší části
+                    sitelinks = {**json.loads(old[0]), **sitelinks}
+                    stored_sites |= set(json.loads(old[1]))
+                    fetched_at = old[2]
+                stored_sites = json.dumps(sorted(stored_sites))
+            rows.append((qid, json.dumps(sitelinks, ensure_ascii=False), stored_sites, fetched_at, now))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO entities (qid, sitelinks, sites, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            rows)
+        title_rows = [(site, normalize_title(title), qid)
+                      for qid, sitelinks in entities.items() for site, title in sitelinks.items() if title]
+        if src_lang.lower() != 'wikidata':
+            # Vstup se může lišit od kanonického názvu (normalizace) - uložíme i jeho podobu
+            site = f"{src_lang}wiki"
+            title_rows += [(site, normalize_title(t), qid) for t, (qid, _) in records.items()]
+        self.conn.executemany("INSERT OR REPLACE INTO titles (site, title, qid) VALUES (?, ?, ?)", title_rows)
+        self.conn.commit()
+        self._evict()
+
+    def _evict(self):
+        """Udržuje velikost cache pod limitem - maže nejdéle nepoužité entity a jejich názvy."""
+        count = self.conn.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+        excess = count - self.max_entities
+        if excess <= 0:
+            return
+        self.conn.execute(
+            "DELETE FROM entities WHERE qid IN (SELECT qid FROM entities ORDER BY accessed_at LIMIT ?)", (excess,))
+        self.conn.execute("DELETE FROM titles WHERE qid NOT IN (SELECT qid FROM entities)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# === OFFLINE INDEX Z DUMPU WIKIDAT ===
+
+INDEX_MAGIC = b"WLIDX001"
+# magic, meta (offset, délka), dopředná část (data, tabulka, počet slotů), zpětná část (data, tabulka, počet slotů)
+INDEX_HEADER = struct.Struct("<8s8Q")
+SLOT = struct.Struct("<Q")
+SORT_CHUNK_LINES = 1000000  # Řádků tříděných najednou v paměti při stavbě indexu
+
+
+def open_dump(path):
+    """Otevře (případně komprimovaný) dump jako text - čte se proudově, nikdy celý najednou."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+SQL_ROW_RE = re.compile(r"\((\d+),(\d+),'((?:[^'\\]|\\.)*)','((?:[^'\\]|\\.)*)'\)")
+SQL_ESCAPE_RE = re.compile(r"\\(.)")
+SQL_ESCAPES = {'n': '\n', 'r': '\r', 't': '\t', '0': '\0'}
+
+
+def iter_items_per_site_sql(path):
+    """Řádky (QID číslo, site, název) z SQL dumpu tabulky wb_items_per_site."""
+    unescape = lambda s: SQL_ESCAPE_RE.sub(lambda m: SQL_ESCAPES.get(m.group(1), m.group(1)), s)
+    with open_dump(path) as f:
+        for line in f:
+            if not line.startswith("INSERT INTO"):
+                continue
+            for _, item_id, site, title in SQL_ROW_RE.findall(line):
+                yield int(item_id), unescape(site), unescape(title)
+
+
+def iter_json_dump(path):
+    """Řádky (QID číslo, site, název) z JSON dumpu entit (jedna entita na řádek uvnitř pole)."""
+    with open_dump(path) as f:
+        for line in f:
+            line = line.strip().rstrip(",")
+            if not line.startswith("{"):
+                continue  # Úvodní '[' a závěrečné ']'
+            entity = json.loads(line)
+            qid = entity.get("id", "")
+            if not qid.startswith("Q"):
+                continue
+            for site, link in entity.get("sitelinks", {}).items():
+                yield int(qid[1:]), site, link["title"]
+
+
+def _sorted_runs(lines, tmp_dir):
+    """Externí třídění: setříděné úseky zapíše do dočasných souborů a vrátí je sloučené bez duplicit."""
+    runs = []
+
+    def flush(buffer):
+        buffer.sort()
+        run = tempfile.TemporaryFile(dir=tmp_dir)
+        run.writelines(buffer)
+        run.seek(0)
+        runs.append(run)
+
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= SORT_CHUNK_LINES:
+            flush(buffer)
+            buffer = []
+    if buffer:
+        flush(buffer)
+
+    previous = None
+    for line in heapq.merge(*runs):
+        if line != previous:
+            yield line
+            previous = line
+    for run in runs:
+        run.close()
+
+
+def _slot_count(n):
+    # Tabulka zaplněná nejvýš z poloviny - krátké lineární sondování
+    slots = 1
+    while slots < n * 2:
+        slots *= 2
+    return slots
+
+
+def _write_section(out, records, key_of, tmp_dir):
+    """
+    Zapíše setříděná data a za ně hashovací tabulku (klíč -> offset prvního záznamu s tímto klíčem).
+    Vrací (offset dat, offset tabulky, počet slotů, počet záznamů).
+    """
+    data_off = out.tell()
+    count = 0
+    with tempfile.TemporaryFile(dir=tmp_dir) as keys:
+        previous_key = None
+        for line in records:
+            key = key_of(line)
+            if key != previous_key:
+                # Začátek skupiny - do tabulky jde jen první záznam se stejným klíčem
+                keys.write(SLOT.pack(out.tell()))
+                keys.write(struct.pack("<I", zlib.crc32(key)))
+                previous_key = key
+            out.write(line)
+            count += 1
+
+        groups = keys.tell() // 12
+        slots = _slot_count(groups)
+        table_off = out.tell()
+        out.truncate(table_off + slots * SLOT.size)
+        out.flush()
+        with mmap.mmap(out.fileno(), 0) as mm:
+            mask = slots - 1
+            keys.seek(0)
+            for _ in range(groups):
+                entry = keys.read(12)
+                offset = SLOT.unpack_from(entry)[0]
+                slot = struct.unpack_from("<I", entry, 8)[0] & mask
+                while SLOT.unpack_from(mm, table_off + slot * SLOT.size)[0]:
+                    slot = (slot + 1) & mask
+                # Offset +1, aby 0 znamenala prázdný slot
+                SLOT.pack_into(mm, table_off + slot * SLOT.size, offset + 1)
+        out.seek(table_off + slots * SLOT.size)
+    return data_off, table_off, slots, count
+
+
+def build_sitelink_index(source, out_path, fmt=None, sites=None, log=print):
+    """
+    Postaví offline index z dumpu ('sql' = wb_items_per_site, 'json' = JSON dump entit).
+    `sites` omezí index jen na vybrané wiki (menší soubor); None = všechny wiki z dumpu.
+    """
+    fmt = fmt or ("json" if ".json" in os.path.basename(source) else "sql")
+    rows = iter_json_dump(source) if fmt == "json" else iter_items_per_site_sql(source)
+    wanted = set(sites) if sites else None
+    tmp_dir = os.path.dirname(os.path.abspath(out_path))
+    started = time.time()
+
+    # Oba směry se třídí zvlášť: (site, název) -> QID a QID -> (site, název)
+    forward_runs = tempfile.TemporaryFile(dir=tmp_dir)
+    reverse_runs = tempfile.TemporaryFile(dir=tmp_dir)
+    total = 0
+    for qid, site, title in rows:
+        if wanted and site not in wanted:
+            continue
+        title = normalize_title(title)
+        forward_runs.write(f"{site}\t{title}\t{qid}\n".encode("utf-8"))
+        reverse_runs.write(f"{qid}\t{site}\t{title}\n".encode("utf-8"))
+        total += 1
+        if total % 5000000 == 0:
+            log(f"Načteno {total} sitelinků...")
+    forward_runs.seek(0)
+    reverse_runs.seek(0)
+
+    meta = json.dumps({"sites": sorted(wanted) if wanted else None, "source": os.path.basename(source),
+                       "built": time.strftime("%Y-%m-%d %H:%M:%S")}).encode("utf-8")
+    with open(out_path, "w+b") as out:
+        out.write(INDEX_HEADER.pack(INDEX_MAGIC, *([0] * 8)))
+        meta_off = out.tell()
+        out.write(meta)
+        # Klíč dopředného záznamu je "site\tnázev", zpětného "QID"
+        forward = _write_section(out, _sorted_runs(forward_runs, tmp_dir), lambda l: l.rsplit(b"\t", 1)[0], tmp_dir)
+        reverse = _write_section(out, _sorted_runs(reverse_runs, tmp_dir), lambda l: l.split(b"\t", 1)[0], tmp_dir)
+        out.seek(0)
+        out.write(INDEX_HEADER.pack(INDEX_MAGIC, meta_off, len(meta), *forward[:3], *reverse[:3]))
+    forward_runs.close()
+    reverse_runs.close()
+    log(f"Index {out_path}: {forward[3]} sitelinků, {reverse[3]} záznamů QID za {time.time() - started:.0f} s")
+
+
+class SitelinkIndex:
+    """Offline index namapovaný do paměti; vyhledávání přes hashovací tabulky bez načítání souboru."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = INDEX_HEADER.unpack_from(self.mm, 0)
+        if header[0] != INDEX_MAGIC:
+            raise ValueError(f"{path} není index Wiki Linkeru")
+        meta_off, meta_len, *rest = header[1:]
+        self.meta = json.loads(self.mm[meta_off:meta_off + meta_len])
+        self.forward = rest[1:3]  # (tabulka, počet slotů)
+        self.reverse = rest[4:6]
+        self.sites = set(self.meta["sites"]) if self.meta["sites"] else None
+        self.hits = 0
+        self.misses = 0
+
+    def covers(self, sites):
+        """Zda index obsahuje všechny požadované wiki (jinak by chybějící sitelink nic neznamenal)."""
+        return self.sites is None or set(sites) <= self.sites
+
+    def _find(self, section, key):
+        """Offset prvního záznamu s daným klíčem, nebo None."""
+        table_off, slots = section
+        mask = slots - 1
+        slot = zlib.crc32(key) & mask
+        prefix = key + b"\t"
+        while True:
+            offset = SLOT.unpack_from(self.mm, table_off + slot * SLOT.size)[0]
+            if not offset:
+                return None
+            offset -= 1
+            # Názvy ani site neobsahují tabulátor, takže shoda prefixu "klíč\t" je shoda celého klíče
+            if self.mm[offset:offset + len(prefix)] == prefix:
+                return offset
+            slot = (slot + 1) & mask
+
+    def sitelinks(self, qid, sites=None):
+        """Všechny sitelinky položky {site: název} (volitelně jen pro `sites`), nebo None."""
+        key = str(qid).encode("utf-8")
+        offset = self._find(self.reverse, key)
+        if offset is None:
+            return None
+        prefix = key + b"\t"
+        result = {}
+        while self.mm[offset:offset + len(prefix)] == prefix:
+            end = self.mm.find(b"\n", offset)
+            _, site, title = self.mm[offset:end].decode("utf-8").split("\t", 2)
+            if not sites or site in sites:
+                result[site] = title
+            offset = end + 1
+        return result
+
+    def lookup(self, titles, src_lang, sites=None):
+        """Stejné rozhraní jako SitelinkCache.lookup: {vstup: (QID, sitelinky)} pro nalezené vstupy."""
+        results = {}
+        for t in titles:
+            key = normalize_title(t)
+            if src_lang.lower() == 'wikidata':
+                qid = key[1:] if key[:1] == "Q" and key[1:].isdigit() else None
+            else:
+                offset = self._find(self.forward, f"{src_lang}wiki\t{key}".encode("utf-8"))
+                qid = None
+                if offset is not None:
+                    end = self.mm.find(b"\n", offset)
+                    qid = self.mm[offset:end].rsplit(b"\t", 1)[1].decode("ascii")
+            sitelinks = self.sitelinks(qid, sites) if qid else None
+            if sitelinks is not None:
+                results[t] = (f"Q{qid}", sitelinks)
+        self.hits += len(results)
+        self.misses += len(titles) - len(results)
+        return results
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+
+# === PŘEKLADOVÝ ENGINE (GUI i příkazová řádka) ===
+
+NOT_FOUND = "--- NENALEZENO ---"
+
+
+class LinkerEngine:
+    """
+    Proudové zpracování vstupu po blocích po CHUNK_SIZE řádcích. Výsledky vrací ve vstupním pořadí,
+    jakmile je hotový nejstarší rozpracovaný blok; v paměti je jen několik bloků bez ohledu na délku vstupu.
+    Názvy, které nejsou v cache ani v offline indexu, se nejdřív hromadně převedou přes přesměrování
+    na zdrojové wiki a teprve konečné názvy jdou do wbgetentities.
+    """
+
+    def __init__(self, src_lang, target_langs, empty_on_missing=True, workers=DEFAULT_WORKERS,
+                 cache=None, api_url=API_URL, log=print, index=None, maxlag=DEFAULT_MAXLAG,
+                 resolve_redirects=True, source_url=None, high_limits=False):
+        self.src_lang = src_lang
+        self.target_langs = list(target_langs)
+        self.not_found = "" if empty_on_missing else NOT_FOUND
+        self.by_id = src_lang.lower() == 'wikidata'
+        # Sitelinky jen pro zdrojovou a cílové wiki - odpověď zůstane malá i pro entity s 300 sitelinky
+        self.sites = required_sites(src_lang, self.target_langs)
+        self.cache = cache
+        # S cache ale bez sitefilter: uložená entita pak odpoví i příštímu běhu s jinými cílovými jazyky
+        self.fetch_sites = None if cache else self.sites
+        self.log = log
+        self.index = index
+        if index and not index.covers(self.sites):
+            log(f"Offline index neobsahuje všechny wiki {', '.join(self.sites)} - nepoužije se")
+            self.index = None
+        self.chunk_size = HIGH_LIMITS_CHUNK_SIZE if high_limits else CHUNK_SIZE
+        self.fetcher = WikidataFetcher(api_url=api_url, workers=workers, maxlag=maxlag, max_batch=self.chunk_size)
+        # Přesměrování řešíme jen u názvů článků, QID přesměrování řeší wbgetentities samo
+        self.source_url = source_url or source_api_url(src_lang)
+        self.resolve_redirects = resolve_redirects and not self.by_id
+        self.redirects = 0
+        # Rozpracovaných bloků najednou - stačí, aby všechna vlákna měla stále práci
+        self.max_pending = self.fetcher.workers * 2
+
+    def iter_rows(self, lines, on_progress=None):
+        """
+        Pro každý vstupní řádek vrací dvojici (název, hodnoty); hodnoty jsou seznam po cílových jazycích,
+        pro prázdný řádek None. `lines` může být libovolný iterátor (soubor, stdin).
+        `on_progress(n)` se volá po každém dokončeném bloku s počtem jeho řádků.
+        """
+        pending = deque()
+        offset = 0
+        for chunk in self._read_chunks(lines):
+            pending.append(self._submit(chunk, offset))
+            offset += len(chunk)
+            if len(pending) >= self.max_pending:
+                yield from self._finish(pending.popleft(), on_progress)
+        while pending:
+            yield from self._finish(pending.popleft(), on_progress)
+
+        if self.cache:
+            self.log(f"Cache: {self.cache.hits} zásahů, {self.cache.misses} výpadků")
+        if self.index:
+            self.log(f"Offline index: {self.index.hits} nalezeno, {self.index.misses} dotázáno přes API")
+        if self.resolve_redirects:
+            self.log(f"Přesměrování a normalizace: {self.redirects} názvů převedeno")
+        self.log(self.fetcher.scheduler.summary())
+
+    def _read_chunks(self, lines):
+        chunk = []
+        for line in lines:
+            chunk.append(line.strip())
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _submit(self, chunk, offset):
+        """Cache a offline index pro blok vyřeší hned, zbytek pošle do API na pozadí."""
+        # Každý název stačí zjistit jednou; prázdné řetězce do API dotazu neposíláme
+        query_titles = list(dict.fromkeys(t for t in chunk if t))
+        hits = {}
+        if self.cache:
+            hits = self.cache.lookup(query_titles, self.src_lang, self.sites)
+            query_titles = [t for t in query_titles if t not in hits]
+        if self.index:
+            found = self.index.lookup(query_titles, self.src_lang, self.sites)
+            hits.update(found)
+            query_titles = [t for t in query_titles if t not in found]
+        # Velikost dávky určuje scheduler podle chování API; blok může jít i ve více dotazech
+        size = self.fetcher.scheduler.batch_size
+        batches = []
+        for i in range(0, len(query_titles), size):
+            batch = query_titles[i:i + size]
+            batches.append(self.fetcher.pool.submit(self._fetch_batch, batch))
+        return chunk, offset, hits, batches
+
+    def _fetch_batch(self, batch):
+        """
+        Běží ve vlákně poolu: (volitelně) převede názvy přes přesměrování a stáhne entity.
+        Vrací ({název: (QID, sitelinky)} pod vstupními i kanonickými názvy, počet převedených názvů).
+        """
+        mapping = {t: t for t in batch}
+        if self.resolve_redirects:
+            mapping = parse_resolution(self.fetcher.get(build_resolve_params(batch), self.source_url), batch)
+        finals = list(dict.fromkeys(mapping.values()))
+        records = parse_wbgetentities(
+            self.fetcher.get(build_wbgetentities_params(finals, self.src_lang, self.fetch_sites)), finals, self.src_lang)
+        redirected = 0
+        for title, final in mapping.items():
+            if final != title and final in records:
+                records[title] = records[final]
+                redirected += 1
+        return records, redirected
+
+    def _finish(self, item, on_progress):
+        chunk, offset, results_map, batches = item
+        for future in batches:
+            try:
+                records, redirected = future.result()
+                self.redirects += redirected
+                results_map.update(records)
+                if self.cache:
+                    self.cache.store(records, self.src_lang, self.fetch_sites)
+            except Exception as e:
+                # Dotaz selhal i po opakováních - řádky bloku zůstanou nenalezené
+                self.log(f"Chyba API v bloku {offset}: {str(e)}")
+
+        # Case-insensitive fallback přes index (pokud není vstup ID); při kolizi vyhrává první záznam
+        folded = {}
+        if not self.by_id:
+            for k, v in results_map.items():
+                folded.setdefault(k.casefold(), v)
+
+        for title in chunk:
+            if not title: # Ponechat prázdné řádky ve vstupu jako prázdné ve výstupu
+                yield title, None
+                continue
+            # 1. Přímá shoda, 2. shoda bez ohledu na velikost písmen
+            record = results_map.get(title) or folded.get(title.casefold())
+            # Entita neexistuje, nebo nemá článek v cílovém jazyce
+            values = [(target_value(record, lang) if record else "") or self.not_found for lang in self.target_langs]
+            yield title, values
+
+        if on_progress:
+            on_progress(len(chunk))
+
+    def close(self):
+        self.fetcher.close()
+
+
+def format_tsv_row(values, title=None):
+    """Řádek TSV; `title` se přidá jako první sloupec (příkazová řádka s --with-input)."""
+    columns = [] if values is None else list(values)
+    if title is not None:
+        columns.insert(0, title)
+    return "\t".join(columns)
+
+
+class WikiLinkerApp:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Wiki Linker - Překladač odkazů")
+        self.root.geometry("950x650")
+
+        # --- Styl ---
+        style = ttk.Style()
+        style.configure("TButton", font=("Helvetica", 10))
+        style.configure("TLabel", font=("Helvetica", 10))
+
+        # --- Horní panel s nastavením ---
+        control_frame = ttk.LabelFrame(root, text="Nastavení", padding=10)
+        control_frame.pack(fill="x", padx=10, pady=5)
+
+        # Definice jazyků
+        self.langs = ('cs', 'en', 'de', 'sk', 'fr', 'pl', 'es', 'it', 'ru', 'hu', 'pt', 'zh', 'wikidata')
+
+        # Výběr zdrojového jazyka
+        ttk.Label(control_frame, text="Zdrojový jazyk:").grid(row=0, column=0, padx=5, sticky="w")
+        self.src_lang_var = tk.StringVar(value="cs")
+        self.src_combo = ttk.Combobox(control_frame, textvariable=self.src_lang_var, width=10)
+        self.src_combo['values'] = self.langs
+        self.src_combo.grid(row=0, column=1, padx=5, sticky="w")
+
+        # Výběr cílových jazyků (lze vybrat více - každý jazyk = jeden sloupec výstupu)
+        ttk.Label(control_frame, text="Cílové jazyky:").grid(row=0, column=2, padx=5, sticky="w")
+        target_frame = ttk.Frame(control_frame)
+        target_frame.grid(row=0, column=3, padx=5, sticky="w")
+        self.target_listbox = tk.Listbox(target_frame, selectmode=tk.MULTIPLE, exportselection=False, height=4, width=12)
+        for lang in self.langs:
+            self.target_listbox.insert(tk.END, lang)
+        self.target_listbox.selection_set(self.langs.index("en"))
+        target_scroll = ttk.Scrollbar(target_frame, orient="vertical", command=self.target_listbox.yview)
+        self.target_listbox.config(yscrollcommand=target_scroll.set)
+        self.target_listbox.pack(side="left")
+        target_scroll.pack(side="left", fill="y")
+        
+        # Checkbox pro prázdné řádky
+        self.empty_if_missing_var = tk.BooleanVar(value=True)
+        self.empty_check = ttk.Checkbutton(control_frame, text="Pokud neexistuje, nechat prázdné", variable=self.empty_if_missing_var)
+        self.empty_check.grid(row=0, column=4, padx=15, sticky="w")
+
+        # Hromadné řešení přesměrování na zdrojové wiki před dotazem na Wikidata
+        self.resolve_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(control_frame, text="Řešit přesměrování", variable=self.resolve_var).grid(row=2, column=5, padx=20, pady=(10, 0), sticky="e")
+
+        # Záhlaví sloupců ve výstupu (hodí se hlavně při více cílových jazycích)
+        self.header_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Přidat záhlaví", variable=self.header_var).grid(row=1, column=5, padx=20, pady=(10, 0), sticky="e")
+
+        # Tlačítko start
+        self.start_btn = ttk.Button(control_frame, text="SPUSTIT PŘEKLAD", command=self.start_processing_thread)
+        self.start_btn.grid(row=0, column=5, padx=20, sticky="e")
+
+        # Počet paralelních dotazů na API
+        ttk.Label(control_frame, text="Paralelní dotazy:").grid(row=1, column=0, padx=5, pady=(10, 0), sticky="w")
+        self.workers_var = tk.IntVar(value=DEFAULT_WORKERS)
+        self.workers_spin = ttk.Spinbox(control_frame, from_=1, to=16, textvariable=self.workers_var, width=8)
+        self.workers_spin.grid(row=1, column=1, padx=5, pady=(10, 0), sticky="w")
+
+        # Lokální cache sitelinků
+        self.use_cache_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(control_frame, text="Použít cache", variable=self.use_cache_var).grid(row=1, column=2, padx=5, pady=(10, 0), sticky="w")
+        ttk.Label(control_frame, text="Platnost cache (dny):").grid(row=1, column=3, padx=5, pady=(10, 0), sticky="w")
+        self.cache_ttl_var = tk.IntVar(value=DEFAULT_CACHE_TTL_DAYS)
+        ttk.Spinbox(control_frame, from_=0, to=365, textvariable=self.cache_ttl_var, width=8).grid(row=1, column=4, padx=5, pady=(10, 0), sticky="w")
+
+        # Offline index z dumpu Wikidat (prázdné = jen cache a API)
+        ttk.Label(control_frame, text="Offline index:").grid(row=2, column=0, padx=5, pady=(10, 0), sticky="w")
+        self.index_path_var = tk.StringVar(value="")
+        ttk.Entry(control_frame, textvariable=self.index_path_var, width=50).grid(row=2, column=1, columnspan=3, padx=5, pady=(10, 0), sticky="ew")
+        ttk.Button(control_frame, text="Vybrat...", command=self.choose_index).grid(row=2, column=4, padx=5, pady=(10, 0), sticky="w")
+
+        # Progress bar
+        self.progress = ttk.Progressbar(control_frame, orient="horizontal", length=200, mode="determinate")
+        self.progress.grid(row=3, column=0, columnspan=6, sticky="ew", pady=(10, 0))
+
+        # --- Hlavní oblast s textovými poli ---
+        main_frame = ttk.Frame(root, padding=10)
+        main_frame.pack(fill="both", expand=True)
+
+        # Levý sloupec (Vstup)
+        left_frame = ttk.Frame(main_frame)
+        left_frame.pack(side="left", fill="both", expand=True, padx=(0, 5))
+        
+        ttk.Label(left_frame, text="Vstupní články / ID (1 řádek = 1 položka):").pack(anchor="w")
+        self.input_text = scrolledtext.ScrolledText(left_frame, width=40, height=20)
+        self.input_text.pack(fill="both", expand=True)
+        # Vložíme demo data
+        self.input_text.insert(tk.END, "Voda\nKarel Čapek\nPraha\nVelká Británie\nNeexistujiciClanek123\n")
+
+        # Pravý sloupec (Výstup)
+        right_frame = ttk.Frame(main_frame)
+        right_frame.pack(side="right", fill="both", expand=True, padx=(5, 0))
+
+        ttk.Label(right_frame, text="Výsledek (kopírujte do Excelu):").pack(anchor="w")
+        self.output_text = scrolledtext.ScrolledText(right_frame, width=40, height=20, bg="#f0f0f0")
+        self.output_text.pack(fill="both", expand=True)
+
+    def choose_index(self):
+        path = filedialog.askopenfilename(title="Vyberte offline index", filetypes=[("Index Wiki Linkeru", "*.idx"), ("Všechny soubory", "*.*")])
+        if path:
+            self.index_path_var.set(path)
+
+    def start_processing_thread(self):
+        """Spustí zpracování v novém vlákně, aby nezamrzlo GUI."""
+        src = self.src_lang_var.get().strip()
+        targets = [self.langs[i] for i in self.target_listbox.curselection()]
+        with_header = self.header_var.get()
+        index_path = self.index_path_var.get().strip() or None
+        resolve_redirects = self.resolve_var.get()
+        raw_data = self.input_text.get("1.0", tk.END).strip()
+        empty_on_missing = self.empty_if_missing_var.get()
+        try:
+            workers = max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            workers = DEFAULT_WORKERS
+        use_cache = self.use_cache_var.get()
+        try:
+            cache_ttl_days = max(0, int(self.cache_ttl_var.get()))
+        except (tk.TclError, ValueError):
+            cache_ttl_days = DEFAULT_CACHE_TTL_DAYS
+
+        if not raw_data:
+            messagebox.showwarning("Chyba", "Vložte prosím seznam článků.")
+            return
+        if not targets:
+            messagebox.showwarning("Chyba", "Vyberte alespoň jeden cílový jazyk.")
+            return
+
+        self.start_btn.config(state="disabled")
+        self.output_text.delete("1.0", tk.END) # Vymazat staré výsledky
+        self.progress['value'] = 0
+        
+        # Spuštění ve vlákně
+        thread = threading.Thread(target=self.run_logic, args=(raw_data, src, targets, empty_on_missing, workers, use_cache, cache_ttl_days, with_header, index_path,
+                                                                resolve_redirects))
+        thread.daemon = True
+        thread.start()
+
+    def run_logic(self, raw_input, src_lang, target_langs, empty_on_missing, workers=DEFAULT_WORKERS,
+                  use_cache=True, cache_ttl_days=DEFAULT_CACHE_TTL_DAYS, with_header=False, index_path=None,
+                  resolve_redirects=True):
+        """Logika stahování dat - tenký klient nad LinkerEngine, výsledky sbírá do seznamu řádků."""
+        
+        try:
+            lines = raw_input.split('\n')
+            # Ignorujeme pouze poslední prázdný řádek vzniklý kopírováním
+            if lines and not lines[-1].strip():
+                lines.pop()
+
+            # Nastavení maxima pro progress bar
+            self.root.after(0, lambda total=len(lines): self.progress.configure(maximum=total))
+
+            output_lines = []
+            if with_header:
+                output_lines.append("\t".join(target_langs))
+
+            cache = SitelinkCache(ttl_days=cache_ttl_days) if use_cache else None
+            index = SitelinkIndex(index_path) if index_path else None
+            engine = LinkerEngine(src_lang, target_langs, empty_on_missing, workers, cache, log=self.append_log, index=index,
+                                  resolve_redirects=resolve_redirects)
+            try:
+                on_progress = lambda n: self.root.after(0, lambda step=n: self.progress.step(step))
+                for _, values in engine.iter_rows(lines, on_progress):
+                    output_lines.append(format_tsv_row(values))
+            finally:
+                engine.close()
+                if cache:
+                    cache.close()
+                if index:
+                    index.close()
+
+            # Vložení do GUI
+            final_output_string = "\n".join(output_lines) + "\n"
+            self.root.after(0, lambda: self.finish_processing(final_output_string))
+
+        except Exception as e:
+            self.root.after(0, lambda: messagebox.showerror("Kritická chyba", str(e)))
+            self.root.after(0, lambda: self.start_btn.config(state="normal"))
+
+    def finish_processing(self, result_string):
+        """Zobrazí výsledky a znovu aktivuje tlačítko."""
+        self.output_text.insert(tk.END, result_string)
+        self.start_btn.config(state="normal")
+        self.progress['value'] = 0
+        messagebox.showinfo("Hotovo", "Překlad dokončen! Výsledky můžete zkopírovat.")
+
+    def append_log(self, text):
+        print(text) # Pro ladění do konzole
+
+# === BENCHMARK PROTI LOKÁLNÍMU MOCK API ===
+
+class MockWikidataHandler(BaseHTTPRequestHandler):
+    """
+    Napodobenina wbgetentities - pro každý název vrátí fiktivní entitu s několika sitelinky.
+    Na action=query odpovídá jako zdrojová wiki: malé první písmeno normalizuje a názvy
+    "R:<cíl>" hlásí jako přesměrování na <cíl>.
+    Umí simulovat přetížené API: náhodné maxlag chyby a 429, a 429 při překročení `capacity` souběžných dotazů.
+    """
+    protocol_version = "HTTP/1.1"  # Keep-alive, aby šlo měřit znovupoužití spojení
+    disable_nagle_algorithm = True  # Jinak hlavičky a tělo čekají na zpožděné ACK
+    latency = 0.2
+    langs = ('en', 'de', 'sk', 'fr', 'pl', 'es', 'it', 'ru', 'hu', 'pt', 'zh', 'ja', 'uk', 'nl', 'sv')
+    maxlag_rate = 0.0
+    throttle_rate = 0.0
+    capacity = None
+    retry_after = 1
+    active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            overloaded = cls.capacity is not None and cls.active > cls.capacity
+        try:
+            self._respond(overloaded)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _respond(self, overloaded):
+        time.sleep(self.latency)
+        query = parse_qs(urlparse(self.path).query)
+
+        if overloaded or random.random() < self.throttle_rate:
+            self._send_json(429, {"error": {"code": "ratelimited", "info": "Too many requests"}},
+                            {"Retry-After": str(self.retry_after)})
+            return
+        if "maxlag" in query and random.random() < self.maxlag_rate:
+            lag = int(query["maxlag"][0]) + 1
+            self._send_json(200, {"error": {"code": "maxlag", "info": f"Waiting for a database server: {lag} seconds lagged.", "lag": lag}},
+                            {"Retry-After": str(self.retry_after), "X-Database-Lag": str(lag)})
+            return
+        site = query.get("sites", ["cswiki"])[0]
+        names = query.get("titles", query.get("ids", [""]))[0].split("|")
+
+        if query.get("action") == ["query"]:
+            self._send_json(200, {"batchcomplete": "", "query": self._resolve(query["titles"][0].split("|"))})
+            return
+
+        sitefilter = set(query["sitefilter"][0].split("|")) if "sitefilter" in query else None
+
+        entities = {}
+        for n, name in enumerate(names):
+            qid = f"Q{abs(hash(name)) % 10**8 + n}"
+            sitelinks = {f"{lang}wiki": {"site": f"{lang}wiki", "title": f"{name} ({lang})"} for lang in self.langs}
+            sitelinks[site] = {"site": site, "title": name}
+            if sitefilter:
+                sitelinks = {k: v for k, v in sitelinks.items() if k in sitefilter}
+            entities[qid] = {"id": qid, "sitelinks": sitelinks}
+
+        self._send_json(200, {"entities": entities, "success": 1})
+
+    def _resolve(self, titles):
+        normalized, redirects, pages = [], [], {}
+        for n, title in enumerate(titles):
+            if title[:1].islower():
+                normalized.append({"from": title, "to": title[0].upper() + title[1:]})
+                title = title[0].upper() + title[1:]
+            if title.startswith("R:"):
+                redirects.append({"from": title, "to": title[2:]})
+                title = title[2:]
+            pages[str(n + 1)] = {"pageid": n + 1, "ns": 0, "title": title}
+        return {"normalized": normalized, "redirects": redirects, "pages": pages}
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Bez výpisu každého požadavku
+
+
+def run_benchmark(count, latency, workers_list, maxlag_rate=0.0, throttle_rate=0.0, capacity=None):
+    """
+    Porovná původní sekvenční requests.get s WikidataFetcher na lokálním mock API.
+    S nenulovým maxlag_rate/throttle_rate nebo s `capacity` měří chování při přetíženém API.
+    """
+    MockWikidataHandler.latency = latency
+    MockWikidataHandler.maxlag_rate = maxlag_rate
+    MockWikidataHandler.throttle_rate = throttle_rate
+    MockWikidataHandler.capacity = capacity
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockWikidataHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/w/api.php"
+
+    titles = [f"Článek {n}" for n in range(count)]
+    chunks = [titles[i:i + CHUNK_SIZE] for i in range(0, count, CHUNK_SIZE)]
+    build = lambda chunk: build_wbgetentities_params(chunk, "cs", required_sites("cs", ["en"]))
+    print(f"Mock API: {api_url}, {count} titulů, {len(chunks)} bloků, latence {latency} s, "
+          f"maxlag {maxlag_rate:.0%}, 429 {throttle_rate:.0%}, kapacita {capacity or '-'}")
+
+    try:
+        # Původní chování: nové spojení, čekání na předchozí blok, chybný blok se zahodí
+        started = time.perf_counter()
+        lost = 0
+        for chunk in chunks:
+            data = requests.get(api_url, params=build(chunk), headers={'User-Agent': USER_AGENT}).json()
+            if "entities" not in data:
+                lost += 1
+        baseline = time.perf_counter() - started
+        print(f"  sekvenčně (requests.get): {baseline:7.2f} s  {count / baseline:9.1f} titulů/s  (ztraceno bloků {lost})")
+
+        for workers in workers_list:
+            fetcher = WikidataFetcher(api_url=api_url, workers=workers)
+            started = time.perf_counter()
+            responses = fetcher.fetch_chunks(chunks, build)
+            elapsed = time.perf_counter() - started
+            fetcher.close()
+            resolved = sum(len(parse_wbgetentities(data, chunk, "cs")) for data, chunk in zip(responses, chunks) if data)
+            print(f"  WikidataFetcher, {workers:2d} vláken: {elapsed:7.2f} s  {count / elapsed:9.1f} titulů/s"
+                  f"  (x{baseline / elapsed:.1f}, nalezeno {resolved})")
+            print(f"      {fetcher.scheduler.summary()}")
+    finally:
+        server.shutdown()
+
+
+def check_cache_languages(count=200):
+    """
+    Ověření cache proti mock API: běh pro en naplní cache, následný běh pro fr se musí obejít
+    bez API (všechny názvy ze cache) a vrátit francouzské názvy. Vrací True, pokud to platí.
+    """
+    MockWikidataHandler.latency = 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockWikidataHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/w/api.php"
+    titles = [f"Článek {n}" for n in range(count)]
+    log = lambda text: None
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            cache = SitelinkCache(os.path.join(folder, "cache.sqlite"))
+            for lang in ("en", "fr"):
+                hits_before = cache.hits
+                engine = LinkerEngine("cs", [lang], cache=cache, api_url=api_url, source_url=api_url, log=log)
+                values = [v[0] for _, v in engine.iter_rows(titles)]
+                engine.close()
+                hits = cache.hits - hits_before
+                correct = values == [f"{title} ({lang})" for title in titles]
+                print(f"  {lang}: {hits}/{count} ze cache, výsledky {'v pořádku' if correct else 'CHYBNÉ'}")
+            cache.close()
+        return correct and hits == count
+    finally:
+        server.shutdown()
+
+
+# === PŘÍKAZOVÁ ŘÁDKA ===
+
+def run_cli(args):
+    """Bezobslužný režim: čte názvy ze souboru/stdin a průběžně zapisuje TSV po dokončených blocích."""
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    log = lambda text: print(text, file=sys.stderr)
+
+    if args.input == "-":
+        sys.stdin.reconfigure(encoding="utf-8")
+        infile = sys.stdin
+    else:
+        infile = open(args.input, encoding="utf-8")
+    if args.output == "-":
+        sys.stdout.reconfigure(encoding="utf-8")
+        outfile = sys.stdout
+    else:
+        outfile = open(args.output, "w", encoding="utf-8", newline="\n")
+
+    cache = None if args.no_cache else SitelinkCache(args.cache_path, args.cache_ttl, args.cache_max)
+    index = SitelinkIndex(args.index) if args.index else None
+    engine = LinkerEngine(args.src, targets, not args.mark_missing, args.workers, cache, api_url=args.api_url, log=log,
+                          index=index, maxlag=args.maxlag, resolve_redirects=not args.no_redirects,
+                          source_url=args.source_api_url, high_limits=args.high_limits)
+    done = 0
+
+    def on_progress(n):
+        nonlocal done
+        done += n
+        outfile.flush()
+        if args.verbose:
+            log(f"Zpracováno {done} řádků")
+
+    try:
+        if args.header:
+            outfile.write(format_tsv_row(targets, args.src if args.with_input else None) + "\n")
+        for title, values in engine.iter_rows(infile, on_progress):
+            if values is None and args.with_input:
+                values = [""] * len(targets)
+            outfile.write(format_tsv_row(values, title if args.with_input else None) + "\n")
+    finally:
+        engine.close()
+        if cache:
+            cache.close()
+        if index:
+            index.close()
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wiki Linker - překladač odkazů mezi jazykovými verzemi.")
+    cli = parser.add_argument_group("příkazová řádka (bez GUI)")
+    cli.add_argument("--cli", action="store_true", help="spustit bez GUI: vstup ze souboru/stdin, TSV na výstup")
+    cli.add_argument("--src", default="cs", help="zdrojový jazyk, nebo 'wikidata' pro vstup QID (výchozí cs)")
+    cli.add_argument("--targets", default="en", help="čárkou oddělené cílové jazyky, např. en,de,wikidata")
+    cli.add_argument("-i", "--input", default="-", help="soubor s názvy, 1 řádek = 1 položka (výchozí stdin)")
+    cli.add_argument("-o", "--output", default="-", help="výstupní TSV soubor (výchozí stdout)")
+    cli.add_argument("--api-url", default=API_URL, help="adresa Wikidata API (např. lokální mock pro testy)")
+    cli.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="nejvyšší počet paralelních dotazů na API")
+    cli.add_argument("--source-api-url", help="API zdrojové wiki pro přesměrování (výchozí https://<src>.wikipedia.org/w/api.php)")
+    cli.add_argument("--no-redirects", action="store_true", help="neřešit přesměrování na zdrojové wiki")
+    cli.add_argument("--high-limits", action="store_true", help=f"dávky po {HIGH_LIMITS_CHUNK_SIZE} (jen pro účty s apihighlimits)")
+    cli.add_argument("--maxlag", type=int, default=DEFAULT_MAXLAG, help="parametr maxlag pro API v sekundách")
+    cli.add_argument("--header", action="store_true", help="první řádek výstupu se jmény sloupců")
+    cli.add_argument("--with-input", action="store_true", help="první sloupec výstupu obsahuje vstupní název")
+    cli.add_argument("--mark-missing", action="store_true", help=f"nenalezené položky označit '{NOT_FOUND}' místo prázdné buňky")
+    cli.add_argument("--no-cache", action="store_true", help="nepoužívat lokální cache sitelinků")
+    cli.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="soubor SQLite cache")
+    cli.add_argument("--cache-ttl", type=int, default=DEFAULT_CACHE_TTL_DAYS, help="platnost záznamů cache ve dnech")
+    cli.add_argument("--cache-max", type=int, default=DEFAULT_CACHE_MAX_ENTITIES, help="maximální počet entit v cache")
+    cli.add_argument("-v", "--verbose", action="store_true", help="průběh na stderr")
+    cli.add_argument("--index", help="offline index z dumpu Wikidat; co v něm chybí, se dotáže přes API")
+    offline = parser.add_argument_group("stavba offline indexu")
+    offline.add_argument("--build-index", metavar="DUMP", help="postavit index (cesta v --index) z wb_items_per_site SQL dumpu nebo JSON dumpu (.gz/.bz2)")
+    offline.add_argument("--index-format", choices=("sql", "json"), help="formát dumpu (výchozí podle názvu souboru)")
+    offline.add_argument("--index-sites", help="čárkou oddělené wiki, které index obsahuje, např. cswiki,enwiki,dewiki (výchozí všechny)")
+    parser.add_argument("--benchmark", action="store_true", help="změřit propustnost proti lokálnímu mock API místo spuštění GUI")
+    parser.add_argument("--bench-count", type=int, default=2000, help="počet titulů pro benchmark")
+    parser.add_argument("--bench-latency", type=float, default=0.2, help="umělá latence mock API v sekundách")
+    parser.add_argument("--bench-workers", default="1,4,8", help="čárkou oddělené počty vláken k porovnání")
+    parser.add_argument("--bench-maxlag", type=float, default=0.0, help="podíl odpovědí mock API s chybou maxlag (0-1)")
+    parser.add_argument("--bench-throttle", type=float, default=0.0, help="podíl odpovědí mock API s HTTP 429 (0-1)")
+    parser.add_argument("--bench-capacity", type=int, help="mock API vrací 429 nad tento počet souběžných dotazů")
+    parser.add_argument("--check-cache", action="store_true", help="ověřit na mock API, že cache z běhu pro en odpoví i běhu pro fr")
+    args = parser.parse_args()
+
+    if args.build_index:
+        if not args.index:
+            parser.error("--build-index vyžaduje cestu k výslednému indexu v --index")
+        sites = [site.strip() for site in args.index_sites.split(",")] if args.index_sites else None
+        build_sitelink_index(args.build_index, args.index, args.index_format, sites, log=lambda text: print(text, file=sys.stderr))
+        sys.exit(0)
+    if args.benchmark:
+        run_benchmark(args.bench_count, args.bench_latency, [int(w) for w in args.bench_workers.split(",")],
+                      args.bench_maxlag, args.bench_throttle, args.bench_capacity)
+        sys.exit(0)
+    if args.check_cache:
+        sys.exit(0 if check_cache_languages() else 1)
+    if args.cli:
+        run_cli(args)
+        sys.exit(0)
+
+    root = tk.Tk()
+    app = WikiLinkerApp(root)
+    root.mainloop()
@@ -1,37 +1,1281 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog
 import pywikibot
 from pywikibot import textlib
 import threading
 import queue
 import re
-import math
+import sys
+import argparse
+import signal
+import csv
+import io
+import itertools
+import time
+import numpy as np
+import os
+import bz2
+import gzip
+import glob
+import sqlite3
+import json
+import hashlib
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import xml.etree.ElementTree as ET
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+BATCH_SIZE = 50  # Maximum titulů v jednom action=query dotazu (bez apihighlimits)
+QUEUE_SIZE = 2  # Kolik dávek smí čekat mezi fázemi pipeline (omezuje paměť)
+
+CS_TEMPLATES = ['Infobox - chemická sloučenina']
+
+# Profily cílových wiki: šablony infoboxu a klíče parametrů podle popisku pole z fields_def
+LANG_PROFILES = {
+    'en': {
+        'templates': ['Chembox', 'Infobox chemical', 'Chembox Identifiers', 'Chembox Properties', 'Chembox Hazards', 'Chembox Thermochemistry'],
+        'fields': {
+            'CAS': ['CASNo', 'CAS-No', 'CASNo1', 'CASNoOther', 'CASNo2'],
+            'EINECS': ['EINECS', 'EC_number', 'EC-no'],
+            'PubChem': ['PubChem'],
+            'Molární hmotnost': ['MolarMass'],
+            'Rozpustnost': ['Solubility'],
+            'Teplota tání': ['MeltingPt', 'MeltingPtC'],
+            'Teplota varu': ['BoilingPt', 'BoilingPtC'],
+            'Hustota': ['Density'],
+        },
+    },
+    'de': {
+        'templates': ['Infobox Chemikalie'],
+        'fields': {
+            'CAS': ['CAS'],
+            'EINECS': ['EG-Nummer'],
+            'PubChem': ['PubChem'],
+            'Molární hmotnost': ['Molare Masse'],
+            'Rozpustnost': ['Löslichkeit'],
+            'Teplota tání': ['Schmelzpunkt'],
+            'Teplota varu': ['Siedepunkt'],
+            'Hustota': ['Dichte'],
+        },
+    },
+    'fr': {
+        'templates': ['Infobox Chimie'],
+        'fields': {
+            'CAS': ['CAS'],
+            'EINECS': ['EINECS'],
+            'PubChem': ['PubChem'],
+            'Molární hmotnost': ['masse molaire'],
+            'Rozpustnost': ['solubilité'],
+            'Teplota tání': ['T fusion'],
+            'Teplota varu': ['T ébullition'],
+            'Hustota': ['masse volumique'],
+        },
+    },
+    'pl': {
+        'templates': ['Związek chemiczny infobox'],
+        'fields': {
+            'CAS': ['numer CAS'],
+            'EINECS': ['numer EINECS'],
+            'PubChem': ['PubChem'],
+            'Molární hmotnost': ['masa molowa'],
+            'Rozpustnost': ['rozpuszczalność w wodzie'],
+            'Teplota tání': ['temperatura topnienia'],
+            'Teplota varu': ['temperatura wrzenia'],
+            'Hustota': ['gęstość'],
+        },
+    },
+}
+DEFAULT_LANGS = ('en', 'de')
+
+# Definice polí
+# Struktura: (Label, CS klíč, Typ ID/Text, Default SmartUnits?); klíče cizích wiki jsou v LANG_PROFILES
+FIELDS_DEF = [
+    ('CAS', 'číslo CAS', 'id', False),
+    ('EINECS', 'číslo EINECS', 'id', False),
+    ('PubChem', 'PubChem', 'id', False),
+    ('Molární hmotnost', 'molární hmotnost', 'text', False),
+    ('Rozpustnost', 'rozpustnost', 'text', True), # Často g/l vs g/100ml
+    ('Teplota tání', 'teplota tání', 'text', True),
+    ('Teplota varu', 'teplota varu', 'text', True),
+    ('Hustota', 'hustota', 'text', True), # Často g/cm3 vs kg/m3
+]
+COMPARE_MODES = ["Standardní", "Agresivní (jen čísla)", "Super Agresivní (první číslo)"]
+
+
+def default_field_config():
+    """Výchozí nastavení porovnání polí - stejné, jaké předvyplní GUI."""
+    return {
+        label: {
+            'enabled': True,
+            'mode': "Standardní" if ftype == 'id' else "Super Agresivní (první číslo)",
+            'tolerance': 0.0 if ftype == 'id' else 0.5,
+            'smart': smart,
+        }
+        for label, _, ftype, smart in FIELDS_DEF
+    }
+
+
+BLOCK_CACHE_SIZE = 64  # Kolik rozbalených bz2 bloků (po ~100 stránkách) držet v paměti na jeden dump
+MAX_REDIRECTS = 5
+STATE_PATH = "chemchecker_state.sqlite"  # Revize a výsledky minulých kontrol
+QUEUE_TIME_BUDGET = 0.03  # Kolik sekund smí process_queue najednou zabrat hlavní smyčce Tk
+COUNTER_INTERVAL = 0.25  # Minimální odstup přepisování počítadel v záložkách a tabulek (s)
+CHECKPOINT_EVERY = 500  # Po kolika článcích CLI zapisuje checkpoint (násobek BATCH_SIZE)
+PARSE_CACHE_SIZE = 5000  # Kolik rozparsovaných infoboxů držet v paměti
+PARSE_CACHE_VERSION = 1  # Zvýšit při změně extract_infoboxes - zneplatní uložené mezipaměti
+
+NORMALIZE_CACHE_SIZE = 100000  # Kolik různých surových hodnot si pamatuje normalize_value
+SMART_FACTORS = np.array([10, 100, 1000, 0.1, 0.01, 0.001])  # g/cm3 vs kg/m3, g/l vs g/100ml apod.
+KELVIN_OFFSET = 273.15
+
+
+# --- Normalizace hodnot ---
+REF_RE = re.compile(r'<ref.*?>.*?</ref>', re.DOTALL)
+REF_SELF_CLOSING_RE = re.compile(r'<ref[^>]*/>')
+VALUE_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+VAL_TEMPLATE_RE = re.compile(r'\{\{val\|([0-9.,]+)(?:\|.*?)?\}\}', re.IGNORECASE)
+NUMBER_RE = re.compile(r'-?\d+\.?\d*')
+CAS_RE = re.compile(r'\b(\d{2,7}-\d{2,3}-\d)\b')
+NON_ID_RE = re.compile(r'[^\d-]')
+
+NormalizedValue = namedtuple('NormalizedValue', 'numbers ident text')
+
+
+def clean_wiki_markup(text):
+    """Odstraní reference a komentáře, {{val|x}} nahradí číslem."""
+    if not text: return ""
+    s = str(text)
+    s = REF_RE.sub('', s)
+    s = REF_SELF_CLOSING_RE.sub('', s)
+    s = VALUE_COMMENT_RE.sub('', s)
+    s = VAL_TEMPLATE_RE.sub(r'\1', s)
+    return s.strip()
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_value(raw):
+    """
+    Kanonická podoba surové hodnoty z infoboxu: čísla, normalizované ID (CAS apod.)
+    a text se sjednocenými mezerami. Stejné hodnoty se
+    opakují napříč tisíci článků a wiki, proto se každý řetězec rozebírá jen jednou.
+    """
+    s = clean_wiki_markup(raw)
+    numbers = tuple(float(m) for m in NUMBER_RE.findall(s.replace(',', '.')))
+    cas = CAS_RE.search(s)
+    ident = cas.group(1) if cas else NON_ID_RE.sub('', s).strip()
+    text = ' '.join(s.replace('&nbsp;', ' ').replace('\xa0', ' ').split())
+    return NormalizedValue(numbers, ident, text)
+
+
+def smart_match_array(n1, n2, tolerance):
+    """
+    Chytré porovnání jednotek pro pole dvojic čísel: vrací pole bool, zda se shodují
+    v toleranci, po vynásobení 10^n (g/cm3 vs kg/m3, g/l vs g/100ml), nebo po převodu K/°C/°F.
+    """
+    match = np.abs(n1 - n2) <= tolerance
+    # Násobky 10 oběma směry (při nulové hodnotě cíle se nehodnotí)
+    scaled = np.abs(n1[:, None] - n2[:, None] * SMART_FACTORS) <= tolerance[:, None]
+    match |= (n2 != 0) & scaled.any(axis=1)
+    # Kelvin vs Celsius (tolerance 1 stupeň)
+    match |= np.abs(np.abs(n1 - n2) - KELVIN_OFFSET) <= 1.0
+    # Celsius vs Fahrenheit oběma směry
+    temp_tol = np.maximum(tolerance, 1.0)
+    match |= np.abs(n1 * 1.8 + 32 - n2) <= temp_tol
+    match |= np.abs((n1 - 32) / 1.8 - n2) <= temp_tol
+    return match
+
+
+# --- Extrakce infoboxů ---
+# Značky, uvnitř kterých svislítko ani složené závorky nic neznamenají (obsah se přeskočí celý)
+OPAQUE_TAGS = 'ref|nowiki|pre|math|syntaxhighlight|source'
+TEMPLATE_TOKEN_RE = re.compile(r'\{\{|\}\}|\[\[|\]\]|\||=|<!--|<(' + OPAQUE_TAGS + r')\b[^>]*?(/?)>', re.IGNORECASE)
+TEMPLATE_START_RE = re.compile(r'\{\{|<!--|<(' + OPAQUE_TAGS + r')\b[^>]*?(/?)>', re.IGNORECASE)
+TEMPLATE_NAME_RE = re.compile(r'[^{}|<\[\]]*')
+COMMENT_RE = re.compile(r'<!--.*?(?:-->|$)', re.DOTALL)
+
+
+def _skip_markup(text, match):
+    """Pozice za komentářem / párovou značkou, kterou match začíná (neuzavřená značka je obyčejný text)."""
+    if match.group(0) == '<!--':
+        end = text.find('-->', match.end())
+        return len(text) if end < 0 else end + 3
+    if match.group(2):  # <ref ... />
+        return match.end()
+    close = re.compile(r'</' + match.group(1) + r'\s*>', re.IGNORECASE).search(text, match.end())
+    return close.end() if close else match.end()
+
+
+def _template_name(raw):
+    return COMMENT_RE.sub('', raw).replace('_', ' ').strip()
+
+
+def _parse_template(text, start, is_wanted, found):
+    """
+    Rozebere šablonu začínající `{{` na pozici start a vrátí pozici za jejím `}}` (None, když není uzavřená).
+    Hledané šablony (i vnořené) zapisuje do found v pořadí výskytu - vnější před vnořenými, jako textlib.
+    """
+    slot = len(found)
+    found.append(None)
+    parts = []  # (začátek, konec, pozice prvního '=' na této úrovni)
+    part_start, eq, links = start + 2, None, 0
+    pos = part_start
+    while True:
+        m = TEMPLATE_TOKEN_RE.search(text, pos)
+        if not m:
+            del found[slot:]
+            return None
+        token = m.group(0)
+        pos = m.end()
+        if token == '{{':
+            end = _parse_template(text, m.start(), is_wanted, found)
+            if end is not None:
+                pos = end
+        elif token == '}}':
+            parts.append((part_start, m.start(), eq))
+            break
+        elif token == '[[':
+            links += 1
+        elif token == ']]':
+            links = max(0, links - 1)
+        elif token == '|':
+            if not links:
+                parts.append((part_start, m.start(), eq))
+                part_start, eq = m.end(), None
+        elif token == '=':
+            if eq is None and not links:
+                eq = m.start()
+        else:
+            pos = _skip_markup(text, m)
+
+    name = _template_name(text[parts[0][0]:parts[0][1]])
+    if is_wanted(name.lower()):
+        params, positional = {}, 0
+        for p_start, p_end, p_eq in parts[1:]:
+            if p_eq is None:
+                positional += 1
+                params[str(positional)] = text[p_start:p_end]
+            else:
+                params[text[p_start:p_eq]] = text[p_eq + 1:p_end]
+        found[slot] = (name, params)
+    return pos
+
+
+def extract_infoboxes(text, templates_to_find):
+    """
+    [(název, {parametr: hodnota})] jen pro hledané šablony (shoda podřetězcem jako dřív, bez ohledu
+    na velikost písmen), včetně vnořených sekcí typu Chembox Identifiers/Properties.
+    Ostatní šablony se neparsují, jen se v nich hledá dál (např. {{Chembox}} … {{Chembox Hazards}}).
+    Komentáře, <ref>, <nowiki> a odkazy [[a|b]] parametry nerozdělují; hodnoty zůstávají surové.
+    """
+    wanted = [t.lower() for t in templates_to_find]
+    is_wanted = lambda name: any(w in name for w in wanted)
+    found = []
+    pos = 0
+    while True:
+        m = TEMPLATE_START_RE.search(text, pos)
+        if not m:
+            break
+        if m.group(0) != '{{':
+            pos = _skip_markup(text, m)
+            continue
+        name = TEMPLATE_NAME_RE.match(text, m.end()).group(0)
+        end = _parse_template(text, m.start(), is_wanted, found) if is_wanted(_template_name(name).lower()) else None
+        # Cizí (nebo neuzavřená) šablona: hledá se dál i v jejím obsahu; za hledanou až za jejím koncem
+        pos = m.end() if end is None else end
+    return [f for f in found if f]
+
+
+def textlib_infobox_params(code, templates_to_find):
+    """Původní cesta přes textlib.extract_templates_and_params - referenční výsledek pro benchmark."""
+    combined, found = {}, False
+    for t_name, params in textlib.extract_templates_and_params(code):
+        norm_name = t_name.replace('_', ' ').strip().lower()
+        if any(target.lower() in norm_name for target in templates_to_find):
+            combined.update({k.strip(): v.strip() for k, v in params.items()})
+            found = True
+    return combined if found else None
+
+
+def fast_infobox_params(code, templates_to_find):
+    combined, found = {}, False
+    for _, params in extract_infoboxes(code, templates_to_find):
+        combined.update({k.strip(): v.strip() for k, v in params.items()})
+        found = True
+    return combined if found else None
+
+
+def benchmark_extractor(lang, titles, repeat=5):
+    """Stáhne skutečné články z dané wiki a změří textlib vs extract_infoboxes; vypíše i rozdíly ve výsledcích."""
+    templates = CS_TEMPLATES if lang == 'cs' else LANG_PROFILES[lang]['templates']
+    fetcher = BatchFetcher({lang: pywikibot.Site(lang, 'wikipedia')})
+    texts = {title: text for title, text in fetcher.fetch_texts(lang, titles).items() if text}
+    size = sum(len(t) for t in texts.values())
+    print(f"{lang}: {len(texts)} článků, {size / 1e6:.1f} MB textu, {repeat} opakování")
+
+    timings = {}
+    for label, func in (('textlib', textlib_infobox_params), ('extract_infoboxes', fast_infobox_params)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            results = [func(t, templates) for t in texts.values()]
+        timings[label] = (time.perf_counter() - started) / repeat
+        print(f"  {label:18s} {timings[label] * 1000:8.1f} ms/průchod")
+        if label == 'textlib':
+            reference = results
+    print(f"  zrychlení: {timings['textlib'] / timings['extract_infoboxes']:.1f}x")
+    differences = [title for title, a, b in zip(texts, reference, results) if a != b]
+    print(f"  rozdílné výsledky: {len(differences)}" + (f" ({', '.join(differences[:10])})" if differences else ""))
+
+
+class BatchFetcher:
+    """
+    Hromadné stahování přes action=query: jeden dotaz vrátí text, wikibase_item i mezijazykové
+    odkazy pro až 50 článků, druhý dotaz texty cílových článků na dané wiki.
+    """
+
+    def __init__(self, sites, log=print):
+        self.sites = sites  # {'cs': Site, 'en': Site, ...}
+        self.log = log
+
+    def query(self, lang, titles, **params):
+        """
+        action=query s redirects=1 včetně pokračování (continue).
+        Vrací {vstupní název: stránka} - stránka je slovník z API (formatversion=2), nebo None, pokud neexistuje.
+        """
+        request_params = {
+            'action': 'query',
+            'titles': '|'.join(titles),
+            'redirects': 1,
+            'formatversion': 2,
+            **params,
+        }
+        pages = {}
+        steps = {}
+        continue_params = {}
+        while True:
+            data = self.sites[lang].simple_request(**request_params, **continue_params).submit()
+            query = data.get('query', {})
+            for key in ('normalized', 'redirects'):
+                for item in query.get(key, []):
+                    steps[item['from']] = item['to']
+            for page in query.get('pages', []):
+                # Při pokračování přicházejí jen nedokončené vlastnosti (langlinks, ale po rvcontinue
+                # i revisions a pageprops) - seznamy prodlužujeme, slovníky slučujeme
+                stored = pages.setdefault(page['title'], page)
+                if stored is not page:
+                    for key, value in page.items():
+                        if isinstance(value, list):
+                            stored.setdefault(key, []).extend(value)
+                        elif isinstance(value, dict):
+                            stored.setdefault(key, {}).update(value)
+            if 'continue' not in data:
+                break
+            continue_params = data['continue']
+
+        result = {}
+        for title in titles:
+            final, seen = title, set()
+            while final in steps and final not in seen:
+                seen.add(final)
+                final = steps[final]
+            page = pages.get(final)
+            result[title] = None if page is None or page.get('missing') or page.get('invalid') else page
+        return result
+
+    @staticmethod
+    def page_text(page):
+        revisions = page.get('revisions') or [{}]
+        return revisions[0].get('slots', {}).get('main', {}).get('content', '')
+
+    def fetch_source_batch(self, titles, target_langs):
+        """
+        CS články jedním dotazem (po 50): {název: None, nebo {'title', 'text', 'revid', 'qid', 'links': {jazyk: název}}}.
+        """
+        pages = self.query('cs', titles,
+                           prop='revisions|pageprops|langlinks',
+                           rvprop='content|ids', rvslots='main',
+                           ppprop='wikibase_item', lllimit='max')
+        result = {}
+        for title, page in pages.items():
+            if page is None:
+                result[title] = None
+                continue
+            links = {ll['lang']: ll['title'] for ll in page.get('langlinks', []) if ll['lang'] in target_langs}
+            result[title] = {
+                'title': page['title'],
+                'text': self.page_text(page),
+                'revid': self.page_revid(page),
+                'qid': page.get('pageprops', {}).get('wikibase_item'),
+                'links': links,
+            }
+        return result
+
+    def fetch_texts(self, lang, titles):
+        """Texty článků na jedné wiki po dávkách 50: {název: text, nebo None}."""
+        result = {}
+        titles = list(dict.fromkeys(titles))
+        for i in range(0, len(titles), BATCH_SIZE):
+            batch = titles[i:i + BATCH_SIZE]
+            pages = self.query(lang, batch, prop='revisions', rvprop='content|ids', rvslots='main')
+            for title, page in pages.items():
+                result[title] = self.page_text(page) if page else None
+        return result
+
+    @staticmethod
+    def page_revid(page):
+        return (page.get('revisions') or [{}])[0].get('revid')
+
+    def fetch_source_revisions(self, titles, target_langs):
+        """Lehký dotaz bez textů (jen ID revizí a odkazy): {název: None, nebo {'title', 'revid', 'links'}}."""
+        pages = self.query('cs', titles, prop='revisions|langlinks', rvprop='ids', lllimit='max')
+        result = {}
+        for title, page in pages.items():
+            if page is None:
+                result[title] = None
+                continue
+            result[title] = {
+                'title': page['title'],
+                'revid': self.page_revid(page),
+                'links': {ll['lang']: ll['title'] for ll in page.get('langlinks', []) if ll['lang'] in target_langs},
+            }
+        return result
+
+    def fetch_revids(self, lang, titles):
+        """Aktuální revize článků na jedné wiki po dávkách 50: {název: revid, nebo None}."""
+        result = {}
+        titles = list(dict.fromkeys(titles))
+        for i in range(0, len(titles), BATCH_SIZE):
+            pages = self.query(lang, titles[i:i + BATCH_SIZE], prop='revisions', rvprop='ids')
+            for title, page in pages.items():
+                result[title] = self.page_revid(page) if page else None
+        return result
+
+
+def normalize_title(title):
+    """Název stránky tak, jak ho ukládá MediaWiki: mezery místo podtržítek, první písmeno velké, bez kotvy."""
+    title = title.split('#', 1)[0].replace('_', ' ').strip()
+    return title[:1].upper() + title[1:]
+
+
+class MultistreamDump:
+    """
+    Náhodný přístup k pages-articles-multistream.xml.bz2.
+    Index (offset:pageid:název) se jednou převede do SQLite vedle indexu; pro daný název se pak
+    načte a rozbalí jen jeden bz2 blok (~100 stránek), nikdy celý dump.
+    """
+
+    def __init__(self, dump_path, index_path=None, log=print):
+        self.dump_path = dump_path
+        self.index_path = index_path or dump_path.replace('-multistream.xml.bz2', '-multistream-index.txt.bz2')
+        self.log = log
+        self.lock = threading.Lock()  # Soubor i spojení sdílí vlákna pipeline
+        self.db = self._open_index(self.index_path + '.sqlite')
+        self.file = open(dump_path, 'rb')
+        self.blocks = OrderedDict()  # LRU {offset: {název: stránka}}
+
+    def _open_index(self, db_path):
+        if not os.path.exists(db_path):
+            self.log(f"Převádím index {os.path.basename(self.index_path)} do SQLite (jednorázově)...")
+            tmp_path = db_path + '.tmp'
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            db = sqlite3.connect(tmp_path)
+            db.execute("CREATE TABLE pages (title TEXT PRIMARY KEY, offset INTEGER NOT NULL) WITHOUT ROWID")
+            db.execute("CREATE TABLE blocks (offset INTEGER PRIMARY KEY)")
+
+            def rows():
+                with bz2.open(self.index_path, 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        offset, _, title = line.rstrip('\n').split(':', 2)
+                        yield title, int(offset)
+
+            batch = []
+            for row in rows():
+                batch.append(row)
+                if len(batch) >= 100000:
+                    db.executemany("INSERT OR IGNORE INTO pages VALUES (?, ?)", batch)
+                    batch = []
+            db.executemany("INSERT OR IGNORE INTO pages VALUES (?, ?)", batch)
+            db.execute("INSERT INTO blocks SELECT DISTINCT offset FROM pages")
+            db.commit()
+            db.close()
+            os.replace(tmp_path, db_path)
+        return sqlite3.connect(db_path, check_same_thread=False)
+
+    def _block(self, offset):
+        """Rozbalí jeden bz2 stream z dumpu a vrátí jeho stránky {název: stránka}."""
+        pages = self.blocks.get(offset)
+        if pages is not None:
+            self.blocks.move_to_end(offset)
+            return pages
+
+        row = self.db.execute("SELECT offset FROM blocks WHERE offset > ? ORDER BY offset LIMIT 1", (offset,)).fetchone()
+        self.file.seek(offset)
+        raw = self.file.read(row[0] - offset) if row else self.file.read()
+        data = bz2.BZ2Decompressor().decompress(raw)  # Končí na konci prvního streamu
+
+        pages = {}
+        for page in ET.fromstring(b"<pages>" + data + b"</pages>").iter('page'):
+            redirect = page.find('redirect')
+            pages[page.findtext('title')] = {
+                'title': page.findtext('title'),
+                'redirect': redirect.get('title') if redirect is not None else None,
+                'revid': int(page.findtext('revision/id') or 0),
+                'text': page.findtext('revision/text') or '',
+            }
+        self.blocks[offset] = pages
+        if len(self.blocks) > BLOCK_CACHE_SIZE:
+            self.blocks.popitem(last=False)
+        return pages
+
+    def page(self, title):
+        """Stránka přesně podle názvu (bez následování přesměrování), nebo None."""
+        title = normalize_title(title)
+        with self.lock:
+            row = self.db.execute("SELECT offset FROM pages WHERE title = ?", (title,)).fetchone()
+            return self._block(row[0]).get(title) if row else None
+
+    def resolve(self, title):
+        """Stránka po následování přesměrování, nebo None (neexistuje / přerušený řetězec)."""
+        page, seen = self.page(title), set()
+        while page and page['redirect'] and page['title'] not in seen and len(seen) < MAX_REDIRECTS:
+            seen.add(page['title'])
+            page = self.page(page['redirect'])
+        return None if page is None or page['redirect'] else page
+
+    def close(self):
+        self.file.close()
+        self.db.close()
+
+
+SQL_ROW_RE = re.compile(r"\((\d+),(\d+),'((?:[^'\\]|\\.)*)','((?:[^'\\]|\\.)*)'\)")
+SQL_ESCAPE_RE = re.compile(r"\\(.)")
+SQL_ESCAPES = {'n': '\n', 'r': '\r', 't': '\t', '0': '\0'}
+
+
+class SitelinkTable:
+    """
+    Lokální tabulka mezijazykových odkazů (QID, wiki, název) v SQLite,
+    postavená jednou z SQL dumpu wb_items_per_site pro potřebné wiki.
+    """
+
+    def __init__(self, sql_path, sites, db_path=None, log=print):
+        self.db_path = db_path or sql_path + '.sqlite'
+        self.log = log
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS sitelinks (site TEXT, title TEXT, item INTEGER, PRIMARY KEY (site, title)) WITHOUT ROWID")
+        self.db.execute("CREATE INDEX IF NOT EXISTS sitelinks_item ON sitelinks (item, site)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS loaded_sites (site TEXT PRIMARY KEY)")
+        loaded = {row[0] for row in self.db.execute("SELECT site FROM loaded_sites")}
+        missing = set(sites) - loaded
+        if missing:
+            self._load(sql_path, missing)
+
+    def _load(self, sql_path, sites):
+        self.log(f"Načítám sitelinky ({', '.join(sorted(sites))}) z {os.path.basename(sql_path)}...")
+        unescape = lambda s: SQL_ESCAPE_RE.sub(lambda m: SQL_ESCAPES.get(m.group(1), m.group(1)), s)
+        opener = gzip.open if sql_path.endswith('.gz') else open
+        batch = []
+        with opener(sql_path, 'rt', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if not line.startswith("INSERT INTO"):
+                    continue
+                for _, item_id, site, title in SQL_ROW_RE.findall(line):
+                    site = unescape(site)
+                    if site in sites:
+                        batch.append((site, unescape(title), int(item_id)))
+                if len(batch) >= 100000:
+                    self.db.executemany("INSERT OR REPLACE INTO sitelinks VALUES (?, ?, ?)", batch)
+                    batch = []
+        self.db.executemany("INSERT OR REPLACE INTO sitelinks VALUES (?, ?, ?)", batch)
+        self.db.executemany("INSERT OR IGNORE INTO loaded_sites VALUES (?)", [(s,) for s in sites])
+        self.db.commit()
+
+    def links(self, site, title, target_sites):
+        """(QID, {cílová wiki: název}) pro článek na wiki `site`; QID je None, pokud článek nemá položku."""
+        with self.lock:
+            row = self.db.execute("SELECT item FROM sitelinks WHERE site = ? AND title = ?", (site, title)).fetchone()
+            if not row:
+                return None, {}
+            marks = ','.join('?' * len(target_sites))
+            links = dict(self.db.execute(f"SELECT site, title FROM sitelinks WHERE item = ? AND site IN ({marks})",
+                                         (row[0], *target_sites)))
+        return f"Q{row[0]}", links
+
+    def close(self):
+        self.db.close()
+
+
+class DumpSource:
+    """
+    Offline náhrada BatchFetcher: texty a přesměrování z lokálních multistream dumpů,
+    mezijazykové odkazy z lokální tabulky sitelinků. Stejné rozhraní, žádná síť.
+    """
+
+    def __init__(self, dumps, sitelinks, log=print):
+        self.dumps = dumps  # {'cs': MultistreamDump, 'en': ...}
+        self.sitelinks = sitelinks
+        self.log = log
+
+    @classmethod
+    def from_directory(cls, folder, langs, log=print):
+        """Najde ve složce nejnovější {jazyk}wiki-*-pages-articles-multistream.xml.bz2 a dump wb_items_per_site."""
+        dumps = {}
+        for lang in langs:
+            found = sorted(glob.glob(os.path.join(folder, f"{lang}wiki-*-pages-articles-multistream.xml.bz2")))
+            if not found:
+                raise FileNotFoundError(f"Ve složce {folder} chybí dump {lang}wiki-*-pages-articles-multistream.xml.bz2")
+            dumps[lang] = MultistreamDump(found[-1], log=log)
+        found = sorted(glob.glob(os.path.join(folder, "*wb_items_per_site.sql*")))
+        found = [f for f in found if not f.endswith('.sqlite')]
+        if not found:
+            raise FileNotFoundError(f"Ve složce {folder} chybí dump wb_items_per_site.sql.gz")
+        sitelinks = SitelinkTable(found[-1], [f"{lang}wiki" for lang in langs], log=log)
+        return cls(dumps, sitelinks, log=log)
+
+    def fetch_source_batch(self, titles, target_langs):
+        result = {}
+        sites = {f"{lang}wiki": lang for lang in target_langs}
+        for title in titles:
+            page = self.dumps['cs'].resolve(title)
+            if page is None:
+                result[title] = None
+                continue
+            qid, links = self.sitelinks.links('cswiki', page['title'], list(sites))
+            result[title] = {
+                'title': page['title'],
+                'text': page['text'],
+                'revid': page['revid'],
+                'qid': qid,
+                'links': {sites[site]: linked for site, linked in links.items()},
+            }
+        return result
+
+    def fetch_texts(self, lang, titles):
+        result = {}
+        for title in dict.fromkeys(titles):
+            page = self.dumps[lang].resolve(title)
+            result[title] = page['text'] if page else None
+        return result
+
+    def fetch_source_revisions(self, titles, target_langs):
+        result = {}
+        for title, source in self.fetch_source_batch(titles, target_langs).items():
+            result[title] = source and {k: source[k] for k in ('title', 'revid', 'links')}
+        return result
+
+    def fetch_revids(self, lang, titles):
+        result = {}
+        for title in dict.fromkeys(titles):
+            page = self.dumps[lang].resolve(title)
+            result[title] = page['revid'] if page else None
+        return result
+
+    def close(self):
+        for dump in self.dumps.values():
+            dump.close()
+        self.sitelinks.close()
+
+
+class CheckState:
+    """
+    Výsledky minulých kontrol v SQLite: pro každý článek revize na všech wiki, hash nastavení
+    a výsledek. Článek, u kterého se nic z toho nezměnilo, se znovu nestahuje ani neporovnává.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self.db = sqlite3.connect(path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS results (
+            article TEXT PRIMARY KEY, revids TEXT, config TEXT, category TEXT, text TEXT, checked_at REAL)""")
+
+    @staticmethod
+    def revids_key(revids):
+        return json.dumps(revids, sort_keys=True)
+
+    def load(self, articles):
+        """{článek: (revids JSON, hash nastavení, kategorie, text)} pro články, které už byly kontrolovány."""
+        result = {}
+        articles = list(dict.fromkeys(articles))
+        for i in range(0, len(articles), 500):
+            chunk = articles[i:i + 500]
+            rows = self.db.execute(f"SELECT article, revids, config, category, text FROM results WHERE article IN ({','.join('?' * len(chunk))})", chunk)
+            for article, *rest in rows:
+                result[article] = tuple(rest)
+        return result
+
+    def store(self, rows):
+        """rows: [(článek, {wiki: revid}, hash nastavení, kategorie, text)]"""
+        now = time.time()
+        self.db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                            [(a, self.revids_key(r), c, cat, text, now) for a, r, c, cat, text in rows])
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+class ParseCache:
+    """
+    Rozparsované infoboxy (výsledek fast_infobox_params) podle ID revize, je-li známé, jinak podle
+    otisku obsahu. V paměti LRU, volitelně i na disku v SQLite jako zlib JSON, takže se nezměněná
+    stránka neparsuje podruhé ani při dalším spuštění.
+    """
+
+    MISSING = object()  # Rozlišuje "není v mezipaměti" od uloženého None (bez infoboxu)
+
+    def __init__(self, path=None, maxsize=PARSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # LRU {klíč: parametry nebo None}
+        self.lock = threading.Lock()  # Sdílí ji CS fáze i fáze cílových wiki
+        self.db = None
+        self.hits = self.misses = 0
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS infoboxes (key TEXT PRIMARY KEY, data BLOB)")
+
+    @staticmethod
+    def key(code, templates_to_find, lang=None, revid=None):
+        templates = hashlib.sha1('|'.join(templates_to_find).encode('utf-8')).hexdigest()[:8]
+        page = f"{lang}:{revid}" if lang and revid else hashlib.sha1(code.encode('utf-8')).hexdigest()
+        return f"{PARSE_CACHE_VERSION}:{templates}:{page}"
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            row = self.db.execute("SELECT data FROM infoboxes WHERE key = ?", (key,)).fetchone() if self.db else None
+            if row is None:
+                self.misses += 1
+                return self.MISSING
+            self.hits += 1
+            params = json.loads(zlib.decompress(row[0]))
+            self._remember(key, params)
+            return params
+
+    def put(self, key, params):
+        with self.lock:
+            self._remember(key, params)
+            if self.db:
+                data = zlib.compress(json.dumps(params, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                self.db.execute("INSERT OR REPLACE INTO infoboxes VALUES (?, ?)", (key, data))
+
+    def _remember(self, key, params):
+        self.entries[key] = params
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def commit(self):
+        """Zápis na disk po dávkách (volá check() po každé dávce), ne po každé stránce."""
+        if self.db:
+            with self.lock:
+                self.db.commit()
+
+    def close(self):
+        if self.db:
+            self.commit()
+            self.db.close()
+            self.db = None
+
+
+class ChemCheckEngine:
+    """
+    Kontrola bez GUI: normalizace a porovnání hodnot, extrakce infoboxů a pipeline stahování.
+    Výsledky, log a průběh předává zpětným voláním, takže ji sdílí Tk aplikace i příkazová řádka.
+    """
+    FETCH_FAILED = object()  # Výstup target_stage za dávku, kterou se z cílové wiki nepodařilo stáhnout
+
+    def __init__(self, log=print, on_result=None, on_progress=None, stop_event=None, parse_cache=None):
+        self.log = log
+        self.parse_cache = parse_cache if parse_cache is not None else ParseCache()
+        self.on_result = on_result or (lambda category, text, article: None)
+        self.on_progress = on_progress or (lambda value, text: None)
+        self.stop_event = stop_event or threading.Event()  # Zastavení zvenku (tlačítko, signál)
+        self.halt = threading.Event()  # Ukončení fází po doběhnutí jednoho check()
+
+    def output_result(self, category, text, article=""):
+        self.on_result(category, text, article)
+
+    def update_progress(self, value, text):
+        self.on_progress(value, text)
+
+    # --- Worker Thread ---
+    def get_infobox_params(self, code, templates_to_find, title="", lang=None, revid=None):
+        """Parametry hledaných infoboxů, nebo None; stejný text (revizi) parsuje jen jednou díky parse_cache."""
+        key = self.parse_cache.key(code, templates_to_find, lang, revid)
+        params = self.parse_cache.get(key)
+        if params is not ParseCache.MISSING:
+            return params
+        try:
+            params = fast_infobox_params(code, templates_to_find)
+        except Exception as e:
+            self.log(f"Chyba parsování {title}: {e}")
+            return None
+        self.parse_cache.put(key, params)
+        return params
+
+    def value_pairs(self, params_cs, params_by_lang, config):
+        """Dvojice hodnot k porovnání pro jeden článek: [(jazyk, popisek, hodnota CS, hodnota cíl, je ID?)]."""
+        pairs = []
+        for label, key_cs, ftype, _ in FIELDS_DEF:
+            conf = config.get(label)
+            if not conf or not conf['enabled']: continue
+
+            val_cs = params_cs.get(key_cs, "")
+            if not val_cs: continue
+
+            for lang, params in params_by_lang.items():
+                if not params: continue
+                val_target = ""
+                for k in LANG_PROFILES[lang]['fields'].get(label, []):
+                    if k in params:
+                        val_target = params[k]
+                        break
+                if val_target:
+                    pairs.append((lang, label, val_cs, val_target, ftype == 'id'))
+        return pairs
+
+    def compare_bulk(self, pairs, config):
+        """
+        Porovná všechny dvojice najednou; vrací tabulku nesrovnalostí {index dvojice: (CS, cíl)}.
+        Textová porovnání (Standardní režim, hodnoty bez čísel) jdou po jedné, čísla se sesbírají
+        do polí NumPy a tolerance, násobky 10 i převody teplot se vyhodnotí jedním průchodem.
+        """
+        mismatches = {}
+        first = ([], [], [], [], [])  # Super Agresivní: index, n1, n2, tolerance, smart
+        every = ([], [], [], [], [])  # Agresivní: index (za každé číslo), n1, n2, tolerance, smart
+        shown = {}  # Zobrazované hodnoty u numerických dvojic
+
+        for idx, (_, label, val_cs, val_target, is_id) in enumerate(pairs):
+            conf = config[label]
+            mode = conf['mode']
+            # Každá surová hodnota se rozebere jen jednou (normalize_value je LRU), tady se jen čte
+            norm_cs, norm_target = normalize_value(val_cs), normalize_value(val_target)
+            if mode == "Standardní":
+                s_cs, s_target = (norm_cs.ident, norm_target.ident) if is_id else (norm_cs.text, norm_target.text)
+                if s_cs != s_target:
+                    mismatches[idx] = (s_cs, s_target)
+                continue
+
+            nums_cs = list(norm_cs.numbers)
+            nums_target = list(norm_target.numbers)
+            if not nums_cs or not nums_target:
+                s_cs = " ".join(map(str, nums_cs))
+                s_tg = " ".join(map(str, nums_target))
+                if s_cs != s_tg:
+                    mismatches[idx] = (s_cs, s_tg)
+                continue
+
+            if mode == "Super Agresivní (první číslo)":
+                target, values = first, [(nums_cs[0], nums_target[0])]
+                shown[idx] = (str(nums_cs[0]), str(nums_target[0]))
+            elif mode == "Agresivní (jen čísla)":
+                shown[idx] = (str(nums_cs), str(nums_target))
+                if len(nums_cs) != len(nums_target):
+                    mismatches[idx] = shown[idx]
+                    continue
+                target, values = every, list(zip(nums_cs, nums_target))
+            else:
+                mismatches[idx] = (val_cs, val_target)
+                continue
+
+            for n1, n2 in values:
+                target[0].append(idx)
+                target[1].append(n1)
+                target[2].append(n2)
+                target[3].append(conf['tolerance'])
+                target[4].append(conf['smart'])
+
+        for owners, n1, n2, tol, smart in (first, every):
+            if not owners: continue
+            n1, n2, tol, smart = np.array(n1), np.array(n2), np.array(tol), np.array(smart, dtype=bool)
+            match = np.abs(n1 - n2) <= tol
+            retry = ~match & smart
+            if retry.any():
+                match[retry] = smart_match_array(n1[retry], n2[retry], tol[retry])
+            # Dvojice je v pořádku, jen pokud sedí všechna její čísla
+            owners = np.array(owners)
+            for idx in np.unique(owners[~match]).tolist():
+                mismatches[idx] = shown[idx]
+
+        return mismatches
+
+    def compare_articles(self, articles, config):
+        """
+        Porovná CS infoboxy s cizojazyčnými pro celou dávku článků.
+        articles: [(název, params_cs, params_by_lang, titles_by_lang)]; vrací [(kategorie, text výsledku)].
+        """
+        pairs, owners = [], []
+        for pos, (_, params_cs, params_by_lang, _) in enumerate(articles):
+            article_pairs = self.value_pairs(params_cs, params_by_lang, config)
+            pairs.extend(article_pairs)
+            owners.extend([pos] * len(article_pairs))
+
+        discrepancies = [[] for _ in articles]
+        mismatches = self.compare_bulk(pairs, config)
+        for idx in sorted(mismatches):
+            lang, label = pairs[idx][0], pairs[idx][1]
+            s_cs, s_target = mismatches[idx]
+            code = lang.upper()
+            discrepancies[owners[idx]].append(f"{code} {label}: CS('{s_cs}') vs {code}('{s_target}')")
+
+        results = []
+        for (article_name, _, _, titles_by_lang), lines in zip(articles, discrepancies):
+            links = ", ".join(f"{lang.upper()}: {title}" for lang, title in titles_by_lang.items())
+            header = f"Článek: [[{article_name}]] ({links})"
+            if lines:
+                results.append(("error", header + "\n" + "\n".join(lines)))
+            else:
+                results.append(("ok", header + " -> OK"))
+        return results
+
+    # --- Pipeline ---
+    def _stopped(self):
+        return self.stop_event.is_set() or self.halt.is_set()
+
+    def _put(self, q, item):
+        """Vloží položku do omezené fronty; při zastavení to vzdá a vrátí False."""
+        while not self._stopped():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        """Vyzvedne položku z fronty; při zastavení vrací None (stejně jako konec proudu)."""
+        while not self._stopped():
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return None
+
+    def source_stage(self, fetcher, article_list, target_langs, out_queues):
+        """
+        Fáze CS: po dávkách stáhne zdrojové články a rozparsuje CS infoboxy.
+        Stejnou dávku pošle do fronty každé cílové wiki i do porovnávací fáze.
+        """
+        try:
+            for start in range(0, len(article_list), BATCH_SIZE):
+                if self._stopped(): break
+                batch = article_list[start:start + BATCH_SIZE]
+                try:
+                    sources = fetcher.fetch_source_batch(batch, target_langs)
+                except Exception as e:
+                    self.log(f"Chyba API u dávky od '{batch[0]}': {e}")
+                    sources = None
+
+                item = {'start': start, 'batch': batch, 'failed': sources is None, 'missing': [], 'params_cs': {}, 'links': {}}
+                for article_name in batch if sources is not None else []:
+                    source = sources.get(article_name)
+                    if source is None:
+                        item['missing'].append((article_name, f"{article_name}: Neexistuje na CS."))
+                        continue
+                    params_cs = self.get_infobox_params(source['text'], CS_TEMPLATES, source['title'], 'cs', source.get('revid'))
+                    if not params_cs:
+                        item['missing'].append((article_name, f"{article_name}: Bez infoboxu."))
+                        continue
+                    item['params_cs'][article_name] = params_cs
+                    item['links'][article_name] = source['links']
+
+                if not all(self._put(q, item) for q in out_queues): break
+        finally:
+            for q in out_queues:
+                self._put(q, None)
+
+    def target_stage(self, fetcher, lang, in_queue, out_queue):
+        """Fáze jedné cílové wiki: texty propojených článků dávky a jejich infoboxy."""
+        templates = LANG_PROFILES[lang]['templates']
+        try:
+            while True:
+                item = self._get(in_queue)
+                if item is None: break
+                links = {a: l[lang] for a, l in item['links'].items() if lang in l}
+                try:
+                    texts = fetcher.fetch_texts(lang, list(links.values())) if links else {}
+                except Exception as e:
+                    # Ne prázdné texty: články by se jinak ohlásily (a uložily) jako bez infoboxu
+                    self.log(f"Chyba API ({lang}) u dávky od '{item['batch'][0]}': {e}")
+                    if not self._put(out_queue, self.FETCH_FAILED): break
+                    continue
+                params = {}
+                for article_name, title in links.items():
+                    text = texts.get(title)
+                    params[article_name] = self.get_infobox_params(text, templates, title) if text else None
+                if not self._put(out_queue, params): break
+        finally:
+            self._put(out_queue, None)
+
+    def config_hash(self, config, target_langs):
+        """Otisk všeho, co ovlivňuje výsledek porovnání (nastavení polí, jazyky, klíče šablon)."""
+        key = json.dumps({
+            'config': config,
+            'fields': FIELDS_DEF,
+            'langs': {lang: LANG_PROFILES[lang] for lang in target_langs},
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def current_revisions(self, fetcher, article_list, target_langs):
+        """
+        {článek: {'cs': revid, 'en': revid, ...}} jen z ID revizí (bez textů).
+        CS po dávkách, cílové wiki pak souběžně; None = článek/odkaz neexistuje.
+        """
+        revisions, links = {}, {}
+        for start in range(0, len(article_list), BATCH_SIZE):
+            if self.stop_event.is_set(): return None
+            batch = article_list[start:start + BATCH_SIZE]
+            self.update_progress(0, f"Zjišťuji revize {start + 1}-{start + len(batch)} z {len(article_list)}")
+            for title, page in fetcher.fetch_source_revisions(batch, target_langs).items():
+                revisions[title] = {'cs': page['revid'] if page else None}
+                links[title] = page['links'] if page else {}
+
+        with ThreadPoolExecutor(max_workers=len(target_langs)) as pool:
+            futures = {lang: pool.submit(fetcher.fetch_revids, lang, [l[lang] for l in links.values() if lang in l])
+                       for lang in target_langs}
+            for lang, future in futures.items():
+                revids = future.result()
+                for title, article_links in links.items():
+                    revisions[title][lang] = revids.get(article_links[lang]) if lang in article_links else None
+        return revisions
+
+    def check(self, article_list, config, target_langs, fetcher, state=None):
+        """
+        Zkontroluje články a výsledky předává on_result po dávkách v pořadí vstupu
+        (s inkrementálním stavem jdou napřed nezměněné články z uložených výsledků).
+        Vrací True, pokud kontrola doběhla celá, False po zastavení přes stop_event.
+        """
+        self.halt.clear()
+        # Inkrementální režim: stáhnout jen ID revizí a znovu kontrolovat jen to, co se změnilo
+        revisions = {}
+        if state:
+            config_hash = self.config_hash(config, target_langs)
+            revisions = self.current_revisions(fetcher, article_list, target_langs)
+            if revisions is None:
+                return False
+            stored = state.load(article_list)
+            changed = []
+            for article_name in article_list:
+                record = stored.get(article_name)
+                if record and record[0] == state.revids_key(revisions[article_name]) and record[1] == config_hash:
+                    self.output_result(record[2], record[3], article_name)
+                else:
+                    changed.append(article_name)
+            self.log(f"Beze změny od minulé kontroly: {len(article_list) - len(changed)}, ke kontrole: {len(changed)}")
+            article_list = changed
+        total = len(article_list)
+
+        # CS fáze plní frontu každé cílové wiki a frontu porovnání; cílové wiki běží souběžně.
+        # Fronty jsou omezené, takže rychlá fáze předběhne pomalou nejvýše o QUEUE_SIZE dávek.
+        source_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        lang_in = {lang: queue.Queue(maxsize=QUEUE_SIZE) for lang in target_langs}
+        lang_out = {lang: queue.Queue(maxsize=QUEUE_SIZE) for lang in target_langs}
+        threads = [threading.Thread(target=self.source_stage,
+                                    args=(fetcher, article_list, target_langs, [source_queue, *lang_in.values()]),
+                                    daemon=True)]
+        threads += [threading.Thread(target=self.target_stage, args=(fetcher, lang, lang_in[lang], lang_out[lang]), daemon=True)
+                    for lang in target_langs]
+        for t in threads:
+            t.start()
+
+        # Porovnání: všechny fáze zpracovávají dávky ve stejném pořadí, výsledky tedy párujeme podle pořadí
+        processed = 0
+        try:
+            while True:
+                item = self._get(source_queue)
+                if item is None: break
+                params_by_target = {lang: self._get(lang_out[lang]) for lang in target_langs}
+                if any(p is None for p in params_by_target.values()): break
+
+                start, batch = item['start'], item['batch']
+                self.update_progress(((start + len(batch)) / total) * 100, f"Zpracovány články {start + 1}-{start + len(batch)} z {total}")
+                if item['failed']:
+                    for article_name in batch:
+                        self.output_result("failed", f"{article_name}: Chyba API, nezkontrolováno.", article_name)
+                    processed += len(batch)
+                    continue
+                for article_name, text in item['missing']:
+                    self.output_result("missing", text, article_name)
+
+                failed_langs = [lang for lang, params in params_by_target.items() if params is self.FETCH_FAILED]
+                results, failed = {}, {}
+                to_compare = []
+                for article_name, params_cs in item['params_cs'].items():
+                    links = item['links'][article_name]
+                    unfetched = [lang for lang in failed_langs if lang in links]
+                    if unfetched:
+                        # Nezkontrolováno - neukládá se do stavu, příští běh to zkusí znovu
+                        failed[article_name] = ("failed", f"{article_name}: Chyba API ({'/'.join(l.upper() for l in unfetched)}), nezkontrolováno.")
+                        continue
+                    params_by_lang = {lang: None if lang in failed_langs else params_by_target[lang].get(article_name)
+                                      for lang in target_langs}
+                    titles_by_lang = {lang: links.get(lang, "N/A") for lang in target_langs}
+
+                    if not any(params_by_lang.values()):
+                        results[article_name] = ("missing", f"{article_name}: Chybí infoboxy ({'/'.join(l.upper() for l in target_langs)}).")
+                        continue
+                    to_compare.append((article_name, params_cs, params_by_lang, titles_by_lang))
+
+                # Celá dávka se porovná jedním vektorovým průchodem, výstup zůstává v pořadí vstupu
+                results.update(zip([a[0] for a in to_compare], self.compare_articles(to_compare, config)))
+                for article_name in item['params_cs']:
+                    self.output_result(*(failed.get(article_name) or results[article_name]), article_name)
+                processed += len(batch)
+
+                if state:
+                    results.update((a, ("missing", text)) for a, text in item['missing'])
+                    state.store([(a, revisions[a], config_hash, *result) for a, result in results.items()])
+                self.parse_cache.commit()
+        finally:
+            self.halt.set()  # Uvolní fáze čekající na plnou frontu (po předčasném konci)
+            for t in threads:
+                t.join()
+            self.parse_cache.commit()
+        return processed == total and not self.stop_event.is_set()
+
+
+def open_fetcher(target_langs, dump_dir=None, log=print):
+    """Zdroj článků: lokální dumpy (DumpSource), nebo živé wiki přes pywikibot (BatchFetcher)."""
+    if dump_dir:
+        log(f"Otevírám dumpy ve složce {dump_dir}...")
+        return DumpSource.from_directory(dump_dir, ('cs', *target_langs), log=log)
+    log("Připojuji se k Wikipedii...")
+    sites = {lang: pywikibot.Site(lang, 'wikipedia') for lang in ('cs', *target_langs)}
+    return BatchFetcher(sites, log=log)
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Tabulka výsledků nad ttk.Treeview, která v Treeview drží jen právě viditelné řádky.
+    Záznamy jsou n-tice (článek, počet nesrovnalostí, detail, plný text); řazení kliknutím
+    na hlavičku, filtr podřetězcem, plný text vybraného záznamu se ukáže pod tabulkou.
+    """
+    columns = (("article", "Článek", 260), ("count", "Počet", 60), ("detail", "Detail", 700))
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.records = []  # Všechny záznamy v pořadí příchodu
+        self.view = []  # Indexy záznamů po filtru a řazení
+        self.offset = 0
+        self.visible = 20
+        self.sort_column, self.sort_reverse = None, False
+        self.dirty = False
+
+        bar = ttk.Frame(self)
+        bar.pack(fill="x", pady=(2, 2))
+        ttk.Label(bar, text="Filtr:").pack(side="left")
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *_: self.refresh())
+        ttk.Entry(bar, textvariable=self.filter_var, width=40).pack(side="left", padx=5)
+        self.count_lbl = ttk.Label(bar, text="")
+        self.count_lbl.pack(side="right", padx=5)
+
+        body = ttk.Frame(self)
+        body.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(body, columns=[c[0] for c in self.columns], show="headings", selectmode="browse")
+        for idx, (key, title, width) in enumerate(self.columns):
+            self.tree.heading(key, text=title, command=lambda i=idx: self.sort_by(i))
+            self.tree.column(key, width=width, stretch=(key == "detail"))
+        self.scroll = ttk.Scrollbar(body, orient="vertical", command=self.on_scroll)
+        self.scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_by(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(1, "units"))
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+        self.detail = scrolledtext.ScrolledText(self, height=5)
+        self.detail.pack(fill="x")
+
+    # --- Data ---
+    def clear(self):
+        self.records, self.view, self.offset, self.dirty = [], [], 0, False
+        self.render()
+
+    def extend(self, records):
+        """Přidá záznamy; bez řazení a filtru stačí rozšířit pohled, jinak se přepočítá při refresh()."""
+        start = len(self.records)
+        self.records.extend(records)
+        if self.sort_column is None and not self.filter_var.get():
+            self.view.extend(range(start, len(self.records)))
+        else:
+            self.dirty = True
+
+    def refresh(self):
+        """Znovu použije filtr a řazení na všechny záznamy (volá se nejvýše po COUNTER_INTERVAL)."""
+        needle = self.filter_var.get().strip().lower()
+        view = [i for i, r in enumerate(self.records) if not needle or needle in r[0].lower() or needle in r[2].lower()]
+        if self.sort_column is not None:
+            view.sort(key=lambda i: self.records[i][self.sort_column], reverse=self.sort_reverse)
+        self.view, self.dirty = view, False
+        self.offset = min(self.offset, max(0, len(view) - self.visible))
+        self.render()
+
+    def sort_by(self, column):
+        self.sort_reverse = not self.sort_reverse if self.sort_column == column else False
+        self.sort_column = column
+        self.refresh()
+
+    # --- Vykreslení ---
+    def render(self):
+        self.tree.delete(*self.tree.get_children())
+        for i in self.view[self.offset:self.offset + self.visible]:
+            article, count, detail, _ = self.records[i]
+            self.tree.insert("", tk.END, iid=str(i), values=(article, count or "", detail))
+        total = len(self.view)
+        if total:
+            self.scroll.set(self.offset / total, min(1.0, (self.offset + self.visible) / total))
+        else:
+            self.scroll.set(0.0, 1.0)
+        self.count_lbl.config(text=f"{total} / {len(self.records)}")
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), len(self.view) - self.visible))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def scroll_by(self, amount, what):
+        self.scroll_to(self.offset + amount * (self.visible if what == "pages" else 1))
+
+    def on_scroll(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(float(args[0]) * len(self.view))
+        else:
+            self.scroll_by(int(args[0]), args[1])
+
+    def on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        visible = max(1, (event.height - row_height) // row_height)  # Bez řádku s hlavičkou
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def on_select(self, _event):
+        selected = self.tree.selection()
+        if selected:
+            self.detail.delete("1.0", tk.END)
+            self.detail.insert(tk.END, self.records[int(selected[0])][3])
+
 
 class WikiChemApp:
     def __init__(self, root):
         self.root = root
-        self.root.title("Wiki Chem Checker (CS vs EN/DE)")
+        self.root.title("Wiki Chem Checker (CS vs cizojazyčné wiki)")
         self.root.geometry("1300x850") # Mírně rozšířeno pro nový sloupec
 
         # Nastavení fronty pro komunikaci mezi vlákny
         self.msg_queue = queue.Queue()
         
-        # Definice polí
-        # Struktura: (Label, CS klíč, EN klíče, DE klíče, Typ ID/Text, Default SmartUnits?)
-        self.fields_def = [
-            ('CAS', 'číslo CAS', ['CASNo', 'CAS-No', 'CASNo1', 'CASNoOther', 'CASNo2'], ['CAS'], 'id', False),
-            ('EINECS', 'číslo EINECS', ['EINECS', 'EC_number', 'EC-no'], ['EG-Nummer'], 'id', False),
-            ('PubChem', 'PubChem', ['PubChem'], ['PubChem'], 'id', False),
-            ('Molární hmotnost', 'molární hmotnost', ['MolarMass'], ['Molare Masse'], 'text', False),
-            ('Rozpustnost', 'rozpustnost', ['Solubility'], ['Löslichkeit'], 'text', True), # Často g/l vs g/100ml
-            ('Teplota tání', 'teplota tání', ['MeltingPt', 'MeltingPtC'], ['Schmelzpunkt'], 'text', True),
-            ('Teplota varu', 'teplota varu', ['BoilingPt', 'BoilingPtC'], ['Siedepunkt'], 'text', True),
-            ('Hustota', 'hustota', ['Density'], ['Dichte'], 'text', True), # Často g/cm3 vs kg/m3
-        ]
-        
         # Statistiky pro počítadla
-        self.stats = {'error': 0, 'ok': 0, 'missing': 0}
+        self.stats = {'error': 0, 'ok': 0, 'missing': 0, 'failed': 0}
         self.field_config = {} 
+        self.parse_cache = ParseCache()  # Přes všechna spuštění v okně: opakovaná kontrola neparsuje znovu
 
         # -- GUI Prvky --
         
@@ -45,7 +1289,7 @@ class WikiChemApp:
             ttk.Label(config_frame, text=text, font=('bold')).grid(row=0, column=col, padx=5, pady=2, sticky="w")
 
         # Generování řádků
-        for idx, (label, _, _, _, ftype, def_smart) in enumerate(self.fields_def):
+        for idx, (label, _, ftype, def_smart) in enumerate(FIELDS_DEF):
             row = idx + 1
             
             ttk.Label(config_frame, text=label).grid(row=row, column=0, padx=10, sticky="w")
@@ -56,7 +1300,7 @@ class WikiChemApp:
             
             # Mode Combobox
             mode_var = tk.StringVar()
-            values = ["Standardní", "Agresivní (jen čísla)", "Super Agresivní (první číslo)"]
+            values = COMPARE_MODES
             if ftype == 'id':
                 mode_var.set("Standardní") 
             else:
@@ -86,6 +1330,27 @@ class WikiChemApp:
         input_frame.pack(fill="x", padx=10, pady=5)
         self.input_text = scrolledtext.ScrolledText(input_frame, height=6)
         self.input_text.pack(fill="both", padx=5, pady=5)
+
+        # Cílové wiki (každá běží ve vlastní fázi pipeline, takže další jazyk nepřidává čas navíc)
+        langs_frame = ttk.Frame(input_frame)
+        langs_frame.pack(fill="x", padx=5, pady=(0, 5))
+        ttk.Label(langs_frame, text="Porovnat s:").pack(side="left")
+        self.lang_vars = {}
+        for lang in LANG_PROFILES:
+            var = tk.BooleanVar(value=lang in DEFAULT_LANGS)
+            ttk.Checkbutton(langs_frame, text=lang.upper(), variable=var).pack(side="left", padx=5)
+            self.lang_vars[lang] = var
+
+        # Offline režim: lokální multistream dumpy + dump wb_items_per_site místo živých wiki
+        offline_frame = ttk.Frame(input_frame)
+        offline_frame.pack(fill="x", padx=5, pady=(0, 5))
+        self.offline_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(offline_frame, text="Offline z dumpů, složka:", variable=self.offline_var).pack(side="left")
+        self.dump_dir_var = tk.StringVar()
+        ttk.Entry(offline_frame, textvariable=self.dump_dir_var, width=60).pack(side="left", padx=5)
+        ttk.Button(offline_frame, text="Vybrat...", command=self.choose_dump_dir).pack(side="left")
+        self.incremental_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(offline_frame, text="Přeskočit články beze změny (podle revizí)", variable=self.incremental_var).pack(side="left", padx=15)
         
         # 3. Ovládání
         ctrl_frame = ttk.Frame(root)
@@ -106,20 +1371,17 @@ class WikiChemApp:
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill="both", expand=True, padx=10, pady=10)
         
-        self.tab_errors = ttk.Frame(self.notebook)
+        # Výsledky v tabulkách, které vykreslují jen viditelné řádky (i pro desítky tisíc článků)
+        self.tab_errors = VirtualTable(self.notebook)
         self.notebook.add(self.tab_errors, text="⚠️ Nesrovnalosti (0)")
-        self.txt_errors = scrolledtext.ScrolledText(self.tab_errors)
-        self.txt_errors.pack(fill="both", expand=True)
-        
-        self.tab_ok = ttk.Frame(self.notebook)
+        self.tab_ok = VirtualTable(self.notebook)
         self.notebook.add(self.tab_ok, text="✅ V pořádku (0)")
-        self.txt_ok = scrolledtext.ScrolledText(self.tab_ok)
-        self.txt_ok.pack(fill="both", expand=True)
-        
-        self.tab_missing = ttk.Frame(self.notebook)
+        self.tab_missing = VirtualTable(self.notebook)
         self.notebook.add(self.tab_missing, text="❓ Chybějící (0)")
-        self.txt_missing = scrolledtext.ScrolledText(self.tab_missing)
-        self.txt_missing.pack(fill="both", expand=True)
+        self.tab_failed = VirtualTable(self.notebook)  # Chyby stahování - články zůstaly nezkontrolované
+        self.notebook.add(self.tab_failed, text="❌ Selhalo (0)")
+        self.tables = {'error': self.tab_errors, 'ok': self.tab_ok, 'missing': self.tab_missing, 'failed': self.tab_failed}
+        self.last_counter_update = 0.0
 
         self.tab_log = ttk.Frame(self.notebook)
         self.notebook.add(self.tab_log, text="Log")
@@ -134,51 +1396,91 @@ class WikiChemApp:
     def log(self, message):
         self.msg_queue.put(("log", message))
 
-    def output_result(self, category, text):
-        self.msg_queue.put(("result", (category, text)))
+    def output_result(self, category, text, article=""):
+        self.msg_queue.put(("result", (category, article, text)))
 
     def update_progress(self, value, text):
         self.msg_queue.put(("progress", (value, text)))
 
     def update_tabs_counter(self):
+        self.last_counter_update = time.monotonic()
         self.notebook.tab(self.tab_errors, text=f"⚠️ Nesrovnalosti ({self.stats['error']})")
         self.notebook.tab(self.tab_ok, text=f"✅ V pořádku ({self.stats['ok']})")
         self.notebook.tab(self.tab_missing, text=f"❓ Chybějící ({self.stats['missing']})")
+        self.notebook.tab(self.tab_failed, text=f"❌ Selhalo ({self.stats['failed']})")
+        for table in self.tables.values():
+            if table.dirty:
+                table.refresh()
+            else:
+                table.render()
+
+    @staticmethod
+    def result_record(category, article, text):
+        """Kompaktní záznam pro tabulku: (článek, počet nesrovnalostí, detail na jeden řádek, plný text)."""
+        lines = text.split("\n")
+        if category == "error":
+            return (article, len(lines) - 1, "; ".join(lines[1:])[:300], text)
+        if category == "ok":
+            header = lines[0].removesuffix(" -> OK")
+            start = header.find("]] (")
+            return (article, 0, header[start + 4:-1] if start >= 0 else header, text)
+        prefix = article + ": "
+        return (article, 0, text[len(prefix):] if text.startswith(prefix) else text, text)
 
     def process_queue(self):
+        """
+        Vybírá frontu po dávkách omezených časem (QUEUE_TIME_BUDGET), aby hlavní smyčka Tk
+        zůstala průchozí; výsledky přidá do tabulek najednou a počítadla obnoví nejvýše
+        jednou za COUNTER_INTERVAL.
+        """
+        deadline = time.monotonic() + QUEUE_TIME_BUDGET
+        new_records = {category: [] for category in self.tables}
+        log_lines = []
+        done = False
         try:
-            while True:
+            while time.monotonic() < deadline:
                 msg_type, data = self.msg_queue.get_nowait()
                 if msg_type == "log":
-                    self.txt_log.config(state='normal')
-                    self.txt_log.insert(tk.END, data + "\n")
-                    self.txt_log.see(tk.END)
-                    self.txt_log.config(state='disabled')
+                    log_lines.append(data)
                 elif msg_type == "progress":
                     val, txt = data
                     self.progress_var.set(val)
                     self.status_lbl.config(text=txt)
                 elif msg_type == "result":
-                    category, text = data
-                    # Update text
-                    target = self.txt_errors if category == "error" else (self.txt_ok if category == "ok" else self.txt_missing)
-                    target.insert(tk.END, text + "\n")
-                    if category == "error": target.insert(tk.END, "-"*40 + "\n")
-                    
-                    # Update counters
-                    if category in self.stats:
+                    category, article, text = data
+                    if category in new_records:
+                        new_records[category].append(self.result_record(category, article, text))
                         self.stats[category] += 1
-                        self.update_tabs_counter()
-                        
                 elif msg_type == "done":
-                    self.is_running = False
-                    self.btn_start.config(state="normal")
-                    self.btn_stop.config(state="disabled")
-                    messagebox.showinfo("Hotovo", f"Dokončeno.\nChyby: {self.stats['error']}\nOK: {self.stats['ok']}\nChybějící: {self.stats['missing']}")
+                    done = True
                 self.msg_queue.task_done()
         except queue.Empty:
             pass
-        self.root.after(100, self.process_queue)
+
+        if log_lines:
+            self.txt_log.config(state='normal')
+            self.txt_log.insert(tk.END, "\n".join(log_lines) + "\n")
+            self.txt_log.see(tk.END)
+            self.txt_log.config(state='disabled')
+        for category, records in new_records.items():
+            if records:
+                self.tables[category].extend(records)
+        if done or time.monotonic() - self.last_counter_update >= COUNTER_INTERVAL:
+            self.update_tabs_counter()
+
+        if done:
+            self.is_running = False
+            self.btn_start.config(state="normal")
+            self.btn_stop.config(state="disabled")
+            messagebox.showinfo("Hotovo", f"Dokončeno.\nChyby: {self.stats['error']}\nOK: {self.stats['ok']}\nChybějící: {self.stats['missing']}\nSelhalo: {self.stats['failed']}")
+        # Plná fronta se vybírá hned znovu, prázdná se kontroluje jednou za 100 ms
+        self.root.after(1 if not self.msg_queue.empty() else 100, self.process_queue)
+
+    def choose_dump_dir(self):
+        folder = filedialog.askdirectory(title="Složka s dumpy")
+        if folder:
+            self.dump_dir_var.set(folder)
+            self.offline_var.set(True)
 
     def start_check_thread(self):
         articles_raw = self.input_text.get("1.0", tk.END).strip()
@@ -187,13 +1489,20 @@ class WikiChemApp:
             return
         
         article_list = [line.strip() for line in articles_raw.split('\n') if line.strip()]
+        target_langs = [lang for lang, var in self.lang_vars.items() if var.get()]
+        if not target_langs:
+            messagebox.showwarning("Chyba", "Vyberte alespoň jednu cílovou wiki.")
+            return
+        dump_dir = self.dump_dir_var.get().strip() if self.offline_var.get() else None
+        if self.offline_var.get() and not os.path.isdir(dump_dir):
+            messagebox.showwarning("Chyba", "Zadejte existující složku s dumpy.")
+            return
         
         # Reset GUI
-        self.stats = {'error': 0, 'ok': 0, 'missing': 0}
+        self.stats = {'error': 0, 'ok': 0, 'missing': 0, 'failed': 0}
+        for table in self.tables.values():
+            table.clear()
         self.update_tabs_counter()
-        self.txt_errors.delete("1.0", tk.END)
-        self.txt_ok.delete("1.0", tk.END)
-        self.txt_missing.delete("1.0", tk.END)
         self.txt_log.config(state='normal')
         self.txt_log.delete("1.0", tk.END)
         self.txt_log.config(state='disabled')
@@ -217,251 +1526,238 @@ class WikiChemApp:
         self.btn_start.config(state="disabled")
         self.btn_stop.config(state="normal")
         
-        threading.Thread(target=self.run_check, args=(article_list, current_config), daemon=True).start()
+        threading.Thread(target=self.run_check, args=(article_list, current_config, target_langs, dump_dir, self.incremental_var.get()), daemon=True).start()
+
+    def run_check(self, article_list, config, target_langs=DEFAULT_LANGS, dump_dir=None, incremental=False):
+        engine = ChemCheckEngine(log=self.log, on_result=self.output_result, on_progress=self.update_progress,
+                                 stop_event=self.stop_event, parse_cache=self.parse_cache)
+        fetcher = None
+        state = None
+        try:
+            fetcher = open_fetcher(target_langs, dump_dir, log=self.log)
+            state = CheckState() if incremental else None
+            engine.check(article_list, config, target_langs, fetcher, state)
+            self.update_progress(100, "Hotovo")
+        except Exception as e:
+            self.log(f"Error: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            if isinstance(fetcher, DumpSource):
+                fetcher.close()
+            if state:
+                state.close()
+            self.msg_queue.put(("done", None))
 
     def stop_check(self):
         if self.is_running:
             self.stop_event.set()
             self.log("!!! Požadováno zastavení...")
 
-    # --- Logika Normalizace a Porovnání ---
-
-    def clean_wiki_markup(self, text):
-        if not text: return ""
-        s = str(text)
-        s = re.sub(r'<ref.*?>.*?</ref>', '', s, flags=re.DOTALL)
-        s = re.sub(r'<ref[^>]*/>', '', s)
-        s = re.sub(r'<!--.*?-->', '', s, flags=re.DOTALL)
-        s = re.sub(r'\{\{val\|([0-9.,]+)(?:\|.*?)?\}\}', r'\1', s, flags=re.IGNORECASE)
-        return s.strip()
-
-    def extract_floats(self, text):
-        s = self.clean_wiki_markup(text)
-        s = s.replace(',', '.')
-        matches = re.findall(r'-?\d+\.?\d*', s)
-        nums = []
-        for m in matches:
-            try:
-                val = float(m)
-                nums.append(val)
-            except ValueError: pass
-        return nums
-
-    def normalize_standard(self, text_str, is_id=False):
-        s = self.clean_wiki_markup(text_str)
-        if is_id:
-            match = re.search(r'\b(\d{2,7}-\d{2,3}-\d)\b', s)
-            if match: return match.group(1)
-            return re.sub(r'[^\d-]', '', s).strip()
+# --- Příkazová řádka ---
+def load_run_config(path):
+    """
+    Nastavení z JSON souboru: {"langs": ["en", "de"], "fields": {"CAS": {"mode": "Standardní", ...}}}.
+    Chybějící pole a klíče mají výchozí hodnoty GUI; vrací (nastavení polí, jazyky nebo None).
+    """
+    config = default_field_config()
+    if not path:
+        return config, None
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    for label, overrides in data.get('fields', {}).items():
+        if label not in config:
+            raise ValueError(f"Neznámé pole v nastavení: {label}")
+        config[label].update(overrides)
+        if config[label]['mode'] not in COMPARE_MODES:
+            raise ValueError(f"Neznámý režim porovnání u pole {label}: {config[label]['mode']}")
+    return config, data.get('langs')
+
+
+def iter_article_titles(args):
+    """Názvy článků ze souboru (jeden na řádek), nebo z kategorie - proudově, bez držení objektů Page."""
+    if args.articles:
+        with open(args.articles, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+    else:
+        category = pywikibot.Category(pywikibot.Site('cs', 'wikipedia'), args.category)
+        for page in category.articles(namespaces=0, recurse=args.recurse):
+            yield page.title()
+
+
+def result_row(category, text, article):
+    """Záznam výstupu: stav, souhrnný řádek a jednotlivé nesrovnalosti."""
+    lines = text.split("\n")
+    return {'article': article, 'status': category, 'summary': lines[0], 'discrepancies': lines[1:]}
+
+
+class ResultWriter:
+    """
+    Výstup JSONL/CSV do souboru po záznamech. offset() je délka zapsaných dat v bajtech,
+    na kterou se výstup při obnovení z checkpointu zkrátí (chybí-li soubor, založí se nový).
+    """
+    csv_fields = ('article', 'status', 'summary', 'discrepancies')
+
+    def __init__(self, path, fmt, resume_offset=None):
+        self.fmt = fmt
+        if resume_offset is None or not os.path.exists(path):
+            self.file = open(path, 'wb')
+            if fmt == 'csv':
+                self._write_csv(self.csv_fields)
         else:
-            s = s.replace('&nbsp;', ' ').replace('\xa0', ' ')
-            return ' '.join(s.split())
+            self.file = open(path, 'r+b')
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
 
-    def check_smart_match(self, n1, n2, tolerance):
-        """
-        Pokusí se najít shodu pomocí převodu jednotek.
-        Vrací True, pokud se podaří najít shodu.
-        """
-        # 1. Základní tolerance (už bylo zkontrolováno v main funkci, ale pro jistotu)
-        if abs(n1 - n2) <= tolerance: return True
-        
-        # 2. Násobky 10 (Hustota: g/cm3 vs kg/m3, Rozpustnost: g/L vs g/100ml)
-        # Kontrolujeme faktory 10, 100, 1000 oběma směry
-        if n2 != 0:
-            ratio = n1 / n2
-            # Tolerance pro ratio - např. 1000 vs 999.9
-            # Pokud je ratio blízko 10, 100, 1000 nebo 0.1, 0.01, 0.001
-            valid_factors = [10, 100, 1000, 0.1, 0.01, 0.001]
-            for f in valid_factors:
-                # Zkontrolujeme, zda n1 je přibližně n2 * faktor (s tolerancí aplikovanou na výsledek)
-                if abs(n1 - (n2 * f)) <= tolerance:
-                    return True
-
-        # 3. Teploty (Kelvin, Celsius, Fahrenheit)
-        # Kelvin offset: 273.15
-        # C = K - 273.15  NEBO  K = C + 273.15
-        diff = abs(n1 - n2)
-        if abs(diff - 273.15) <= 1.0: # Tolerance 1 stupeň pro konverzi K/C
-            return True
-            
-        # Fahrenheit: F = C * 1.8 + 32
-        # Zkusíme: n1 je C, n2 je F
-        f_from_n1 = n1 * 1.8 + 32
-        if abs(f_from_n1 - n2) <= max(tolerance, 1.0): return True
-        
-        # Zkusíme: n1 je F, n2 je C
-        c_from_n1 = (n1 - 32) / 1.8
-        if abs(c_from_n1 - n2) <= max(tolerance, 1.0): return True
+    def _write_csv(self, values):
+        buf = io.StringIO()
+        csv.writer(buf).writerow(values)
+        self.file.write(buf.getvalue().encode('utf-8'))
 
-        return False
+    def write(self, row):
+        if self.fmt == 'csv':
+            self._write_csv([row['article'], row['status'], row['summary'], " | ".join(row['discrepancies'])])
+        else:
+            self.file.write((json.dumps(row, ensure_ascii=False) + "\n").encode('utf-8'))
 
-    def check_values_match(self, val_cs, val_target, config_item, is_id_type):
-        mode = config_item['mode']
-        tolerance = config_item['tolerance']
-        smart_units = config_item['smart']
-
-        # Standardní (String)
-        if mode == "Standardní":
-            norm_cs = self.normalize_standard(val_cs, is_id=is_id_type)
-            norm_target = self.normalize_standard(val_target, is_id=is_id_type)
-            return (norm_cs == norm_target, norm_cs, norm_target)
-
-        # Numerické režimy
-        nums_cs = self.extract_floats(val_cs)
-        nums_target = self.extract_floats(val_target)
-
-        if not nums_cs or not nums_target:
-            s_cs = " ".join(map(str, nums_cs))
-            s_tg = " ".join(map(str, nums_target))
-            return (s_cs == s_tg, s_cs, s_tg)
-
-        # Super Agresivní (První číslo)
-        if mode == "Super Agresivní (první číslo)":
-            n1, n2 = nums_cs[0], nums_target[0]
-            
-            # Přímá shoda s tolerancí
-            match = abs(n1 - n2) <= tolerance
-            
-            # Smart Units Check
-            if not match and smart_units:
-                match = self.check_smart_match(n1, n2, tolerance)
-                
-            return (match, str(n1), str(n2))
-
-        # Agresivní (Všechna čísla)
-        if mode == "Agresivní (jen čísla)":
-            # Zde je smart unit složitější, aplikujeme ho jen pokud délky sedí
-            # a aplikujeme ho prvek po prvku.
-            if len(nums_cs) != len(nums_target):
-                return (False, str(nums_cs), str(nums_target))
-            
-            matches = []
-            for a, b in zip(nums_cs, nums_target):
-                is_match = abs(a - b) <= tolerance
-                if not is_match and smart_units:
-                    is_match = self.check_smart_match(a, b, tolerance)
-                matches.append(is_match)
-            
-            is_ok = all(matches)
-            return (is_ok, str(nums_cs), str(nums_target))
-        
-        return (False, val_cs, val_target)
+    def offset(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
 
-    # --- Worker Thread ---
-    def get_infobox_params(self, page, templates_to_find):
-        try:
-            code = page.text
-            templates = textlib.extract_templates_and_params(code)
-            combined = {}
-            found = False
-            for t_name, params in templates:
-                norm_name = t_name.replace('_', ' ').strip().lower()
-                for target in templates_to_find:
-                    if target.lower() in norm_name:
-                        clean_p = {k.strip(): v.strip() for k, v in params.items()}
-                        combined.update(clean_p)
-                        found = True
-            return combined if found else None
-        except Exception as e:
-            self.log(f"Chyba parsování {page.title()}: {e}")
-            return None
+    def close(self):
+        self.file.close()
 
-    def run_check(self, article_list, config):
-        try:
-            self.log("Připojuji se k Wikipedii...")
-            site_cs = pywikibot.Site('cs', 'wikipedia')
-            site_en = pywikibot.Site('en', 'wikipedia')
-            site_de = pywikibot.Site('de', 'wikipedia')
-            
-            target_templates = {
-                'cs': ['Infobox - chemická sloučenina'],
-                'en': ['Chembox', 'Infobox chemical', 'Chembox Identifiers', 'Chembox Properties', 'Chembox Hazards', 'Chembox Thermochemistry'],
-                'de': ['Infobox Chemikalie']
-            }
 
-            total = len(article_list)
-            
-            for i, article_name in enumerate(article_list):
-                if self.stop_event.is_set(): break
-                self.update_progress((i / total) * 100, f"Zpracovávám: {article_name}")
-                
-                page_cs = pywikibot.Page(site_cs, article_name)
-                if not page_cs.exists():
-                    self.output_result("missing", f"{article_name}: Neexistuje na CS.")
-                    continue
-                if page_cs.isRedirectPage():
-                    page_cs = page_cs.getRedirectTarget()
+def save_checkpoint(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
 
-                params_cs = self.get_infobox_params(page_cs, target_templates['cs'])
-                if not params_cs:
-                    self.output_result("missing", f"{article_name}: Bez infoboxu.")
-                    continue
 
-                item = pywikibot.ItemPage.fromPage(page_cs)
-                params_en, params_de = None, None
-                en_title, de_title = "N/A", "N/A"
+def run_cli(args):
+    """Kontrola bez GUI: výsledky průběžně do JSONL/CSV, checkpoint po CHECKPOINT_EVERY článcích."""
+    log = (lambda msg: print(msg, file=sys.stderr)) if args.verbose else (lambda msg: None)
+    config, config_langs = load_run_config(args.config)
+    target_langs = [l.strip() for l in args.langs.split(',')] if args.langs else (config_langs or list(DEFAULT_LANGS))
+    unknown = [lang for lang in target_langs if lang not in LANG_PROFILES]
+    if unknown:
+        raise ValueError(f"Neznámá wiki: {', '.join(unknown)} (podporované: {', '.join(LANG_PROFILES)})")
+    fmt = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
 
-                try:
-                    if item.exists():
-                        sitelinks = item.sitelinks
-                        if 'enwiki' in sitelinks:
-                            en_title = sitelinks['enwiki'].title
-                            params_en = self.get_infobox_params(pywikibot.Page(site_en, en_title), target_templates['en'])
-                        if 'dewiki' in sitelinks:
-                            de_title = sitelinks['dewiki'].title
-                            params_de = self.get_infobox_params(pywikibot.Page(site_de, de_title), target_templates['de'])
-                except Exception: pass
-
-                if not params_en and not params_de:
-                    self.output_result("missing", f"{article_name}: Chybí EN/DE infoboxy.")
-                    continue
+    # Checkpoint patří k jednomu vstupu a nastavení. Drží názvy hotových článků, ne pozici:
+    # výpis kategorie se mezi běhy může změnit a pozice by pak přeskakovala nebo opakovala články.
+    checkpoint_path = args.checkpoint or args.output + '.checkpoint'
+    source = os.path.abspath(args.articles) if args.articles else f"Kategorie:{args.category}"
+    run_key = {'source': source, 'format': fmt, 'checkpoint': 2,
+               'config': ChemCheckEngine().config_hash(config, target_langs)}
+    done, resume_offset = set(), None
+    if os.path.exists(checkpoint_path) and not os.path.exists(args.output) and not args.restart:
+        log(f"Výstup {args.output} chybí, checkpoint se nepoužije a kontrola začne znovu.")
+    elif os.path.exists(checkpoint_path) and not args.restart:
+        with open(checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('run') != run_key:
+            raise ValueError(f"Checkpoint {checkpoint_path} patří k jinému vstupu nebo nastavení (použijte --restart)")
+        if checkpoint.get('finished'):
+            log("Podle checkpointu je kontrola dokončená (pro nový běh použijte --restart).")
+            return 0
+        done, resume_offset = set(checkpoint['done']), checkpoint['output_offset']
+        log(f"Pokračuji, hotovo už {len(done)} článků (výstup zkrácen na {resume_offset} B)")
 
-                discrepancies = []
-
-                for label, key_cs, keys_en, keys_de, ftype, _ in self.fields_def:
-                    conf = config.get(label)
-                    if not conf or not conf['enabled']: continue
-
-                    val_cs = params_cs.get(key_cs, "")
-                    if not val_cs: continue
-
-                    if params_en:
-                        val_en = ""
-                        for k in keys_en:
-                            if k in params_en:
-                                val_en = params_en[k]
-                                break
-                        if val_en:
-                            match_ok, s_cs, s_en = self.check_values_match(val_cs, val_en, conf, ftype == 'id')
-                            if not match_ok:
-                                discrepancies.append(f"EN {label}: CS('{s_cs}') vs EN('{s_en}')")
-
-                    if params_de:
-                        val_de = ""
-                        for k in keys_de:
-                            if k in params_de:
-                                val_de = params_de[k]
-                                break
-                        if val_de:
-                            match_ok, s_cs, s_de = self.check_values_match(val_cs, val_de, conf, ftype == 'id')
-                            if not match_ok:
-                                discrepancies.append(f"DE {label}: CS('{s_cs}') vs DE('{s_de}')")
-
-                header = f"Článek: [[{article_name}]] (EN: {en_title}, DE: {de_title})"
-                if discrepancies:
-                    self.output_result("error", header + "\n" + "\n".join(discrepancies))
-                else:
-                    self.output_result("ok", header + " -> OK")
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    writer = ResultWriter(args.output, fmt, resume_offset)
+    stats = {}
+    failed = set()  # Nezkontrolované články (chyba API): do checkpointu nejdou, další běh je zkusí znovu
 
-            self.update_progress(100, "Hotovo")
-            self.msg_queue.put(("done", None))
+    def on_result(category, text, article):
+        writer.write(result_row(category, text, article))
+        stats[category] = stats.get(category, 0) + 1
+        if category == 'failed':
+            failed.add(article)
+
+    parse_cache = ParseCache(args.parse_cache)
+    engine = ChemCheckEngine(log=log, on_result=on_result, stop_event=stop_event, parse_cache=parse_cache)
+    fetcher = open_fetcher(target_langs, args.offline, log=log)
+    state = CheckState(args.state) if args.incremental else None
+    titles = (title for title in iter_article_titles(args) if title not in done)
+    checked = 0
+    finished = False
+    try:
+        while True:
+            # Po částech: v paměti je vždy jen jedna část názvů a výsledky jdou rovnou do souboru
+            chunk = list(itertools.islice(titles, CHECKPOINT_EVERY))
+            if not chunk:
+                finished = True
+                break
+            if not engine.check(chunk, config, target_langs, fetcher, state):
+                break
+            done.update(title for title in chunk if title not in failed)
+            checked += len(chunk)
+            save_checkpoint(checkpoint_path, {'run': run_key, 'done': sorted(done), 'output_offset': writer.offset()})
+            log(f"Hotovo {len(done)} článků ({', '.join(f'{k}: {v}' for k, v in sorted(stats.items()))})")
+        if finished:
+            save_checkpoint(checkpoint_path, {'run': run_key, 'done': sorted(done), 'output_offset': writer.offset(),
+                                              'finished': not failed})
+            if failed:
+                log(f"Nezkontrolováno kvůli chybám API: {len(failed)}; další spuštění je zkusí znovu.")
+    except KeyboardInterrupt:
+        stop_event.set()
+        log("Přerušeno; další spuštění naváže od posledního checkpointu.")
+    finally:
+        writer.close()
+        if isinstance(fetcher, DumpSource):
+            fetcher.close()
+        if state:
+            state.close()
+        parse_cache.close()
+    log(f"Mezipaměť parsování: {parse_cache.hits} zásahů, {parse_cache.misses} parsováno")
+    print(f"Zkontrolováno {checked} článků: " + ", ".join(f"{k}: {v}" for k, v in sorted(stats.items())), file=sys.stderr)
+    return 0 if finished and not failed else 1
 
-        except Exception as e:
-            self.log(f"Error: {e}")
-            import traceback
-            traceback.print_exc()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kontrola chemických infoboxů CS vs cizojazyčné wiki")
+    parser.add_argument("--benchmark-extractor", nargs="+", metavar="ČLÁNEK",
+                        help="porovnat rychlost a výsledky extract_infoboxes vs textlib na daných článcích")
+    parser.add_argument("--lang", default="en", help="wiki pro --benchmark-extractor (výchozí en)")
+    parser.add_argument("--repeat", type=int, default=5, help="počet opakování benchmarku")
+
+    cli = parser.add_argument_group("dávkový režim bez GUI")
+    cli.add_argument("--cli", action="store_true", help="spustit kontrolu bez GUI (vyžaduje -o a --articles nebo --category)")
+    cli.add_argument("--articles", help="soubor se seznamem článků (jeden na řádek)")
+    cli.add_argument("--category", help="kategorie na cswiki, jejíž články se zkontrolují")
+    cli.add_argument("--recurse", type=int, default=0, help="hloubka podkategorií pro --category")
+    cli.add_argument("--config", help="JSON s nastavením polí a jazyků (výchozí = výchozí nastavení GUI)")
+    cli.add_argument("--langs", help="cílové wiki oddělené čárkou (přebíjí nastavení, výchozí en,de)")
+    cli.add_argument("-o", "--output", help="výstupní soubor .jsonl nebo .csv")
+    cli.add_argument("--format", choices=("jsonl", "csv"), help="formát výstupu (výchozí podle přípony)")
+    cli.add_argument("--checkpoint", help="soubor s checkpointem (výchozí <výstup>.checkpoint)")
+    cli.add_argument("--restart", action="store_true", help="ignorovat checkpoint a začít znovu")
+    cli.add_argument("--offline", metavar="SLOŽKA", help="číst z lokálních dumpů místo živých wiki")
+    cli.add_argument("--incremental", action="store_true", help="přeskočit články beze změny revizí")
+    cli.add_argument("--state", default=STATE_PATH, help=f"databáze pro --incremental (výchozí {STATE_PATH})")
+    cli.add_argument("--parse-cache", metavar="SOUBOR", help="SQLite mezipaměť rozparsovaných infoboxů mezi běhy (výchozí jen v paměti)")
+    cli.add_argument("-v", "--verbose", action="store_true", help="průběh a log na stderr")
+    args = parser.parse_args()
+
+    if args.benchmark_extractor:
+        benchmark_extractor(args.lang, args.benchmark_extractor, args.repeat)
+        sys.exit(0)
+
+    if args.cli:
+        if not args.output or bool(args.articles) == bool(args.category):
+            parser.error("--cli vyžaduje -o a právě jedno z --articles / --category")
+        try:
+            sys.exit(run_cli(args))
+        except (ValueError, OSError) as e:
+            print(f"Chyba: {e}", file=sys.stderr)
+            sys.exit(2)
+
     root = tk.Tk()
     app = WikiChemApp(root)
     root.mainloop()